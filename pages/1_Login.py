@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
-from utils.auth import authenticate_user, register_user, init_session_state
-from utils.data_manager import load_users, save_user
+from utils.auth import authenticate_user, register_user, init_session_state, LoginRejected
+from utils.data_manager import user_exists, save_user
 
 st.set_page_config(page_title="Login - AI Learning Mentor", page_icon="🔐")
 
@@ -21,7 +21,11 @@ with tab1:
         
         if st.form_submit_button("Login", type="primary", use_container_width=True):
             if email and password:
-                user_data = authenticate_user(email, password)
+                try:
+                    user_data = authenticate_user(email, password)
+                except LoginRejected as e:
+                    st.error(str(e))
+                    st.stop()
                 if user_data:
                     st.session_state.authenticated = True
                     st.session_state.user_data = user_data
@@ -56,8 +60,7 @@ with tab2:
                     st.error("Password must be at least 6 characters long.")
                 else:
                     # Check if user already exists
-                    users_df = load_users()
-                    if email in users_df['email'].values:
+                    if user_exists(email):
                         st.error("An account with this email already exists.")
                     else:
                         # Register new user
@@ -111,19 +111,32 @@ with st.form("project_generation_form"):
     
     generate_button = st.form_submit_button("🚀 Generate Project Suggestions", type="primary", use_container_width=True)
 
+# Recent identical requests are answered from the cache; this asks the AI again
+regenerate_button = False
+if st.session_state.get('generated_projects') and st.session_state.get('project_request'):
+    regenerate_button = st.button("🔄 Regenerate Suggestions", help="Get fresh suggestions for the same options")
+
 # Generate and display projects
-if generate_button or st.session_state.get('show_projects'):
-    if generate_button:
+if generate_button or regenerate_button or st.session_state.get('show_projects'):
+    if generate_button or regenerate_button:
+        if generate_button:
+            st.session_state.project_request = {
+                'focus_area': focus_area,
+                'difficulty_level': difficulty_level,
+                'project_type': project_type,
+                'timeline': timeline,
+                'num_projects': num_projects,
+                'additional_requirements': additional_requirements
+            }
+        request = st.session_state.project_request
+        focus_area, num_projects = request['focus_area'], request['num_projects']
+        
         with st.spinner("🤖 AI is generating personalized projects for you..."):
             try:
                 projects = generate_project_suggestions(
                     user_data=user_data,
-                    focus_area=focus_area,
-                    difficulty_level=difficulty_level,
-                    project_type=project_type,
-                    timeline=timeline,
-                    num_projects=num_projects,
-                    additional_requirements=additional_requirements
+                    refresh=regenerate_button,
+                    **request
                 )
                 
                 if projects:
@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 from utils.auth import init_session_state, require_auth, is_authenticated
 from utils.gemini_client import generate_learning_roadmap
-from utils.data_manager import save_roadmap, load_user_roadmaps
+from utils.data_manager import save_roadmap, load_roadmap_records, load_roadmap_content
 
 st.set_page_config(page_title="Learning Roadmap - AI Learning Mentor", page_icon="🗺️")
 
@@ -19,25 +19,30 @@ if not is_authenticated():
 user_data = st.session_state.user_data
 
 # Display existing roadmaps
-existing_roadmaps = load_user_roadmaps(user_data['email'])
-if not existing_roadmaps.empty:
+existing_roadmaps = load_roadmap_records(user_data['email'])
+if existing_roadmaps:
     st.header("📚 Your Learning Roadmaps")
     
-    for _, roadmap in existing_roadmaps.iterrows():
-        with st.expander(f"🎯 {roadmap['title']} ({roadmap['created_at'][:10]})"):
-            st.markdown(f"**Goal:** {roadmap['goal']}")
-            st.markdown(f"**Timeline:** {roadmap['timeline']}")
-            st.markdown(f"**Difficulty:** {roadmap['difficulty_level']}")
+    for roadmap in existing_roadmaps:
+        with st.expander(f"🎯 {roadmap.title} ({str(roadmap.created_at)[:10]})"):
+            st.markdown(f"**Goal:** {roadmap.goal}")
+            st.markdown(f"**Timeline:** {roadmap.timeline}")
+            st.markdown(f"**Difficulty:** {roadmap.difficulty_level}")
             
             col1, col2 = st.columns(2)
             with col1:
-                if st.button(f"📖 View Full Roadmap", key=f"view_{roadmap['id']}"):
-                    st.session_state.viewing_roadmap = roadmap.to_dict()
-                    st.rerun()
+                if st.button(f"📖 View Full Roadmap", key=f"view_{roadmap.id}"):
+                    # The listing only has metadata; the body is loaded on demand
+                    content = load_roadmap_content(user_data['email'], roadmap.id)
+                    if content:
+                        st.session_state.viewing_roadmap = {**content, 'id': roadmap.id}
+                        st.rerun()
+                    else:
+                        st.error("This roadmap's details couldn't be loaded.")
             
             with col2:
-                if st.button(f"💬 Discuss Roadmap", key=f"discuss_{roadmap['id']}"):
-                    st.session_state.chat_context = f"I want to discuss my learning roadmap: {roadmap['title']}"
+                if st.button(f"💬 Discuss Roadmap", key=f"discuss_{roadmap.id}"):
+                    st.session_state.chat_context = f"I want to discuss my learning roadmap: {roadmap.title}"
                     st.switch_page("pages/5_Chatbot_Mentor.py")
 
 # Create new roadmap section
@@ -195,7 +200,7 @@ if generate_roadmap_btn:
                     'goal': safe_goal,
                     'timeline': timeline,
                     'difficulty_level': difficulty_level,
-                    'content': str(roadmap) if roadmap else '',
+                    'content': roadmap,
                     'created_at': st.session_state.get('current_time', ''),
                     'progress': 0
                 }
@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
 from utils.auth import init_session_state, require_auth, is_authenticated
-from utils.gemini_client import chat_with_mentor
-from utils.data_manager import save_chat_message, load_chat_history
+from utils.gemini_client import stream_chat_with_mentor
+from utils.data_manager import save_chat_message, load_chat_records
 
 st.set_page_config(page_title="AI Mentor Chat - AI Learning Mentor", page_icon="💬")
 
@@ -18,21 +18,31 @@ if not is_authenticated():
 
 user_data = st.session_state.user_data
 
+# Messages loaded from history per page
+CHAT_PAGE_SIZE = 20
+
+def load_history_page(before_id=None):
+    """Load one page of stored messages and remember where the next older page starts."""
+    page = load_chat_records(user_data['email'], before_id=before_id, limit=CHAT_PAGE_SIZE)
+    st.session_state.chat_oldest_id = page[0].id if page else before_id
+    st.session_state.chat_has_older = len(page) == CHAT_PAGE_SIZE
+    return [
+        {
+            "id": message.id,
+            "role": message.role,
+            "content": message.content,
+            "timestamp": message.timestamp
+        }
+        for message in page
+    ]
+
 # Initialize chat session
 if 'chat_messages' not in st.session_state:
     st.session_state.chat_messages = []
 
-# Load chat history
-chat_history = load_chat_history(user_data['email'])
-if not chat_history.empty and not st.session_state.chat_messages:
-    # Load recent messages
-    recent_messages = chat_history.tail(20)  # Last 20 messages
-    for _, message in recent_messages.iterrows():
-        st.session_state.chat_messages.append({
-            "role": message['role'],
-            "content": message['content'],
-            "timestamp": message['timestamp']
-        })
+# Load the most recent page of chat history
+if not st.session_state.chat_messages:
+    st.session_state.chat_messages = load_history_page()
 
 # Quick start options
 if not st.session_state.chat_messages:
@@ -84,6 +94,13 @@ if st.session_state.get('chat_context') and not any(msg['content'] == st.session
 # Chat interface
 st.header("💭 Conversation")
 
+# Older history is only loaded on request
+if st.session_state.get('chat_has_older') and st.session_state.chat_messages:
+    if st.button("⬆️ Load older messages"):
+        older_messages = load_history_page(st.session_state.chat_oldest_id)
+        st.session_state.chat_messages = older_messages + st.session_state.chat_messages
+        st.rerun()
+
 # Display chat messages
 chat_container = st.container()
 with chat_container:
@@ -130,8 +147,11 @@ if user_input:
         'timestamp': st.session_state.get('current_time', '')
     })
     
-    # Get AI response
-    with st.spinner("🤖 AI Mentor is thinking..."):
+    with st.chat_message("user"):
+        st.write(user_input)
+    
+    # Show the AI response as it is written, then keep the complete message
+    with st.chat_message("assistant"):
         try:
             # Prepare context for AI
             context = {
@@ -140,7 +160,7 @@ if user_input:
                 'current_message': user_input
             }
             
-            ai_response = chat_with_mentor(context)
+            ai_response = st.write_stream(stream_chat_with_mentor(context)).strip()
             
             if ai_response:
                 # Add AI response to chat
@@ -4,10 +4,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from utils.auth import init_session_state, require_auth, is_authenticated
-from utils.data_manager import (
-    load_user_roadmaps, load_chat_history, load_user_interactions, 
-    save_progress_entry, load_progress_entries
-)
+from utils.data_manager import query, save_progress_entry, load_progress_entries
 
 st.set_page_config(page_title="Progress Tracking - AI Learning Mentor", page_icon="📊")
 
@@ -24,11 +21,20 @@ if not is_authenticated():
 user_data = st.session_state.user_data
 user_email = user_data['email']
 
-# Load user data
-roadmaps = load_user_roadmaps(user_email)
-chat_history = load_chat_history(user_email)
-interactions = load_user_interactions(user_email)
-progress_entries = load_progress_entries(user_email)
+# Progress entries listed per page under Recent Progress Entries
+PROGRESS_PAGE_SIZE = 10
+
+# Load only the columns this page shows
+roadmaps = query('roadmaps', columns=['id'], user_email=user_email)
+chat_history = query('chat_history', columns=['role', 'timestamp'], user_email=user_email)
+interactions = query('interactions', columns=['interaction_type', 'details', 'timestamp'], user_email=user_email)
+progress_entries = query(
+    'progress',
+    columns=['progress_type', 'time_spent', 'difficulty_rating', 'skills_gained', 'timestamp'],
+    user_email=user_email,
+    order_by='id',
+    descending=True
+)
 
 # Overview cards
 st.header("📈 Learning Overview")
@@ -186,6 +192,8 @@ with st.form("progress_form"):
             }
             
             if save_progress_entry(progress_entry):
+                # Reload the entry list so it starts from the new entry
+                st.session_state.pop('progress_history', None)
                 st.success("🎉 Progress logged successfully!")
                 st.balloons()
                 st.rerun()
@@ -251,7 +259,7 @@ if not progress_entries.empty:
         
         # Activity type distribution with error handling
         try:
-            type_counts = filtered_entries['progress_type'].value_counts()
+            type_counts = filtered_entries['progress_type'].astype(str).value_counts()
         except:
             type_counts = pd.Series([1], index=['Unknown'])
         
@@ -271,7 +279,7 @@ if not progress_entries.empty:
         
         # Time investment analysis with error handling
         try:
-            filtered_entries['time_hours'] = filtered_entries['time_spent'].map(time_mapping).fillna(1.0)
+            filtered_entries['time_hours'] = filtered_entries['time_spent'].astype(str).map(time_mapping).fillna(1.0)
         except:
             filtered_entries['time_hours'] = 1.0
         total_time = filtered_entries['time_hours'].sum()
@@ -283,11 +291,25 @@ if not progress_entries.empty:
         with col2:
             st.metric("📊 Average Session", f"{avg_time:.1f} hours")
         
-        # Recent progress entries
+        # Recent progress entries, loaded a page at a time (newest first)
         st.subheader("📖 Recent Progress Entries")
         
-        for _, entry in filtered_entries.head(10).iterrows():
-            with st.expander(f"🎯 {entry['progress_type']} - {entry['timestamp'][:10]}"):
+        if 'progress_history' not in st.session_state:
+            first_page = load_progress_entries(user_email, limit=PROGRESS_PAGE_SIZE)
+            st.session_state.progress_history = first_page.to_dict('records')
+            st.session_state.progress_has_older = len(first_page) == PROGRESS_PAGE_SIZE
+        
+        listed_entries = pd.DataFrame(st.session_state.progress_history)
+        if not listed_entries.empty:
+            try:
+                listed_entries = listed_entries[pd.to_datetime(listed_entries['timestamp']).dt.date >= date_filter]
+            except:
+                pass
+            if type_filter != "All":
+                listed_entries = listed_entries[listed_entries['progress_type'] == type_filter]
+        
+        for _, entry in listed_entries.iterrows():
+            with st.expander(f"🎯 {entry['progress_type']} - {str(entry['timestamp'])[:10]}"):
                 st.markdown(f"**Description:** {entry['description']}")
                 
                 col1, col2 = st.columns(2)
@@ -300,6 +322,14 @@ if not progress_entries.empty:
                         st.markdown(f"**Skills Gained:** {entry['skills_gained']}")
                     if entry.get('next_steps'):
                         st.markdown(f"**Next Steps:** {entry['next_steps']}")
+        
+        if st.session_state.get('progress_has_older') and st.session_state.progress_history:
+            if st.button("⬇️ Load older entries"):
+                oldest_id = min(int(entry['id']) for entry in st.session_state.progress_history)
+                older_page = load_progress_entries(user_email, before_id=oldest_id, limit=PROGRESS_PAGE_SIZE)
+                st.session_state.progress_history += older_page.to_dict('records')
+                st.session_state.progress_has_older = len(older_page) == PROGRESS_PAGE_SIZE
+                st.rerun()
     else:
         st.info("No progress entries found for the selected filters.")
 
@@ -1,12 +1,30 @@
 import streamlit as st
 import pandas as pd
-import hashlib
+import uuid
 from datetime import datetime
-from utils.data_manager import load_users, save_user
+from utils.data_manager import find_user, save_user, save_user_profile
+from utils import login_guard, passwords
+from utils.login_guard import LoginRejected
+
+# Verified when the email isn't registered, so unknown emails take as long as wrong passwords
+_UNKNOWN_USER_HASH = passwords.hash_password(uuid.uuid4().hex)
 
 def hash_password(password: str) -> str:
-    """Hash a password using SHA256."""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash a password with PBKDF2 (on the bounded hashing pool)."""
+    return login_guard.run_bounded(passwords.hash_password, password)
+
+def client_key() -> str:
+    """Identify the client making the request for login throttling."""
+    context = getattr(st, 'context', None)
+    headers = getattr(context, 'headers', None) or {}
+    # X-Forwarded-For only counts when sent by an AUTH_TRUSTED_PROXIES proxy
+    address = login_guard.client_address(getattr(context, 'ip_address', None), headers.get('X-Forwarded-For', ''))
+    if address:
+        return address
+    # No address available: fall back to this browser session
+    if 'client_key' not in st.session_state:
+        st.session_state.client_key = uuid.uuid4().hex
+    return st.session_state.client_key
 
 def init_session_state():
     """Initialize session state variables."""
@@ -32,30 +50,32 @@ def require_auth():
         st.stop()
 
 def authenticate_user(email: str, password: str) -> dict | None:
-    """Authenticate user with email and password."""
+    """Authenticate user with email and password.
+    
+    Raises LoginRejected when the attempt is throttled or the server is too
+    busy to check it.
+    """
     try:
-        users_df = load_users()
-        
-        if users_df.empty:
-            return None
+        login_guard.check_attempt(email, client_key())
         
-        # Find user by email
-        user_row = users_df[users_df['email'] == email]
+        # Indexed lookup by email, ignoring letter case
+        user_data = find_user(email)
+        stored_password = user_data.get('password', '') if user_data else _UNKNOWN_USER_HASH
         
-        if user_row.empty:
+        # Legacy SHA-256 and plain-text passwords still verify
+        if not login_guard.run_bounded(passwords.verify_password, password, stored_password) or user_data is None:
             return None
         
-        user_data = user_row.iloc[0].to_dict()
-        stored_password = user_data.get('password', '')
-        
-        # Check password (support both hashed and plain text for backward compatibility)
-        if stored_password == password or stored_password == hash_password(password):
-            # Remove password from returned data for security
-            user_data.pop('password', None)
-            return user_data
+        # Upgrade legacy or cheaper hashes now that we know the password
+        if passwords.needs_rehash(stored_password):
+            save_user_profile({'email': user_data['email'], 'password': hash_password(password)})
         
-        return None
+        # Remove password from returned data for security
+        user_data.pop('password', None)
+        return user_data
     
+    except LoginRejected:
+        raise
     except Exception as e:
         st.error(f"Authentication error: {str(e)}")
         return None
@@ -69,6 +89,9 @@ def register_user(user_data: dict) -> bool:
         # Save user to CSV
         return save_user(user_data)
     
+    except LoginRejected as e:
+        st.error(str(e))
+        return False
     except Exception as e:
         st.error(f"Registration error: {str(e)}")
         return False
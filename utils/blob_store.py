@@ -0,0 +1,91 @@
+"""Content-addressed JSON blobs.
+
+Each value is stored once as canonical JSON under the SHA-256 of that JSON,
+in `<blob_dir>/<first two hex digits>/<digest>.json`, or compressed by
+utils.text_codec in `<digest>.json.z`. Blobs are never modified, so writers
+don't need locks: saving a value that is already stored is a no-op, and a
+blob is written to a temp file and renamed into place so readers never see
+a partial one.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+from utils import text_codec
+
+COMPRESSED_SUFFIX = '.z'
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def blob_path(blob_dir: str, digest: str) -> str:
+    """Path of the blob with the given digest."""
+    return os.path.join(blob_dir, digest[:2], f"{digest}.json")
+
+def put(blob_dir: str, value: Any, kind: Optional[str] = None) -> str:
+    """Store a JSON-serializable value and return its digest.
+    
+    With a `kind`, the blob is compressed (with that kind's dictionary, if
+    one was trained) unless DATA_TEXT_COMPRESSION is off.
+    """
+    data = _encode(value)
+    digest = hashlib.sha256(data).hexdigest()
+    file_path = blob_path(blob_dir, digest)
+    if os.path.exists(file_path) or os.path.exists(file_path + COMPRESSED_SUFFIX):
+        return digest
+    if kind is not None and text_codec.TEXT_COMPRESSION != 'off':
+        data = text_codec.compress(data, kind)
+        file_path += COMPRESSED_SUFFIX
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return digest
+
+def get_bytes(blob_dir: str, digest: str) -> bytes:
+    """The canonical JSON stored under a digest; raises FileNotFoundError if it's missing."""
+    file_path = blob_path(blob_dir, digest)
+    try:
+        with open(file_path + COMPRESSED_SUFFIX, 'rb') as f:
+            return text_codec.decompress(f.read())
+    except FileNotFoundError:
+        with open(file_path, 'rb') as f:
+            return f.read()
+
+def get(blob_dir: str, digest: str) -> Any:
+    """Load the value stored under a digest; raises FileNotFoundError if it's missing."""
+    return json.loads(get_bytes(blob_dir, digest).decode('utf-8'))
+
+def remove_unreferenced(blob_dir: str, referenced: Iterable[str], min_age: float = 3600) -> int:
+    """Delete blobs whose digest isn't in `referenced`; returns how many were removed.
+
+    Blobs younger than `min_age` seconds are kept, since a save may have
+    stored its blob but not yet the row that references it.
+    """
+    referenced = set(referenced)
+    cutoff = time.time() - min_age
+    removed = 0
+    if not os.path.isdir(blob_dir):
+        return removed
+    for prefix in os.listdir(blob_dir):
+        prefix_dir = os.path.join(blob_dir, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for name in os.listdir(prefix_dir):
+            file_path = os.path.join(prefix_dir, name)
+            digest = name[:-len(COMPRESSED_SUFFIX)] if name.endswith(COMPRESSED_SUFFIX) else name
+            if digest.endswith('.json') and digest[:-len('.json')] not in referenced and os.path.getmtime(file_path) < cutoff:
+                os.remove(file_path)
+                removed += 1
+    return removed
@@ -1,8 +1,19 @@
 import pandas as pd
 import os
+import ast
+import contextlib
 import csv
-from datetime import datetime
-from typing import Dict, Any, List
+import io
+import json
+import math
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from utils import blob_store, file_lock, id_allocator, parquet_store, records, segment_log, sqlite_store, text_codec, user_index, user_stats, write_queue
+from utils.sqlite_store import USER_COLUMNS, TIME_COLUMNS
 
 # File paths for data storage
 DATA_DIR = "data"
@@ -12,353 +23,1967 @@ INTERACTIONS_FILE = os.path.join(DATA_DIR, "interactions.csv")
 CHAT_HISTORY_FILE = os.path.join(DATA_DIR, "chat_history.csv")
 PROGRESS_FILE = os.path.join(DATA_DIR, "progress.csv")
 
+# Storage backend: 'csv' (files above), 'sqlite' (one indexed database file) or
+# 'parquet', which keeps the CSV files' layout and append path but stores
+# users, roadmaps and sealed log segments as Parquet with compact dtypes
+STORAGE_BACKEND = os.environ.get("DATA_BACKEND", "csv").lower()
+SQLITE_FILE = os.environ.get("DATA_SQLITE_PATH", os.path.join(DATA_DIR, "mentor.db"))
+
+# Per-user counters behind get_user_stats, kept in SQLite for every backend
+STATS_FILE = os.path.join(DATA_DIR, "user_stats.db")
+
+# Users keyed by lower-cased email for login and signup checks, for every backend
+USER_INDEX_FILE = os.path.join(DATA_DIR, "user_index.db")
+
+# Roadmap bodies are stored as JSON blobs named by their SHA-256, outside the
+# roadmaps table; rows only keep the blob's content_hash. Rows saved before
+# that still carry the body (a Python repr) in their content column.
+ROADMAP_BLOB_DIR = os.path.join(DATA_DIR, "blobs", "roadmaps")
+
+# Event rows older than DATA_ARCHIVE_DAYS are moved out of the hot logs by
+# archive_cold_rows into compressed segments under
+# archive/<table>/<YYYY-MM>/, one directory per month of the rows' times.
+# Reads only open the archive months their time range covers.
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+ARCHIVE_DAYS = int(os.environ.get("DATA_ARCHIVE_DAYS", "90"))
+ARCHIVE_BATCH_ROWS = 100000
+
+# Long text fields stored compressed (see utils/text_codec.py), with the kind
+# of dictionary each is compressed with; roadmap blobs are compressed too.
+# Values are decompressed by the loaders, after filtering and paging.
+TEXT_FIELDS = {'chat_history': {'content': 'chat'}}
+TEXT_DICT_DIR = os.path.join(DATA_DIR, "dicts")
+
+# CSV file layout: 'flat' (one file per table) or 'partitioned', where each
+# table is split into DATA_PARTITIONS files by a hash of the user's email so a
+# user's reads and writes only touch their own bucket. Changing either setting
+# needs `python -m utils.storage_admin repartition` to move existing rows.
+DATA_LAYOUT = os.environ.get("DATA_LAYOUT", "flat").lower()
+PARTITION_COUNT = int(os.environ.get("DATA_PARTITIONS", "16"))
+
+# Columns of each table, in file order
+TABLE_COLUMNS = {
+    'users': [
+        'name', 'email', 'password', 'experience_level', 'age_group',
+        'interests', 'skills', 'time_commitment', 'learning_style',
+        'short_term_goals', 'long_term_goals', 'created_at', 'updated_at', 'goals'
+    ],
+    'roadmaps': [
+        'id', 'user_email', 'title', 'goal', 'timeline', 'difficulty_level',
+        'content', 'progress', 'created_at', 'updated_at', 'content_hash'
+    ],
+    'interactions': [
+        'id', 'user_email', 'interaction_type', 'details', 'timestamp'
+    ],
+    'chat_history': [
+        'id', 'user_email', 'role', 'content', 'timestamp'
+    ],
+    'progress': [
+        'id', 'user_email', 'progress_type', 'description', 'time_spent',
+        'difficulty_rating', 'skills_gained', 'next_steps', 'timestamp'
+    ],
+}
+
+# String columns whose NaNs are replaced with '' when a table is loaded
+STRING_COLUMNS = {
+    'users': ['name', 'email', 'experience_level', 'age_group', 'interests', 'skills', 'learning_style', 'short_term_goals', 'long_term_goals'],
+    'roadmaps': ['title', 'content', 'goal', 'content_hash'],
+    'interactions': ['interaction_type', 'details'],
+    'chat_history': ['role', 'content'],
+    'progress': ['progress_type', 'details', 'time_spent'],
+}
+
+# Roadmap columns loaded for listings, leaving out the body
+ROADMAP_INDEX_COLUMNS = [
+    'id', 'user_email', 'title', 'goal', 'timeline', 'difficulty_level',
+    'progress', 'created_at', 'content_hash'
+]
+
+# Durability of appended rows: 'always' fsyncs every row, 'interval' at most
+# once every DATA_FSYNC_INTERVAL seconds per file, 'never' leaves it to the OS
+FSYNC_POLICY = os.environ.get("DATA_FSYNC", "never").lower()
+FSYNC_INTERVAL = float(os.environ.get("DATA_FSYNC_INTERVAL", "1.0"))
+
+# Rows parsed per chunk when query() scans a CSV file
+QUERY_CHUNK_ROWS = 50000
+
+# Event rows appended per batch by bulk_insert()
+BULK_BATCH_ROWS = 1000
+
+# Event tables are segmented logs: the active file is only appended to and is
+# sealed into a segment once it reaches SEGMENT_BYTES
+SEGMENTED_TABLES = ['interactions', 'chat_history', 'progress']
+SEGMENT_BYTES = int(os.environ.get("DATA_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+
+# Write-behind mode: chat, interaction and progress saves return once the row
+# is queued and a background thread appends queued rows in batches. A row
+# waits at most DATA_WRITE_BEHIND_LATENCY seconds; at most
+# DATA_WRITE_BEHIND_QUEUE rows wait at once (saves block beyond that).
+# Reads merge in this process's pending rows; they are flushed at exit.
+WRITE_BEHIND = os.environ.get("DATA_WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_LATENCY = float(os.environ.get("DATA_WRITE_BEHIND_LATENCY", "0.5"))
+WRITE_BEHIND_QUEUE = int(os.environ.get("DATA_WRITE_BEHIND_QUEUE", "10000"))
+WRITE_BEHIND_BATCH = 500
+
+# Chat retention is per user: each user keeps their newest CHAT_KEEP_MESSAGES
+# messages and, when DATA_CHAT_KEEP_DAYS is set, none older than that. A
+# background thread merges sealed chat segments and applies retention to them
+# whenever one is sealed, and otherwise every CHAT_COMPACT_INTERVAL seconds.
+CHAT_KEEP_MESSAGES = int(os.environ.get("DATA_CHAT_KEEP_MESSAGES", "1000"))
+CHAT_KEEP_DAYS = int(os.environ.get("DATA_CHAT_KEEP_DAYS", "0"))
+CHAT_COMPACT_INTERVAL = float(os.environ.get("DATA_CHAT_COMPACT_INTERVAL", "60"))
+
+_last_fsync: Dict[str, float] = {}
+_compactor = {'thread': None}
+_compactor_lock = threading.Lock()
+_compact_wakeup = threading.Event()
+
+# Parsed CSV tables shared by every session in this server process, keyed by
+# file path. An entry is reused while the file's mtime/size and our own write
+# version for it are unchanged; set DATA_CACHE=0 to always re-read.
+TABLE_CACHE_ENABLED = os.environ.get("DATA_CACHE", "1") != "0"
+_table_cache: Dict[str, tuple] = {}
+_write_versions: Dict[str, int] = {}
+_cache_stats = {'hits': 0, 'misses': 0, 'tail_reads': 0, 'tail_rows': 0, 'rebuilds': 0}
+_cache_lock = threading.Lock()
+
+# Event log CSV files are only ever appended to in place (rewrites replace the
+# file), so their cache entries remember the byte offset parsed up to and only
+# parse the bytes appended since, with a per-user index of the rows' positions.
+# A file that was replaced, shrank or no longer holds the bytes last read at
+# that offset is parsed again from the start. The new rows are kept as chunks
+# until TAIL_MAX_CHUNKS of them are merged into one frame. DATA_TAIL_READS=0
+# re-parses a changed log file in full instead.
+TAIL_READS_ENABLED = os.environ.get("DATA_TAIL_READS", "1") != "0"
+TAIL_MAX_CHUNKS = 64
+TAIL_CHECK_BYTES = 64
+_tails: Dict[str, Dict[str, Any]] = {}
+
+# Written once renumber_legacy_ids() has given legacy rows unique ids; until
+# then readers can't treat rows with the same id as copies of one row
+IDS_UNIQUE_MARKER = ".ids_unique"
+_ids_unique_dirs = set()
+
+id_allocator.configure(os.path.join(DATA_DIR, ".id_floor"))
+text_codec.configure(TEXT_DICT_DIR)
+write_queue.configure(lambda table, rows: _write_events(table, rows), WRITE_BEHIND_QUEUE, WRITE_BEHIND_LATENCY, WRITE_BEHIND_BATCH)
+
+def set_data_dir(data_dir: str):
+    """Point all data files at a different directory (used by tools and benchmarks)."""
+    flush_writes()
+    global DATA_DIR, USERS_FILE, ROADMAPS_FILE, INTERACTIONS_FILE, CHAT_HISTORY_FILE, PROGRESS_FILE, SQLITE_FILE, STATS_FILE, USER_INDEX_FILE, ROADMAP_BLOB_DIR, ARCHIVE_DIR, TEXT_DICT_DIR
+    DATA_DIR = data_dir
+    SQLITE_FILE = os.path.join(DATA_DIR, "mentor.db")
+    STATS_FILE = os.path.join(DATA_DIR, "user_stats.db")
+    USER_INDEX_FILE = os.path.join(DATA_DIR, "user_index.db")
+    ROADMAP_BLOB_DIR = os.path.join(DATA_DIR, "blobs", "roadmaps")
+    ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+    TEXT_DICT_DIR = os.path.join(DATA_DIR, "dicts")
+    USERS_FILE = os.path.join(DATA_DIR, "users.csv")
+    ROADMAPS_FILE = os.path.join(DATA_DIR, "roadmaps.csv")
+    INTERACTIONS_FILE = os.path.join(DATA_DIR, "interactions.csv")
+    CHAT_HISTORY_FILE = os.path.join(DATA_DIR, "chat_history.csv")
+    PROGRESS_FILE = os.path.join(DATA_DIR, "progress.csv")
+    _last_fsync.clear()
+    clear_table_cache()
+    sqlite_store.close_all()
+    id_allocator.configure(os.path.join(DATA_DIR, ".id_floor"))
+    text_codec.configure(TEXT_DICT_DIR)
+
+def table_files() -> Dict[str, str]:
+    """Map each table name to its CSV file."""
+    return {
+        'users': USERS_FILE,
+        'roadmaps': ROADMAPS_FILE,
+        'interactions': INTERACTIONS_FILE,
+        'chat_history': CHAT_HISTORY_FILE,
+        'progress': PROGRESS_FILE,
+    }
+
 def init_data_files():
-    """Initialize CSV files if they don't exist."""
+    """Initialize CSV files (or the SQLite schema) if they don't exist."""
     # Create data directory if it doesn't exist
     os.makedirs(DATA_DIR, exist_ok=True)
+    _init_tables()
     
-    # Initialize users file
-    if not os.path.exists(USERS_FILE):
-        users_columns = [
-            'name', 'email', 'password', 'experience_level', 'age_group',
-            'interests', 'skills', 'time_commitment', 'learning_style',
-            'short_term_goals', 'long_term_goals', 'created_at', 'updated_at'
-        ]
-        users_df = pd.DataFrame(columns=users_columns)
-        users_df.to_csv(USERS_FILE, index=False)
-    
-    # Initialize roadmaps file
-    if not os.path.exists(ROADMAPS_FILE):
-        roadmaps_columns = [
-            'id', 'user_email', 'title', 'goal', 'timeline', 'difficulty_level',
-            'content', 'progress', 'created_at', 'updated_at'
-        ]
-        roadmaps_df = pd.DataFrame(columns=roadmaps_columns)
-        roadmaps_df.to_csv(ROADMAPS_FILE, index=False)
-    
-    # Initialize interactions file
-    if not os.path.exists(INTERACTIONS_FILE):
-        interactions_columns = [
-            'id', 'user_email', 'interaction_type', 'details', 'timestamp'
-        ]
-        interactions_df = pd.DataFrame(columns=interactions_columns)
-        interactions_df.to_csv(INTERACTIONS_FILE, index=False)
-    
-    # Initialize chat history file
-    if not os.path.exists(CHAT_HISTORY_FILE):
-        chat_columns = [
-            'id', 'user_email', 'role', 'content', 'timestamp'
-        ]
-        chat_df = pd.DataFrame(columns=chat_columns)
-        chat_df.to_csv(CHAT_HISTORY_FILE, index=False)
-    
-    # Initialize progress file
-    if not os.path.exists(PROGRESS_FILE):
-        progress_columns = [
-            'id', 'user_email', 'progress_type', 'description', 'time_spent',
-            'difficulty_rating', 'skills_gained', 'next_steps', 'timestamp'
-        ]
-        progress_df = pd.DataFrame(columns=progress_columns)
-        progress_df.to_csv(PROGRESS_FILE, index=False)
+    # Data saved before the stats table or user index existed: build them once
+    if not os.path.exists(STATS_FILE):
+        rebuild_user_stats()
+    if not os.path.exists(USER_INDEX_FILE):
+        rebuild_user_index()
+    # Rows saved before the id allocator can share ids: renumber them once
+    if not _ids_unique():
+        renumber_legacy_ids()
 
-def load_users() -> pd.DataFrame:
-    """Load users from CSV file."""
-    try:
-        df = pd.read_csv(USERS_FILE)
-        # Ensure all string columns don't have NaN values
-        string_columns = ['name', 'email', 'experience_level', 'age_group', 'interests', 'skills', 'learning_style', 'short_term_goals', 'long_term_goals']
-        for col in string_columns:
-            if col in df.columns:
-                df[col] = df[col].fillna('')
+def _init_tables():
+    """Create the backend's tables or files that don't exist yet."""
+    if STORAGE_BACKEND == 'sqlite':
+        sqlite_store.init_schema(SQLITE_FILE, TABLE_COLUMNS)
+        return
+    if STORAGE_BACKEND == 'parquet':
+        parquet_store.require()
+    
+    if DATA_LAYOUT == 'partitioned':
+        # Partition files are created on first write; existing CSV partitions
+        # of Parquet tables are converted now so no reads miss them
+        for table in TABLE_COLUMNS:
+            table_dir = os.path.join(DATA_DIR, table)
+            os.makedirs(table_dir, exist_ok=True)
+            if _file_extension(table) == '.parquet':
+                for name in os.listdir(table_dir):
+                    if name.startswith('part-') and name.endswith('.csv'):
+                        file_path = os.path.join(table_dir, name[:-len('.csv')] + '.parquet')
+                        with file_lock.locked(file_path):
+                            _ensure_file(table, file_path)
+        return
+    
+    # Create an empty file with just the header for each missing table
+    for table in TABLE_COLUMNS:
+        file_path = _flat_file(table)
+        with file_lock.locked(file_path):
+            _ensure_file(table, file_path)
+
+def partition_of(user_email: Any, partitions: int = None) -> int:
+    """Return the partition bucket for a user's email."""
+    key = str(user_email).strip().lower().encode('utf-8')
+    return zlib.crc32(key) % (partitions or PARTITION_COUNT)
+
+def partition_file(table: str, bucket: int, data_dir: str = None, extension: str = None) -> str:
+    """Path of one partition file of a table."""
+    return os.path.join(data_dir or DATA_DIR, table, f"part-{bucket:03d}{extension or _file_extension(table)}")
+
+def _file_extension(table: str) -> str:
+    """Extension of a table's (active) files: event logs always take appends as CSV."""
+    if STORAGE_BACKEND == 'parquet' and table not in SEGMENTED_TABLES:
+        return '.parquet'
+    return '.csv'
+
+def _flat_file(table: str) -> str:
+    """A table's single file in the flat layout."""
+    return os.path.splitext(table_files()[table])[0] + _file_extension(table)
+
+def _table_path(table: str, user_email: Any) -> str:
+    """The file holding a given user's rows of a table."""
+    if DATA_LAYOUT == 'partitioned':
+        return partition_file(table, partition_of(user_email))
+    return _flat_file(table)
+
+def _table_paths(table: str) -> List[str]:
+    """All files holding rows of a table, sealed segments included."""
+    if DATA_LAYOUT == 'partitioned':
+        table_dir = os.path.join(DATA_DIR, table)
+        if not os.path.isdir(table_dir):
+            return []
+        extensions = ('.csv', '.parquet') if table in SEGMENTED_TABLES else (_file_extension(table),)
+        return sorted(
+            os.path.join(table_dir, name) for name in os.listdir(table_dir)
+            if name.startswith('part-') and name.endswith(extensions)
+        )
+    return _log_paths(table, _flat_file(table))
+
+def _log_paths(table: str, file_path: str) -> List[str]:
+    """A table file followed by its sealed segments, oldest rows first."""
+    if table not in SEGMENTED_TABLES:
+        return [file_path]
+    return segment_log.segment_paths(file_path) + [file_path]
+
+def _active_paths(table: str) -> List[str]:
+    """The files of a table that receive appends (no sealed segments)."""
+    return [path for path in _table_paths(table) if not segment_log.is_segment(path)]
+
+def _ensure_file(table: str, file_path: str):
+    """Create a table file with the table's header if it doesn't exist yet.
+    
+    A missing Parquet file is created from the CSV file it replaces, if any.
+    Callers hold the file's lock, so two processes can't both create it.
+    """
+    if not os.path.exists(file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        columns = TABLE_COLUMNS[table]
+        if table == 'users':
+            columns = [col for col in columns if col != 'goals']
+        df = pd.DataFrame(columns=columns)
+        
+        if file_path.endswith('.parquet'):
+            csv_path = os.path.splitext(file_path)[0] + '.csv'
+            if os.path.exists(csv_path):
+                df = _read_file(table, csv_path)
+        _replace_file(table, file_path, df)
+
+def clear_table_cache():
+    """Drop every cached table and reset the hit/miss counters."""
+    with _cache_lock:
+        _table_cache.clear()
+        _tails.clear()
+        for key in _cache_stats:
+            _cache_stats[key] = 0
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters for the shared table cache.
+    
+    tail_reads counts lookups of a grown log file that parsed only its new
+    rows (tail_rows of them); rebuilds counts log files parsed in full.
+    """
+    with _cache_lock:
+        lookups = _cache_stats['hits'] + _cache_stats['misses']
+        return {
+            'hits': _cache_stats['hits'],
+            'misses': _cache_stats['misses'],
+            'hit_rate': _cache_stats['hits'] / lookups if lookups else 0.0,
+            'entries': len(_table_cache) + len(_tails),
+            'tail_reads': _cache_stats['tail_reads'],
+            'tail_rows': _cache_stats['tail_rows'],
+            'rebuilds': _cache_stats['rebuilds']
+        }
+
+def _bump_version(file_path: str):
+    """Invalidate cached copies of a file we have just written."""
+    with _cache_lock:
+        _write_versions[file_path] = _write_versions.get(file_path, 0) + 1
+
+def _read_file(table: str, file_path: str) -> pd.DataFrame:
+    """Parse one table file into a cleaned DataFrame."""
+    if file_path.endswith('.parquet'):
+        return parquet_store.read_table(file_path, table, STRING_COLUMNS[table])
+    
+    try:
+        df = pd.read_csv(file_path)
+    except pd.errors.EmptyDataError:
+        df = pd.DataFrame()
+    return _clean_frame(table, df)
+
+def _clean_frame(table: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Fill string NaNs and, for the parquet backend, convert to the compact dtypes."""
+    df = _fill_strings(df, STRING_COLUMNS[table])
+    if STORAGE_BACKEND == 'parquet':
+        df = parquet_store.compact_dtypes(df, table, STRING_COLUMNS[table])
+    return df
+
+def _cached_frame(file_path: str) -> Optional[pd.DataFrame]:
+    """The table cache's copy of a file if it is still current, without reading the file."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    
+    key = (stat.st_mtime_ns, stat.st_size, _write_versions.get(file_path, 0))
+    with _cache_lock:
+        entry = _table_cache.get(file_path)
+        if TABLE_CACHE_ENABLED and entry and entry[0] == key:
+            _cache_stats['hits'] += 1
+            return entry[1]
+    return None
+
+def _read_cached(table: str, file_path: str) -> pd.DataFrame:
+    """Return a table file's cleaned DataFrame, parsing the file only when it changed.
+    
+    The returned frame is shared; callers must not modify it in place.
+    """
+    if _tails_file(table, file_path):
+        return _tail_rows(table, file_path)
+    
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return pd.DataFrame()
+    
+    # Take the key before reading so a concurrent write can only cause an extra re-read
+    key = (stat.st_mtime_ns, stat.st_size, _write_versions.get(file_path, 0))
+    with _cache_lock:
+        entry = _table_cache.get(file_path)
+        if TABLE_CACHE_ENABLED and entry and entry[0] == key:
+            _cache_stats['hits'] += 1
+            return entry[1]
+        _cache_stats['misses'] += 1
+    
+    try:
+        df = _read_file(table, file_path)
+    except FileNotFoundError:
+        # Removed by a compaction since the stat
+        return pd.DataFrame()
+    
+    if TABLE_CACHE_ENABLED:
+        with _cache_lock:
+            _table_cache[file_path] = (key, df)
+    return df
+
+def _tails_file(table: str, file_path: str) -> bool:
+    """Whether a file is cached by offset: a CSV file of an event log."""
+    return TABLE_CACHE_ENABLED and TAIL_READS_ENABLED and table in SEGMENTED_TABLES and file_path.endswith('.csv')
+
+def _concat_chunks(table: str, frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunks of one file (no duplicates to drop, unlike _combine_frames)."""
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    if STORAGE_BACKEND == 'parquet':
+        df = parquet_store.compact_dtypes(df, table, STRING_COLUMNS[table])
+    return df
+
+def _index_chunk(table: str, entry: Dict[str, Any], chunk: pd.DataFrame):
+    """Add a parsed chunk to a tail entry and its rows to the per-user index."""
+    entry['frames'].append(chunk)
+    if USER_COLUMNS[table] not in chunk.columns:
+        return
+    chunk_no = len(entry['frames']) - 1
+    for email, positions in chunk.groupby(USER_COLUMNS[table], sort=False, observed=True).indices.items():
+        entry['users'].setdefault(email, []).append((chunk_no, positions))
+
+def _merge_chunks(table: str, entry: Dict[str, Any]):
+    """Merge a tail entry's chunks into one frame and re-index it."""
+    frames = entry['frames']
+    entry['frames'] = []
+    entry['users'] = {}
+    _index_chunk(table, entry, _concat_chunks(table, frames))
+
+def _refresh_tail(table: str, file_path: str, entry: Dict[str, Any]) -> bool:
+    """Bring a tail entry up to date with its file; the caller holds the entry's lock.
+    
+    Returns False if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return False
+    if entry['stat'] == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+        with _cache_lock:
+            _cache_stats['hits'] += 1
+        return True
+    
+    try:
+        # Writers append whole rows under the file's lock; sealed segments are never appended to
+        lock = file_lock.locked(file_path) if not segment_log.is_segment(file_path) else contextlib.nullcontext()
+        with lock, open(file_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            check = entry['check']
+            appended = entry['stat'] is not None and entry['stat'][0] == stat.st_ino and entry['offset'] <= stat.st_size
+            if appended:
+                f.seek(entry['offset'] - len(check))
+                data = f.read()
+                appended = data.startswith(check)
+            if not appended:
+                f.seek(0)
+                data = f.read()
+    except FileNotFoundError:
+        return False
+    
+    if appended:
+        new = data[len(check):]
+        entry['offset'] += len(new)
+    else:
+        # First read, or the file was replaced or rewritten: parse it all
+        header_end = data.find(b'\n') + 1 or len(data)
+        entry.update(header=data[:header_end], offset=len(data), frames=[], users={})
+        new = data[header_end:]
+        with _cache_lock:
+            _cache_stats['misses'] += 1
+            _cache_stats['rebuilds'] += 1
+    entry['check'] = data[-TAIL_CHECK_BYTES:]
+    entry['stat'] = (stat.st_ino, entry['offset'], stat.st_mtime_ns)
+    
+    if new or not entry['frames']:
+        try:
+            chunk = _clean_frame(table, pd.read_csv(io.BytesIO(entry['header'] + new)))
+        except pd.errors.EmptyDataError:
+            chunk = pd.DataFrame()
+        _index_chunk(table, entry, chunk)
+        if appended:
+            with _cache_lock:
+                _cache_stats['tail_reads'] += 1
+                _cache_stats['tail_rows'] += len(chunk)
+        if len(entry['frames']) > TAIL_MAX_CHUNKS:
+            _merge_chunks(table, entry)
+    return True
+
+def _tail_rows(table: str, file_path: str, user_email: Optional[str] = None, before_id: Optional[int] = None,
+               limit: Optional[int] = None) -> pd.DataFrame:
+    """An event log CSV file's rows (or one user's), parsing only what was appended since the last read.
+    
+    With a user and a `limit`, only that user's newest `limit` rows with ids
+    below `before_id` are taken from the index, newest first. The returned
+    frame is shared when it holds every row; callers must not modify it in
+    place.
+    """
+    with _cache_lock:
+        entry = _tails.get(file_path)
+        if entry is None:
+            entry = _tails[file_path] = {'lock': threading.Lock(), 'stat': None, 'offset': 0, 'check': b'', 'frames': [], 'users': {}}
+    
+    with entry['lock']:
+        if not _refresh_tail(table, file_path, entry):
+            with _cache_lock:
+                _tails.pop(file_path, None)
+            return pd.DataFrame()
+        if user_email is None:
+            if len(entry['frames']) > 1:
+                _merge_chunks(table, entry)
+            return entry['frames'][0]
+        
+        if limit is not None:
+            return _newest_rows(table, entry, user_email, before_id, limit)
+        pieces = [entry['frames'][chunk_no].iloc[positions] for chunk_no, positions in entry['users'].get(user_email, [])]
+        if not pieces:
+            return entry['frames'][0].iloc[0:0]
+        return _concat_chunks(table, pieces) if len(pieces) > 1 else pieces[0]
+
+def _newest_rows(table: str, entry: Dict[str, Any], user_email: str, before_id: Optional[int], limit: int) -> pd.DataFrame:
+    """A user's newest `limit` rows of a tail entry below `before_id`, newest first; the caller holds its lock."""
+    candidates = []
+    for chunk_no, positions in entry['users'].get(user_email, []):
+        ids = pd.to_numeric(entry['frames'][chunk_no]['id'], errors='coerce').to_numpy()[positions]
+        if before_id is not None:
+            below = ids < before_id
+            positions, ids = positions[below], ids[below]
+        newest = ids.argsort(kind='stable')[::-1][:limit]
+        candidates.extend(zip(ids[newest], [chunk_no] * len(newest), positions[newest]))
+    candidates = sorted(candidates, key=lambda candidate: candidate[0], reverse=True)[:limit]
+    if not candidates:
+        return entry['frames'][0].iloc[0:0]
+    
+    chunk_numbers = sorted({chunk_no for _, chunk_no, _ in candidates})
+    if len(chunk_numbers) == 1:
+        return entry['frames'][chunk_numbers[0]].iloc[[position for _, _, position in candidates]]
+    pieces = [entry['frames'][chunk_no].iloc[[position]] for _, chunk_no, position in candidates]
+    return _concat_chunks(table, pieces)
+
+def _user_rows(table: str, file_path: str, user_email: str) -> pd.DataFrame:
+    """One user's rows of a table file, through the cache."""
+    if _tails_file(table, file_path):
+        return _tail_rows(table, file_path, user_email)
+    df = _read_cached(table, file_path)
+    return df[df[USER_COLUMNS[table]] == user_email] if not df.empty else df
+
+def _read_header(file_path: str) -> List[str]:
+    """Read just the header row of a CSV file."""
+    try:
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), [])
+    except FileNotFoundError:
+        return []
+
+def _sync(f, file_path: str):
+    """Flush and fsync an open file according to FSYNC_POLICY."""
+    f.flush()
+    if FSYNC_POLICY == 'always':
+        os.fsync(f.fileno())
+    elif FSYNC_POLICY == 'interval':
+        now = time.monotonic()
+        if now - _last_fsync.get(file_path, 0.0) >= FSYNC_INTERVAL:
+            os.fsync(f.fileno())
+            _last_fsync[file_path] = now
+
+def _csv_value(value: Any) -> Any:
+    """Convert a value to what pandas would have written for it."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return value
+
+def _append_rows(file_path: str, rows: List[Dict[str, Any]]) -> bool:
+    """Append rows to a CSV file without reading the existing rows.
+    
+    The caller holds the file's lock. Returns False when the rows can't be
+    appended in place (missing file or columns the header doesn't have), so
+    the caller can fall back to a rewrite.
+    """
+    header = _read_header(file_path)
+    if not header or any(key not in header for row in rows for key in row):
+        return False
+    
+    with open(file_path, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f, lineterminator='\n').writerows([_csv_value(row.get(col)) for col in header] for row in rows)
+        _sync(f, file_path)
+    
+    _bump_version(file_path)
+    return True
+
+def _replace_file(table: str, file_path: str, df: pd.DataFrame):
+    """Atomically replace a table file's contents; the caller holds its lock."""
+    if file_path.endswith('.parquet'):
+        parquet_store.write_table(df, file_path, table, STRING_COLUMNS[table])
+    else:
+        file_lock.atomic_write_csv(df, file_path)
+    _bump_version(file_path)
+
+def _rewrite_with_rows(table: str, file_path: str, rows: List[Dict[str, Any]]):
+    """Append rows by rewriting the whole file (handles new columns)."""
+    df = pd.read_csv(file_path) if os.path.exists(file_path) else pd.DataFrame()
+    df = pd.concat([df, pd.DataFrame(rows)], ignore_index=True)
+    _replace_file(table, file_path, df)
+
+def _encode_text_fields(table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of a row with its long text fields compressed (the row itself if it has none)."""
+    fields = TEXT_FIELDS.get(table)
+    if not fields:
+        return row
+    return {**row, **{col: text_codec.encode_text(row[col], kind) for col, kind in fields.items() if col in row}}
+
+def _decode_text_fields(table: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Decompress the compressed text fields of loaded rows."""
+    fields = [col for col in TEXT_FIELDS.get(table, {}) if col in df.columns]
+    if not fields or df.empty:
         return df
-    except (FileNotFoundError, pd.errors.EmptyDataError):
+    return df.assign(**{col: df[col].map(text_codec.decode_text) for col in fields})
+
+def _save_event(table: str, row: Dict[str, Any]):
+    """Give an event row a new id and append it to its table (or queue it in write-behind mode)."""
+    row['id'] = id_allocator.next_id()
+    row = _encode_text_fields(table, row)
+    if WRITE_BEHIND:
+        write_queue.submit(table, row)
+    else:
+        _write_events(table, [row])
+
+def _write_events(table: str, rows: List[Dict[str, Any]]):
+    """Append event rows that already have ids, with one locked append per file."""
+    if STORAGE_BACKEND == 'sqlite':
+        sqlite_store.insert_rows(SQLITE_FILE, table, rows)
+        _record_stats(table, rows)
+        return
+    
+    rows_by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        rows_by_file.setdefault(_table_path(table, row.get(USER_COLUMNS[table])), []).append(row)
+    
+    for file_path, file_rows in rows_by_file.items():
+        with file_lock.locked(file_path):
+            _ensure_file(table, file_path)
+            if not _append_rows(file_path, file_rows):
+                _rewrite_with_rows(table, file_path, file_rows)
+            if table in SEGMENTED_TABLES and os.path.getsize(file_path) >= SEGMENT_BYTES:
+                _seal_segment(table, file_path)
+    _record_stats(table, rows)
+
+# Counter in the user stats table for each table's rows
+STATS_COUNTERS = {
+    'roadmaps': 'roadmaps',
+    'interactions': 'interactions',
+    'chat_history': 'chat_messages',
+    'progress': 'progress_entries',
+}
+
+# Tables whose row timestamps count as user activity
+ACTIVITY_TABLES = ['interactions', 'chat_history', 'progress']
+
+def _time_text(value: Any) -> Optional[str]:
+    """A row time as 'YYYY-MM-DD HH:MM:SS' text, or None when it is missing."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)) or value == '':
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+def _record_stats(table: str, rows: List[Dict[str, Any]], sign: int = 1):
+    """Count rows just written (or, with sign=-1, deleted) in the per-user stats.
+    
+    The rows are already stored, so a failure here only leaves the counters
+    behind until `python -m utils.storage_admin stats-rebuild`.
+    """
+    try:
+        user_stats.record(STATS_FILE, list(_stats_updates(table, rows, sign).values()))
+    
+    except Exception as e:
+        print(f"Error updating user stats: {str(e)}")
+
+def _stats_updates(table: str, rows: List[Dict[str, Any]], sign: int = 1,
+                   updates: Optional[Dict[Any, Dict[str, Any]]] = None) -> Dict[Any, Dict[str, Any]]:
+    """Per-user counter deltas and activity times for rows of a table, added to `updates`."""
+    updates = {} if updates is None else updates
+    for row in rows:
+        email = row.get(USER_COLUMNS[table])
+        update = updates.setdefault(email, {'user_email': email})
+        if table == 'users':
+            update['join_date'] = _time_text(row.get('created_at'))
+            continue
+        
+        counter = STATS_COUNTERS[table]
+        update[counter] = update.get(counter, 0) + sign
+        if table == 'chat_history' and row.get('role') == 'user':
+            update['chat_user_messages'] = update.get('chat_user_messages', 0) + sign
+        
+        timestamp = _time_text(row.get('timestamp'))
+        if sign > 0 and table in ACTIVITY_TABLES and timestamp:
+            update['first_activity'] = min(update.get('first_activity') or timestamp, timestamp)
+            update['last_activity'] = max(update.get('last_activity') or timestamp, timestamp)
+    return updates
+
+def flush_writes(timeout: float = None) -> bool:
+    """Wait for queued write-behind rows to reach storage; False on timeout."""
+    return write_queue.flush(timeout) if WRITE_BEHIND else True
+
+def get_write_queue_stats() -> Dict[str, Any]:
+    """Queue depth and batch counters of the write-behind queue."""
+    return write_queue.get_stats()
+
+def _pending_rows(table: str, user_email: Optional[str] = None) -> pd.DataFrame:
+    """This process's write-behind rows of a table (or one user's) that may not be stored yet.
+    
+    Reads merge them in rather than waiting for the queue to drain; they are
+    newer than every stored row.
+    """
+    rows = write_queue.pending(table) if WRITE_BEHIND else []
+    if user_email is not None:
+        rows = [row for row in rows if row.get(USER_COLUMNS[table]) == user_email]
+    if not rows:
         return pd.DataFrame()
+    return _clean_frame(table, pd.DataFrame(rows))
 
-def save_user(user_data: Dict[str, Any]) -> bool:
-    """Save a new user to CSV file."""
+def _seal_segment(table: str, file_path: str):
+    """Turn a full log file into a sealed segment and start an empty one; the caller holds its lock."""
+    if STORAGE_BACKEND == 'parquet':
+        # Readers de-duplicate by id until the active file is emptied in place
+        segment_path = segment_log.next_segment_path(file_path, '.parquet')
+        _replace_file(table, segment_path, _read_file(table, file_path))
+        _replace_file(table, file_path, pd.DataFrame(columns=_read_header(file_path)))
+    else:
+        segment_log.rotate(file_path)
+        _bump_version(file_path)
+        _ensure_file(table, file_path)
+    if table == 'chat_history':
+        _compact_wakeup.set()
+
+def _load_table(table: str, user_email: Optional[str] = None) -> pd.DataFrame:
+    """Load a whole table, or one user's rows, from the configured backend."""
+    # This process's queued writes come last: they are newer than every stored row
+    pending_df = _pending_rows(table, user_email)
+    
+    # Archived rows go first: they are older than every hot row
+    archive_paths = _archive_paths(table, user_email)
+    hot_frames = []
+    if STORAGE_BACKEND == 'sqlite':
+        hot_df = _fill_strings(sqlite_store.load_rows(SQLITE_FILE, table, user_email), STRING_COLUMNS[table])
+        if not archive_paths and pending_df.empty:
+            return _decode_text_fields(table, hot_df)
+        hot_frames.append(hot_df)
+        paths = archive_paths
+    elif user_email is not None:
+        paths = archive_paths + _log_paths(table, _table_path(table, user_email))
+    else:
+        paths = archive_paths + _table_paths(table)
+    
+    frames = []
+    for path in paths:
+        df = _user_rows(table, path, user_email) if user_email is not None else _read_cached(table, path)
+        if not df.empty:
+            frames.append(df)
+    return _decode_text_fields(table, _combine_frames(table, [df for df in frames + hot_frames + [pending_df] if not df.empty]))
+
+def _combine_frames(table: str, frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate table files into one frame, dropping rows seen twice mid-compaction."""
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0].copy()
+    df = pd.concat(frames, ignore_index=True)
+    if 'id' in df.columns:
+        # Until legacy duplicate ids are renumbered only identical rows are copies
+        df = df.drop_duplicates(subset='id' if _ids_unique() else None, keep='last', ignore_index=True)
+    if STORAGE_BACKEND == 'parquet':
+        # Categoricals with different categories concatenate to object
+        df = parquet_store.compact_dtypes(df, table, STRING_COLUMNS[table])
+    return df
+
+def _fill_strings(df: pd.DataFrame, string_columns: List[str]) -> pd.DataFrame:
+    """Ensure string columns don't have NaN values."""
+    fills = {}
+    for col in string_columns:
+        if col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype) and series.hasnans and '' not in series.cat.categories:
+                series = series.cat.add_categories('')
+            fills[col] = series.fillna('')
+    return df.assign(**fills) if fills else df
+
+def _retention_cutoff() -> Optional[str]:
+    """Timestamp before which chat messages expire, or None without an age limit."""
+    if CHAT_KEEP_DAYS <= 0:
+        return None
+    return (datetime.now() - timedelta(days=CHAT_KEEP_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+
+def _apply_retention(sealed_df: pd.DataFrame, active_df: pd.DataFrame) -> pd.DataFrame:
+    """Rows of a log's sealed segments that are still within each user's retention limits."""
+    user_col = USER_COLUMNS['chat_history']
+    cutoff = _retention_cutoff()
+    if cutoff and 'timestamp' in sealed_df.columns:
+        sealed_df = sealed_df[~(sealed_df['timestamp'].astype(str) < cutoff)]
+    
+    if CHAT_KEEP_MESSAGES > 0 and not sealed_df.empty:
+        # Messages still in the active file are newer and count towards the limit first
+        active_counts = active_df[user_col].value_counts() if user_col in active_df.columns else pd.Series(dtype=int)
+        room = (CHAT_KEEP_MESSAGES - sealed_df[user_col].map(active_counts).fillna(0)).clip(lower=0)
+        newest_first = sealed_df.groupby(user_col, sort=False, dropna=False).cumcount(ascending=False)
+        sealed_df = sealed_df[newest_first < room]
+    return sealed_df
+
+def _forget_file(file_path: str):
+    """Drop a deleted file from the table cache."""
+    with _cache_lock:
+        _table_cache.pop(file_path, None)
+        _tails.pop(file_path, None)
+        _write_versions.pop(file_path, None)
+
+def compact_chat_history() -> Dict[str, int]:
+    """Merge each chat log's sealed segments and apply per-user retention.
+    
+    Returns the number of messages dropped per log, and from the archive.
+    Only sealed segments and archive segments are rewritten, so concurrent
+    chat saves are never blocked.
+    """
+    if STORAGE_BACKEND == 'sqlite':
+        deleted_df = sqlite_store.apply_retention(
+            SQLITE_FILE, 'chat_history', CHAT_KEEP_MESSAGES, _retention_cutoff(), returning=['user_email', 'role']
+        )
+        _record_stats('chat_history', deleted_df.to_dict('records'), sign=-1)
+        dropped = {SQLITE_FILE: len(deleted_df)}
+        dropped[os.path.join(ARCHIVE_DIR, 'chat_history')] = _prune_chat_archive()
+        return dropped
+    
+    dropped = {}
+    for active_path in _active_paths('chat_history'):
+        # One compactor per log at a time, across processes
+        with file_lock.locked(f"{active_path}.compact"):
+            segments = segment_log.segment_paths(active_path)
+            if not segments:
+                continue
+            
+            sealed_df = _combine_frames('chat_history', [
+                df for df in (_read_cached('chat_history', path) for path in segments) if not df.empty
+            ])
+            kept_df = _apply_retention(sealed_df, _read_cached('chat_history', active_path))
+            dropped[active_path] = len(sealed_df) - len(kept_df)
+            if len(segments) == 1 and dropped[active_path] == 0:
+                continue
+            
+            # Write the survivors over the newest segment before deleting the
+            # older ones; readers de-duplicate by id in between
+            if kept_df.empty:
+                stale = segments
+            else:
+                _replace_file('chat_history', segments[-1], kept_df)
+                stale = segments[:-1]
+            for path in stale:
+                os.remove(path)
+                _forget_file(path)
+            
+            deleted_df = sealed_df[~sealed_df['id'].isin(kept_df['id'])] if not kept_df.empty else sealed_df
+            _record_stats('chat_history', deleted_df[['user_email', 'role']].to_dict('records'), sign=-1)
+    dropped[os.path.join(ARCHIVE_DIR, 'chat_history')] = _prune_chat_archive()
+    return dropped
+
+def start_chat_compactor():
+    """Start this process's background chat compaction thread unless it is running."""
+    with _compactor_lock:
+        thread = _compactor['thread']
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(target=_run_compactor, name='chat-compactor', daemon=True)
+        _compactor['thread'] = thread
+        thread.start()
+
+def _run_compactor():
+    """Compact whenever a segment is sealed, and at least every CHAT_COMPACT_INTERVAL seconds."""
+    while True:
+        _compact_wakeup.wait(CHAT_COMPACT_INTERVAL)
+        _compact_wakeup.clear()
+        try:
+            compact_chat_history()
+        except Exception as e:
+            print(f"Error compacting chat history: {str(e)}")
+
+def _month_bounds(month: str) -> Optional[tuple]:
+    """First and one-past-last time of a 'YYYY-MM' archive month, or None for other names."""
     try:
-        users_df = load_users()
+        start = datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        return None
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start.strftime('%Y-%m-%d %H:%M:%S'), end.strftime('%Y-%m-%d %H:%M:%S')
+
+def _archive_paths(table: str, user_email: Optional[str] = None, since: Optional[str] = None,
+                   until: Optional[str] = None) -> List[str]:
+    """Archive segments that can hold a table's rows (or one user's) in [since, until), oldest first."""
+    table_dir = os.path.join(ARCHIVE_DIR, table)
+    if table not in SEGMENTED_TABLES or not os.path.isdir(table_dir):
+        return []
+    
+    # Archived logs are named after the hot log their rows came from
+    log_name = None
+    if user_email is not None and DATA_LAYOUT == 'partitioned' and STORAGE_BACKEND != 'sqlite':
+        log_name = os.path.splitext(os.path.basename(_table_path(table, user_email)))[0]
+    
+    paths = []
+    for month in sorted(os.listdir(table_dir)):
+        bounds = _month_bounds(month)
+        if bounds is None or (since and bounds[1] <= since) or (until and bounds[0] >= until):
+            continue
+        month_dir = os.path.join(table_dir, month)
+        logs = sorted({name.split('.seg-')[0] for name in os.listdir(month_dir) if '.seg-' in name})
+        for log in logs:
+            if log_name is None or log == log_name:
+                paths += segment_log.segment_paths(os.path.join(month_dir, f"{log}.csv"))
+    return paths
+
+def _archive_extension() -> str:
+    """Extension of new archive segments: zstd Parquet for the parquet backend, else gzip CSV."""
+    return '.parquet' if STORAGE_BACKEND == 'parquet' else '.csv.gz'
+
+def _write_archive_segment(table: str, segment_path: str, df: pd.DataFrame):
+    """Write one compressed archive segment, in the format its extension names."""
+    os.makedirs(os.path.dirname(segment_path), exist_ok=True)
+    if segment_path.endswith('.parquet'):
+        parquet_store.write_table(df, segment_path, table, STRING_COLUMNS[table], compression='zstd')
+    else:
+        file_lock.atomic_write_csv(df, segment_path, compression='gzip')
+
+def _write_archive(table: str, log_name: str, df: pd.DataFrame):
+    """Write rows as new compressed archive segments of a log, one per month of their times."""
+    months = df[TIME_COLUMNS[table]].map(_time_text).str[:7]
+    for month, month_df in df.groupby(months, sort=True):
+        segment_path = segment_log.next_segment_path(os.path.join(ARCHIVE_DIR, table, month, f"{log_name}.csv"), _archive_extension())
+        _write_archive_segment(table, segment_path, month_df)
+
+def _hot_chat_counts(users: List[str]) -> Dict[Any, int]:
+    """Number of messages each of some users has outside the archive."""
+    if STORAGE_BACKEND == 'sqlite':
+        return {email: len(sqlite_store.query_rows(SQLITE_FILE, 'chat_history', ['id'], user_email=email)) for email in users}
+    
+    user_col = USER_COLUMNS['chat_history']
+    paths = sorted({path for email in users for path in _log_paths('chat_history', _table_path('chat_history', email))})
+    counts = {email: 0 for email in users}
+    for path in paths:
+        df = _read_cached('chat_history', path)
+        if user_col in df.columns:
+            for email, count in df.loc[df[user_col].isin(users), user_col].value_counts().items():
+                counts[email] += int(count)
+    return counts
+
+def _prune_chat_archive() -> int:
+    """Apply per-user chat retention to archived messages; returns how many were dropped.
+    
+    Archived messages are older than a user's hot ones, so they only keep
+    what the hot messages leave of DATA_CHAT_KEEP_MESSAGES. Only the archives
+    of users whose stats count more messages than that, and months older than
+    DATA_CHAT_KEEP_DAYS, are read.
+    """
+    table = 'chat_history'
+    user_col = USER_COLUMNS[table]
+    cutoff = _retention_cutoff()
+    over = []
+    if CHAT_KEEP_MESSAGES > 0 and os.path.isdir(os.path.join(ARCHIVE_DIR, table)):
+        stats_df = user_stats.load_all(STATS_FILE)
+        over = stats_df.loc[stats_df['chat_messages'] > CHAT_KEEP_MESSAGES, 'user_email'].tolist()
+    
+    # The archiver moves hot rows under this lock, so hot and archived counts agree
+    with file_lock.locked(os.path.join(ARCHIVE_DIR, table)):
+        paths = _archive_paths(table, until=cutoff) if cutoff else []
+        for email in over:
+            paths += _archive_paths(table, email)
+        paths = list(dict.fromkeys(paths))
+        if not paths:
+            return 0
+        
+        frames = {path: df for path, df in ((path, _read_file(table, path)) for path in paths) if not df.empty}
+        if not frames:
+            return 0
+        archived_df = pd.concat([df.assign(_path=path) for path, df in frames.items()], ignore_index=True)
+        keep = pd.Series(True, index=archived_df.index)
+        if cutoff:
+            keep &= ~_time_mask(archived_df[TIME_COLUMNS[table]], None, cutoff)
+        if over:
+            room = pd.Series(_hot_chat_counts(over)).rsub(CHAT_KEEP_MESSAGES).clip(lower=0)
+            users = archived_df[user_col].astype(object)
+            ranked = archived_df[keep & users.isin(room.index)].sort_values('id')
+            newest_first = ranked.groupby(users[ranked.index], sort=False).cumcount(ascending=False)
+            keep &= ~archived_df.index.isin(ranked.index[newest_first >= users[ranked.index].map(room)])
+        
+        for path, df in frames.items():
+            path_keep = keep[archived_df['_path'] == path].to_numpy()
+            if path_keep.all():
+                continue
+            if path_keep.any():
+                _write_archive_segment(table, path, df[path_keep])
+            else:
+                os.remove(path)
+            _forget_file(path)
+        deleted_df = archived_df[~keep]
+        _record_stats(table, deleted_df[['user_email', 'role']].to_dict('records'), sign=-1)
+    return len(deleted_df)
+
+def _archive_file(table: str, file_path: str, active_path: str, cutoff: str) -> int:
+    """Move one hot file's rows older than `cutoff` to the archive; the caller holds its locks."""
+    df = _read_file(table, file_path)
+    if df.empty or TIME_COLUMNS[table] not in df.columns:
+        return 0
+    old = _time_mask(df[TIME_COLUMNS[table]], None, cutoff)
+    if not old.any():
+        return 0
+    
+    # Archive first: until the hot file is rewritten readers de-duplicate by id
+    _write_archive(table, os.path.splitext(os.path.basename(active_path))[0], df[old])
+    if file_path != active_path and old.all():
+        os.remove(file_path)
+        _forget_file(file_path)
+    else:
+        _replace_file(table, file_path, df[~old])
+    return int(old.sum())
+
+def archive_cold_rows(before: Any = None) -> Dict[str, int]:
+    """Move chat, interaction and progress rows older than `before` into the archive.
+    
+    `before` defaults to DATA_ARCHIVE_DAYS ago. Returns the rows archived per
+    table. Each run adds new segments to the archive months it touches;
+    archived rows keep their ids and are still returned by every load.
+    """
+    flush_writes()
+    cutoff = _time_text(before) or (datetime.now() - timedelta(days=ARCHIVE_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    # Messages chat retention would drop are dropped rather than archived
+    compact_chat_history()
+    
+    archived = {}
+    for table in SEGMENTED_TABLES:
+        archived[table] = 0
+        # One archiver per table at a time, across processes
+        with file_lock.locked(os.path.join(ARCHIVE_DIR, table)):
+            if STORAGE_BACKEND == 'sqlite':
+                while True:
+                    batch_df = sqlite_store.query_rows(SQLITE_FILE, table, until=cutoff, order_by='id', limit=ARCHIVE_BATCH_ROWS)
+                    if batch_df.empty:
+                        break
+                    _write_archive(table, table, batch_df)
+                    archived[table] += sqlite_store.delete_older(SQLITE_FILE, table, cutoff, batch_df['id'].max())
+                continue
+            
+            for active_path in _active_paths(table):
+                # Sealed segments are shared with the chat compactor; the active file with writers
+                with file_lock.locked(f"{active_path}.compact"):
+                    for path in segment_log.segment_paths(active_path):
+                        archived[table] += _archive_file(table, path, active_path, cutoff)
+                    with file_lock.locked(active_path):
+                        archived[table] += _archive_file(table, active_path, active_path, cutoff)
+    return archived
+
+def _time_mask(times: pd.Series, since: Optional[str], until: Optional[str]) -> pd.Series:
+    """Rows whose time is within [since, until); rows without a time never match."""
+    mask = times.notna()
+    if pd.api.types.is_datetime64_any_dtype(times):
+        since, until = (pd.Timestamp(bound) if bound else None for bound in (since, until))
+    else:
+        # 'YYYY-MM-DD HH:MM:SS' text sorts chronologically
+        times = times.astype(str)
+    if since:
+        mask &= times >= since
+    if until:
+        mask &= times < until
+    return mask
+
+def _filter_rows(table: str, df: pd.DataFrame, user_email: Optional[str], since: Optional[str],
+                 until: Optional[str], before_id: Optional[int] = None) -> pd.DataFrame:
+    """Rows of a frame belonging to a user, inside a time range and below an id."""
+    if df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    if user_email is not None:
+        mask &= df[USER_COLUMNS[table]] == user_email
+    if since or until:
+        mask &= _time_mask(df[TIME_COLUMNS[table]], since, until)
+    if before_id is not None:
+        mask &= pd.to_numeric(df['id'], errors='coerce') < before_id
+    return df[mask]
+
+def _scan_file(table: str, file_path: str, needed: Optional[List[str]], user_email: Optional[str],
+               since: Optional[str], until: Optional[str], before_id: Optional[int] = None):
+    """Yield the matching rows of one table file, projected to `needed`, in chunks."""
+    if file_path.endswith('.parquet'):
+        filters = []
+        if user_email is not None:
+            filters.append((USER_COLUMNS[table], '==', user_email))
+        if since:
+            filters.append((TIME_COLUMNS[table], '>=', pd.Timestamp(since)))
+        if until:
+            filters.append((TIME_COLUMNS[table], '<', pd.Timestamp(until)))
+        if before_id is not None:
+            filters.append(('id', '<', before_id))
+        try:
+            yield parquet_store.read_table(file_path, table, STRING_COLUMNS[table], needed, filters or None)
+        except FileNotFoundError:
+            pass
+        return
+    
+    # Event log CSVs are served from the cache, parsing only rows appended since the last read
+    cached = _tail_rows(table, file_path, user_email) if _tails_file(table, file_path) else _cached_frame(file_path)
+    if cached is not None:
+        df = _filter_rows(table, cached, user_email, since, until, before_id)
+        yield df[[col for col in needed if col in df.columns]] if needed is not None else df
+        return
+    
+    usecols = (lambda col: col in needed) if needed is not None else None
+    try:
+        for chunk in pd.read_csv(file_path, usecols=usecols, chunksize=QUERY_CHUNK_ROWS):
+            yield _filter_rows(table, chunk, user_email, since, until, before_id)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return
+
+def query(table: str, columns: Optional[List[str]] = None, user_email: Optional[str] = None,
+          since: Any = None, until: Any = None, order_by: Optional[str] = None,
+          descending: bool = False, limit: Optional[int] = None, before_id: Optional[int] = None) -> pd.DataFrame:
+    """Load only the requested columns and rows of a table.
+    
+    Rows can be restricted to one user, to times in [since, until) on the
+    table's time column and to ids below `before_id`, sorted by `order_by`
+    (storage order otherwise) and cut to the first `limit`. CSV files are
+    scanned in chunks reading only the needed columns, Parquet files push the
+    filters down and SQLite runs the equivalent SELECT.
+    
+    A newest-first page of one user's log (order_by='id', descending, with a
+    limit) reads the log's newest files first and stops once it has enough
+    rows, so its cost depends on the page size rather than the history.
+    
+    Archived event rows are read too, but only from the archive months that
+    overlap [since, until).
+    """
+    try:
+        since, until = _time_text(since), _time_text(until)
+        if before_id is not None:
+            before_id = int(before_id)
         
-        # Create new user record
-        new_user = pd.DataFrame([user_data])
+        # Columns needed to filter, de-duplicate and sort on top of those asked for
+        needed = None
+        if columns is not None:
+            extra = [
+                USER_COLUMNS[table] if user_email is not None else None,
+                TIME_COLUMNS[table] if since or until else None,
+                'id' if table in SEGMENTED_TABLES or before_id is not None else None,
+                order_by
+            ]
+            needed = list(dict.fromkeys(columns + [col for col in extra if col]))
         
-        # Append to existing users
-        users_df = pd.concat([users_df, new_user], ignore_index=True)
+        # This process's queued writes, newer than every stored row
+        pending_df = _filter_rows(table, _pending_rows(table, user_email), None, since, until, before_id)
+        if needed is not None and not pending_df.empty:
+            pending_df = pending_df[[col for col in needed if col in pending_df.columns]]
         
-        # Save to CSV
-        users_df.to_csv(USERS_FILE, index=False)
-        return True
+        # Archived rows are older than every hot row, so their files go first
+        archive_paths = _archive_paths(table, user_email, since, until)
+        frames, rows = [], 0
+        if STORAGE_BACKEND == 'sqlite':
+            df = sqlite_store.query_rows(
+                SQLITE_FILE, table, needed if archive_paths or not pending_df.empty else columns, user_email,
+                since, until, order_by, descending, limit, before_id
+            )
+            # A newest-first page filled from the database needs no archived rows
+            if order_by == 'id' and descending and limit is not None and len(df) >= limit:
+                archive_paths = []
+            if not archive_paths and pending_df.empty:
+                if columns is not None:
+                    df = df[[col for col in columns if col in df.columns]]
+                return _fill_strings(_decode_text_fields(table, df), STRING_COLUMNS[table])
+            frames, rows = [frame for frame in (df, pending_df) if not frame.empty], len(df) + len(pending_df)
+            paths = archive_paths
+        elif user_email is not None:
+            paths = archive_paths + _log_paths(table, _table_path(table, user_email))
+        else:
+            paths = archive_paths + _table_paths(table)
+        
+        # A single log holds ids in file order, so its newest rows are in its last files
+        newest_first = (
+            order_by == 'id' and descending and limit is not None and table in SEGMENTED_TABLES
+            and (user_email is not None or DATA_LAYOUT != 'partitioned')
+        )
+        if newest_first:
+            paths = paths[::-1]
+        if newest_first and STORAGE_BACKEND != 'sqlite' and not pending_df.empty:
+            frames, rows = [pending_df], len(pending_df)
+        files_past_limit = 0
+        
+        for path in paths:
+            if newest_first and rows >= limit:
+                # Ids from concurrent writers can straddle a seal, so read one more file
+                files_past_limit += 1
+                if files_past_limit > 1:
+                    break
+            for chunk in _scan_file(table, path, needed, user_email, since, until, before_id):
+                if chunk.empty:
+                    continue
+                frames.append(chunk)
+                rows += len(chunk)
+                
+                # Stop early, or keep at most 2 * limit rows in memory while scanning
+                if limit is not None and rows >= limit:
+                    if order_by is None:
+                        break
+                    if rows >= 2 * limit:
+                        top = _combine_frames(table, frames).sort_values(order_by, ascending=not descending, kind='stable')
+                        frames = [top.head(limit)]
+                        rows = len(frames[0])
+            if limit is not None and order_by is None and rows >= limit:
+                break
+        if not newest_first and STORAGE_BACKEND != 'sqlite' and not pending_df.empty:
+            # Queued rows come after the stored ones
+            frames.append(pending_df)
+        
+        result = _combine_frames(table, frames)
+        if result.empty:
+            return pd.DataFrame(columns=columns) if columns is not None else result
+        if order_by is not None:
+            result = result.sort_values(order_by, ascending=not descending, kind='stable')
+        if limit is not None:
+            result = result.head(limit)
+        if columns is not None:
+            result = result[[col for col in columns if col in result.columns]]
+        return _clean_frame(table, _decode_text_fields(table, result.reset_index(drop=True)))
     
     except Exception as e:
-        print(f"Error saving user: {str(e)}")
-        return False
+        print(f"Error querying {table}: {str(e)}")
+        return pd.DataFrame()
 
-def save_user_profile(user_data: Dict[str, Any]) -> bool:
-    """Update user profile in CSV file."""
+def bulk_insert(table: str, rows: List[Dict[str, Any]]) -> int:
+    """Store many new rows of a table at once and return how many were stored.
+    
+    Rows keep the times they carry, and get ids like the save_* functions
+    would give them. Event rows are appended BULK_BATCH_ROWS at a time so
+    log segments are still sealed at about SEGMENT_BYTES; users and roadmaps
+    are written with one rewrite per file. Used by the synthetic data
+    generator and maintenance tools rather than the pages.
+    """
+    if not rows:
+        return 0
+    if 'id' in TABLE_COLUMNS[table]:
+        for row in rows:
+            row['id'] = id_allocator.next_id()
+    if table == 'roadmaps':
+        for row in rows:
+            _store_roadmap_content(row)
+    
+    if table in SEGMENTED_TABLES:
+        rows = [_encode_text_fields(table, row) for row in rows]
+        for start in range(0, len(rows), BULK_BATCH_ROWS):
+            _write_events(table, rows[start:start + BULK_BATCH_ROWS])
+        return len(rows)
+    
+    if table == 'users':
+        user_index.add_all(USER_INDEX_FILE, rows)
+    if STORAGE_BACKEND == 'sqlite':
+        sqlite_store.insert_rows(SQLITE_FILE, table, rows)
+    else:
+        rows_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            rows_by_file.setdefault(_table_path(table, row.get(USER_COLUMNS[table])), []).append(row)
+        for file_path, file_rows in rows_by_file.items():
+            with file_lock.locked(file_path):
+                _ensure_file(table, file_path)
+                df = pd.concat([_read_cached(table, file_path), pd.DataFrame(file_rows)], ignore_index=True)
+                _replace_file(table, file_path, df)
+    _record_stats(table, rows)
+    return len(rows)
+
+def load_users() -> pd.DataFrame:
+    """Load all users."""
     try:
+        return _load_table('users')
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return pd.DataFrame()
+
+def find_user(email: str) -> Optional[Dict[str, Any]]:
+    """Look up a user's record by email, ignoring letter case; None if not registered."""
+    try:
+        return user_index.get(USER_INDEX_FILE, email)
+    except Exception as e:
+        print(f"Error reading user index, scanning users: {str(e)}")
         users_df = load_users()
-        
         if users_df.empty:
+            return None
+        matches = users_df[users_df['email'].astype(str).str.strip().str.lower() == user_index.email_key(email)]
+        return matches.iloc[0].to_dict() if not matches.empty else None
+
+def user_exists(email: str) -> bool:
+    """Whether an account with this email (in any letter case) exists."""
+    return find_user(email) is not None
+
+def rebuild_user_index() -> int:
+    """Rebuild the email index from the users table; returns the number of users indexed."""
+    users_df = load_users()
+    return user_index.replace_all(USER_INDEX_FILE, users_df.to_dict('records'))
+
+def save_user(user_data: Dict[str, Any]) -> bool:
+    """Save a new user; False if the email is already registered."""
+    try:
+        # Claiming the email first keeps two signups for it from both succeeding
+        if not user_index.claim(USER_INDEX_FILE, user_data):
+            print(f"Error saving user: {user_data.get('email')} is already registered")
             return False
+    except Exception as e:
+        print(f"Error saving user: {str(e)}")
+        return False
+    
+    try:
+        if STORAGE_BACKEND == 'sqlite':
+            sqlite_store.insert_row(SQLITE_FILE, 'users', user_data)
+            _record_stats('users', [user_data])
+            return True
         
-        # Find user by email
-        user_index = users_df[users_df['email'] == user_data['email']].index
-        
-        if len(user_index) == 0:
-            return False
-        
-        # Update user data
-        for key, value in user_data.items():
-            if key in users_df.columns:
-                users_df.loc[user_index[0], key] = value
+        users_file = _table_path('users', user_data.get('email'))
+        with file_lock.locked(users_file):
+            _ensure_file('users', users_file)
+            users_df = _read_cached('users', users_file)
+            
+            # Create new user record
+            new_user = pd.DataFrame([user_data])
+            
+            # Append to existing users
+            users_df = pd.concat([users_df, new_user], ignore_index=True)
+            
+            # Save to CSV
+            _replace_file('users', users_file, users_df)
+        _record_stats('users', [user_data])
+        return True
+    
+    except Exception as e:
+        print(f"Error saving user: {str(e)}")
+        try:
+            user_index.release(USER_INDEX_FILE, user_data.get('email'))
+        except Exception:
+            pass
+        return False
+
+def _index_profile(user_data: Dict[str, Any], columns: List[str]):
+    """Copy the saved profile fields into the user's email index record."""
+    fields = {key: value for key, value in user_data.items() if key in columns and key != 'email'}
+    try:
+        user_index.update(USER_INDEX_FILE, user_data['email'], fields)
+    except Exception as e:
+        # The table is already saved; `storage_admin user-index-rebuild` catches the index up
+        print(f"Error updating user index: {str(e)}")
+
+def save_user_profile(user_data: Dict[str, Any]) -> bool:
+    """Update an existing user's profile."""
+    try:
+        if STORAGE_BACKEND == 'sqlite':
+            if not sqlite_store.update_user(SQLITE_FILE, user_data):
+                return False
+            _index_profile(user_data, TABLE_COLUMNS['users'])
+            return True
         
-        # Save updated data
-        users_df.to_csv(USERS_FILE, index=False)
+        users_file = _table_path('users', user_data['email'])
+        with file_lock.locked(users_file):
+            users_df = _read_cached('users', users_file).copy()
+            
+            if users_df.empty:
+                return False
+            
+            # Find user by email
+            user_rows = users_df[users_df['email'] == user_data['email']].index
+            
+            if len(user_rows) == 0:
+                return False
+            
+            # Update user data
+            for key, value in user_data.items():
+                if key in users_df.columns:
+                    users_df.loc[user_rows[0], key] = value
+            
+            # Save updated data
+            _replace_file('users', users_file, users_df)
+        _index_profile(user_data, list(users_df.columns))
         return True
     
     except Exception as e:
         print(f"Error updating user profile: {str(e)}")
         return False
 
+def _store_roadmap_content(roadmap_data: Dict[str, Any]):
+    """Move a roadmap row's body into the blob store, keeping only its hash in the row."""
+    content = roadmap_data.get('content')
+    if isinstance(content, str):
+        content = _parse_roadmap_content(content) or content
+    if content is not None and content != '':
+        roadmap_data['content_hash'] = blob_store.put(ROADMAP_BLOB_DIR, content, kind='roadmap')
+    roadmap_data['content'] = ''
+    
+    # Ensure all string fields are properly set
+    for key in ['title', 'goal', 'content_hash']:
+        if key not in roadmap_data or pd.isna(roadmap_data[key]):
+            roadmap_data[key] = ''
+
 def save_roadmap(roadmap_data: Dict[str, Any]) -> int:
-    """Save a learning roadmap to CSV file."""
+    """Save a learning roadmap and return its id."""
     try:
-        roadmaps_df = pd.read_csv(ROADMAPS_FILE) if os.path.exists(ROADMAPS_FILE) else pd.DataFrame()
-        
-        # Generate ID
-        roadmap_id = len(roadmaps_df) + 1
-        roadmap_data['id'] = roadmap_id
         roadmap_data['created_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         roadmap_data['updated_at'] = roadmap_data['created_at']
         
-        # Ensure all string fields are properly set
-        for key in ['title', 'content', 'goal']:
-            if key not in roadmap_data or pd.isna(roadmap_data[key]):
-                roadmap_data[key] = ''
+        _store_roadmap_content(roadmap_data)
         
-        # Create new roadmap record
-        new_roadmap = pd.DataFrame([roadmap_data])
+        # Generate ID
+        roadmap_id = id_allocator.next_id()
+        roadmap_data['id'] = roadmap_id
         
-        # Append to existing roadmaps
-        roadmaps_df = pd.concat([roadmaps_df, new_roadmap], ignore_index=True)
+        if STORAGE_BACKEND == 'sqlite':
+            sqlite_store.insert_row(SQLITE_FILE, 'roadmaps', roadmap_data)
+            _record_stats('roadmaps', [roadmap_data])
+            return roadmap_id
         
-        # Save to CSV
-        roadmaps_df.to_csv(ROADMAPS_FILE, index=False)
+        roadmaps_file = _table_path('roadmaps', roadmap_data.get('user_email'))
+        with file_lock.locked(roadmaps_file):
+            _ensure_file('roadmaps', roadmaps_file)
+            roadmaps_df = _read_cached('roadmaps', roadmaps_file)
+            
+            # Create new roadmap record
+            new_roadmap = pd.DataFrame([roadmap_data])
+            
+            # Append to existing roadmaps
+            roadmaps_df = pd.concat([roadmaps_df, new_roadmap], ignore_index=True)
+            
+            # Save to CSV
+            _replace_file('roadmaps', roadmaps_file, roadmaps_df)
+        _record_stats('roadmaps', [roadmap_data])
         return roadmap_id
     
     except Exception as e:
         print(f"Error saving roadmap: {str(e)}")
         return 0
 
+def train_text_dictionaries(samples: int = 2000) -> Dict[str, int]:
+    """Train zstd dictionaries for chat messages and roadmap bodies from the newest stored ones.
+    
+    Returns the new dictionary's id per kind. Values saved from now on are
+    compressed with them; values saved before keep the dictionary (or none)
+    they were written with.
+    """
+    flush_writes()
+    chat_df = query('chat_history', columns=['content'], order_by='id', descending=True, limit=samples)
+    hashes_df = query('roadmaps', columns=['content_hash'], order_by='id', descending=True, limit=samples)
+    sample_sets = {'chat': [], 'roadmap': []}
+    if 'content' in chat_df.columns:
+        sample_sets['chat'] = [text.encode('utf-8') for text in chat_df['content'] if isinstance(text, str) and text]
+    if 'content_hash' in hashes_df.columns:
+        for content_hash in hashes_df['content_hash']:
+            try:
+                sample_sets['roadmap'].append(blob_store.get_bytes(ROADMAP_BLOB_DIR, content_hash))
+            except (FileNotFoundError, TypeError):
+                continue
+    
+    trained = {}
+    for kind, kind_samples in sample_sets.items():
+        if len(kind_samples) < 100:
+            print(f"Not enough {kind} samples to train a dictionary ({len(kind_samples)})")
+            continue
+        trained[kind] = text_codec.train_dictionary(kind, kind_samples)
+    return trained
+
 def load_user_roadmaps(user_email: str) -> pd.DataFrame:
-    """Load roadmaps for a specific user."""
+    """Load a user's roadmap listing (ROADMAP_INDEX_COLUMNS, without bodies)."""
     try:
-        roadmaps_df = pd.read_csv(ROADMAPS_FILE) if os.path.exists(ROADMAPS_FILE) else pd.DataFrame()
+        roadmaps_df = query('roadmaps', columns=ROADMAP_INDEX_COLUMNS, user_email=user_email)
         
         if roadmaps_df.empty:
             return pd.DataFrame()
         
-        # Ensure string columns don't have NaN values
-        string_columns = ['title', 'content', 'goal']
-        for col in string_columns:
-            if col in roadmaps_df.columns:
-                roadmaps_df[col] = roadmaps_df[col].fillna('')
-        
-        return roadmaps_df[roadmaps_df['user_email'] == user_email]
+        return roadmaps_df
     
     except Exception as e:
         print(f"Error loading user roadmaps: {str(e)}")
         return pd.DataFrame()
 
-def save_user_interaction(interaction_data: Dict[str, Any]) -> bool:
-    """Save user interaction to CSV file."""
+def _parse_roadmap_content(text: Any) -> Optional[Any]:
+    """Parse a body stored in the content column: JSON, or the repr older rows hold."""
+    if not isinstance(text, str) or not text.strip():
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        # literal_eval only builds literals, so stored text can't run code
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+def load_roadmap_content(user_email: str, roadmap_id: Any) -> Optional[Dict[str, Any]]:
+    """Load and parse one roadmap's body, or None if it can't be found or parsed."""
     try:
-        interactions_df = pd.read_csv(INTERACTIONS_FILE) if os.path.exists(INTERACTIONS_FILE) else pd.DataFrame()
+        rows = query('roadmaps', columns=['id', 'content_hash', 'content'], user_email=user_email)
+        if rows.empty:
+            return None
+        rows = rows[pd.to_numeric(rows['id'], errors='coerce') == int(roadmap_id)]
+        if rows.empty:
+            return None
         
-        # Generate ID
-        interaction_data['id'] = len(interactions_df) + 1
+        row = rows.iloc[-1]
+        content_hash = row.get('content_hash')
+        if isinstance(content_hash, str) and content_hash:
+            content = blob_store.get(ROADMAP_BLOB_DIR, content_hash)
+        else:
+            content = _parse_roadmap_content(row.get('content'))
+        return content if isinstance(content, dict) else None
+    
+    except Exception as e:
+        print(f"Error loading roadmap content: {str(e)}")
+        return None
+
+def migrate_roadmap_content() -> Dict[str, int]:
+    """Move bodies still stored in the content column into the blob store.
+    
+    Returns how many rows were moved and how many had a body that couldn't
+    be parsed (those are left as they are).
+    """
+    counts = {'moved': 0, 'unparsed': 0}
+    
+    def move(content: Any) -> Optional[str]:
+        parsed = _parse_roadmap_content(content)
+        if parsed is None:
+            if isinstance(content, str) and content.strip():
+                counts['unparsed'] += 1
+            return None
+        counts['moved'] += 1
+        return blob_store.put(ROADMAP_BLOB_DIR, parsed, kind='roadmap')
+    
+    if STORAGE_BACKEND == 'sqlite':
+        conn = sqlite_store.connect(SQLITE_FILE)
+        with conn:
+            sqlite_store._ensure_columns(conn, 'roadmaps', ['content_hash'])
+            rows = conn.execute(
+                "SELECT id, content FROM roadmaps WHERE COALESCE(content_hash, '') = '' AND COALESCE(content, '') != ''"
+            ).fetchall()
+            for roadmap_id, content in rows:
+                content_hash = move(content)
+                if content_hash:
+                    conn.execute("UPDATE roadmaps SET content_hash = ?, content = '' WHERE id = ?", (content_hash, roadmap_id))
+        return counts
+    
+    for file_path in _table_paths('roadmaps'):
+        with file_lock.locked(file_path):
+            roadmaps_df = _read_file('roadmaps', file_path)
+            if roadmaps_df.empty:
+                continue
+            if 'content_hash' not in roadmaps_df.columns:
+                roadmaps_df['content_hash'] = ''
+            roadmaps_df = roadmaps_df.astype({'content': object, 'content_hash': object})
+            
+            changed = False
+            for index, row in roadmaps_df.iterrows():
+                if isinstance(row['content_hash'], str) and row['content_hash']:
+                    continue
+                content_hash = move(row['content'])
+                if content_hash:
+                    roadmaps_df.at[index, 'content_hash'] = content_hash
+                    roadmaps_df.at[index, 'content'] = ''
+                    changed = True
+            if changed:
+                _replace_file('roadmaps', file_path, roadmaps_df)
+    return counts
+
+def _ids_unique() -> bool:
+    """Whether every row id is unique (SQLite's are; files once renumber_legacy_ids() has run)."""
+    if STORAGE_BACKEND == 'sqlite' or DATA_DIR in _ids_unique_dirs:
+        return True
+    if os.path.exists(os.path.join(DATA_DIR, IDS_UNIQUE_MARKER)):
+        _ids_unique_dirs.add(DATA_DIR)
+        return True
+    return False
+
+def _renumber_legacy(table: str, frames: List[pd.DataFrame]) -> tuple:
+    """Frames of a table (in storage order) with unique legacy ids, and how many rows got a new id.
+    
+    Legacy ids (below id_allocator.LEGACY_ID_LIMIT) were the row count plus
+    one, so rows saved after the old chat trim share them. If any do, the
+    table's legacy rows are numbered again from 1 in order of time and then
+    storage order; they stay below the allocator's ids, which are all newer.
+    """
+    positions = []
+    for frame_index, df in enumerate(frames):
+        if df.empty or 'id' not in df.columns:
+            continue
+        ids = pd.to_numeric(df['id'], errors='coerce')
+        legacy = ids.notna() & (ids < id_allocator.LEGACY_ID_LIMIT)
+        times = df[TIME_COLUMNS[table]].map(_time_text) if TIME_COLUMNS[table] in df.columns else pd.Series('', index=df.index)
+        for row in legacy.to_numpy().nonzero()[0]:
+            positions.append((times.iat[row] or '', frame_index, row, int(ids.iat[row])))
+    if len({old_id for *_, old_id in positions}) == len(positions):
+        return frames, 0
+    
+    new_frames = list(frames)
+    new_ids = {}
+    renumbered = 0
+    for new_id, (_, frame_index, row, old_id) in enumerate(sorted(positions, key=lambda position: position[:3]), start=1):
+        new_ids.setdefault(frame_index, {})[row] = new_id
+        renumbered += new_id != old_id
+    for frame_index, rows in new_ids.items():
+        ids = pd.to_numeric(frames[frame_index]['id'], errors='coerce')
+        ids.iloc[list(rows)] = list(rows.values())
+        new_frames[frame_index] = frames[frame_index].assign(id=ids.astype('int64') if ids.notna().all() else ids.astype('Int64'))
+    return new_frames, renumbered
+
+def renumber_legacy_ids() -> Dict[str, int]:
+    """Give rows saved before the id allocator unique ids, once per data directory.
+    
+    Returns the rows renumbered per table (see _renumber_legacy). Every file
+    of a table, archive segments included, is rewritten under the locks the
+    writers, compactor and archiver take, and a marker records that ids can
+    now be de-duplicated on.
+    """
+    flush_writes()
+    renumbered = {}
+    if STORAGE_BACKEND != 'sqlite':
+        for table, columns in TABLE_COLUMNS.items():
+            if 'id' not in columns:
+                continue
+            with contextlib.ExitStack() as locks:
+                locks.enter_context(file_lock.locked(os.path.join(ARCHIVE_DIR, table)))
+                for active_path in _active_paths(table):
+                    if table in SEGMENTED_TABLES:
+                        locks.enter_context(file_lock.locked(f"{active_path}.compact"))
+                    locks.enter_context(file_lock.locked(active_path))
+                
+                archive_paths = _archive_paths(table)
+                paths = archive_paths + [path for path in _table_paths(table) if os.path.exists(path)]
+                frames = [_read_file(table, path) for path in paths]
+                new_frames, renumbered[table] = _renumber_legacy(table, frames)
+                for path, df, new_df in zip(paths, frames, new_frames):
+                    if new_df is df:
+                        continue
+                    if path in archive_paths:
+                        _write_archive_segment(table, path, new_df)
+                    else:
+                        _replace_file(table, path, new_df)
+            clear_table_cache()
+    
+    marker_path = os.path.join(DATA_DIR, IDS_UNIQUE_MARKER)
+    with open(marker_path, 'w') as f:
+        f.write(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    _ids_unique_dirs.add(DATA_DIR)
+    return renumbered
+
+def save_user_interaction(interaction_data: Dict[str, Any]) -> bool:
+    """Append a user interaction to the interactions log."""
+    try:
         interaction_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Create new interaction record
-        new_interaction = pd.DataFrame([interaction_data])
-        
-        # Append to existing interactions
-        interactions_df = pd.concat([interactions_df, new_interaction], ignore_index=True)
-        
-        # Save to CSV
-        interactions_df.to_csv(INTERACTIONS_FILE, index=False)
+        _save_event('interactions', interaction_data)
         return True
     
     except Exception as e:
         print(f"Error saving interaction: {str(e)}")
         return False
 
-def load_user_interactions(user_email: str) -> pd.DataFrame:
-    """Load interactions for a specific user."""
+def _load_page(table: str, user_email: str, before_id: Optional[int], limit: Optional[int],
+               since: Any = None, until: Any = None) -> pd.DataFrame:
+    """A user's newest `limit` rows with ids below `before_id` and times in [since, until), newest first."""
+    return query(table, user_email=user_email, since=since, until=until, order_by='id', descending=True,
+                 limit=limit, before_id=before_id)
+
+def load_user_interactions(user_email: str, before_id: Optional[int] = None, limit: Optional[int] = None,
+                           since: Any = None, until: Any = None) -> pd.DataFrame:
+    """Load interactions for a specific user, oldest first.
+    
+    With `before_id` and/or `limit`, only the newest `limit` interactions
+    with a smaller id are loaded; the smallest id of a page is the
+    `before_id` of the page before it. `since`/`until` keep only interactions
+    in that time range; archived interactions are read only if it needs them.
+    """
     try:
-        interactions_df = pd.read_csv(INTERACTIONS_FILE) if os.path.exists(INTERACTIONS_FILE) else pd.DataFrame()
+        if before_id is None and limit is None and since is None and until is None:
+            interactions_df = _load_table('interactions', user_email)
+        else:
+            interactions_df = _load_page('interactions', user_email, before_id, limit, since, until).iloc[::-1].reset_index(drop=True)
         
         if interactions_df.empty:
             return pd.DataFrame()
         
-        # Ensure string columns don't have NaN values
-        string_columns = ['interaction_type', 'details']
-        for col in string_columns:
-            if col in interactions_df.columns:
-                interactions_df[col] = interactions_df[col].fillna('')
-        
-        return interactions_df[interactions_df['user_email'] == user_email]
+        return interactions_df
     
     except Exception as e:
         print(f"Error loading user interactions: {str(e)}")
         return pd.DataFrame()
 
 def save_chat_message(message_data: Dict[str, Any]) -> bool:
-    """Save chat message to CSV file."""
+    """Append a chat message to the chat history log."""
     try:
-        chat_df = pd.read_csv(CHAT_HISTORY_FILE) if os.path.exists(CHAT_HISTORY_FILE) else pd.DataFrame()
-        
-        # Generate ID
-        message_data['id'] = len(chat_df) + 1
         message_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        _save_event('chat_history', message_data)
         
-        # Create new message record
-        new_message = pd.DataFrame([message_data])
-        
-        # Append to existing messages
-        chat_df = pd.concat([chat_df, new_message], ignore_index=True)
-        
-        # Save to CSV (keep only last 1000 messages to prevent file from growing too large)
-        chat_df = chat_df.tail(1000)
-        chat_df.to_csv(CHAT_HISTORY_FILE, index=False)
+        # Retention is applied off the write path by the compaction thread
+        start_chat_compactor()
         return True
     
     except Exception as e:
         print(f"Error saving chat message: {str(e)}")
         return False
 
-def load_chat_history(user_email: str) -> pd.DataFrame:
-    """Load chat history for a specific user."""
+def load_chat_history(user_email: str, before_id: Optional[int] = None, limit: Optional[int] = None,
+                      since: Any = None, until: Any = None) -> pd.DataFrame:
+    """Load chat history for a specific user, oldest first.
+    
+    With `before_id` and/or `limit`, only the newest `limit` messages with a
+    smaller id are loaded; the smallest id of a page is the `before_id` of
+    the page before it. `since`/`until` keep only messages in that time range;
+    archived messages are read only if it needs them.
+    """
     try:
-        chat_df = pd.read_csv(CHAT_HISTORY_FILE) if os.path.exists(CHAT_HISTORY_FILE) else pd.DataFrame()
+        if before_id is None and limit is None and since is None and until is None:
+            chat_df = _load_table('chat_history', user_email)
+        else:
+            chat_df = _load_page('chat_history', user_email, before_id, limit, since, until).iloc[::-1].reset_index(drop=True)
         
         if chat_df.empty:
             return pd.DataFrame()
         
-        # Ensure string columns don't have NaN values
-        string_columns = ['role', 'content']
-        for col in string_columns:
-            if col in chat_df.columns:
-                chat_df[col] = chat_df[col].fillna('')
-        
-        return chat_df[chat_df['user_email'] == user_email]
+        return chat_df
     
     except Exception as e:
         print(f"Error loading chat history: {str(e)}")
         return pd.DataFrame()
 
 def save_progress_entry(progress_data: Dict[str, Any]) -> bool:
-    """Save progress entry to CSV file."""
+    """Append a progress entry to the progress log."""
     try:
-        progress_df = pd.read_csv(PROGRESS_FILE) if os.path.exists(PROGRESS_FILE) else pd.DataFrame()
-        
-        # Generate ID
-        progress_data['id'] = len(progress_df) + 1
         if 'timestamp' not in progress_data:
             progress_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Create new progress record
-        new_progress = pd.DataFrame([progress_data])
-        
-        # Append to existing progress
-        progress_df = pd.concat([progress_df, new_progress], ignore_index=True)
-        
-        # Save to CSV
-        progress_df.to_csv(PROGRESS_FILE, index=False)
+        _save_event('progress', progress_data)
         return True
     
     except Exception as e:
         print(f"Error saving progress entry: {str(e)}")
         return False
 
-def load_progress_entries(user_email: str) -> pd.DataFrame:
-    """Load progress entries for a specific user."""
+def load_progress_entries(user_email: str, before_id: Optional[int] = None, limit: Optional[int] = None,
+                          since: Any = None, until: Any = None) -> pd.DataFrame:
+    """Load progress entries for a specific user, newest first.
+    
+    With `before_id` and/or `limit`, only the newest `limit` entries with a
+    smaller id are loaded; the smallest id of a page is the `before_id` of
+    the next (older) page. `since`/`until` keep only entries in that time
+    range; archived entries are read only if it needs them.
+    """
     try:
-        progress_df = pd.read_csv(PROGRESS_FILE) if os.path.exists(PROGRESS_FILE) else pd.DataFrame()
+        if before_id is not None or limit is not None or since is not None or until is not None:
+            progress_df = _load_page('progress', user_email, before_id, limit, since, until)
+            return progress_df if not progress_df.empty else pd.DataFrame()
+        
+        progress_df = _load_table('progress', user_email)
         
         if progress_df.empty:
             return pd.DataFrame()
         
-        # Ensure string columns don't have NaN values
-        string_columns = ['progress_type', 'details', 'time_spent']
-        for col in string_columns:
-            if col in progress_df.columns:
-                progress_df[col] = progress_df[col].fillna('')
-        
-        user_progress = progress_df[progress_df['user_email'] == user_email]
-        if not user_progress.empty and len(user_progress) > 0:
-            try:
-                return user_progress.sort_values('timestamp', ascending=False)
-            except:
-                return user_progress
-        return pd.DataFrame()
+        # Rows are stored in id order and ids are time-ordered, so newest-first is a reversal
+        return progress_df.iloc[::-1]
     
     except Exception as e:
         print(f"Error loading progress entries: {str(e)}")
         return pd.DataFrame()
 
+def _page_records(table: str, user_email: str, before_id: Optional[int], limit: Optional[int]) -> list:
+    """A user's newest `limit` rows with ids below `before_id` as records, newest first.
+    
+    Reads the user's log files newest first like query(), but takes only the
+    newest `limit` rows of each file and builds records from those, instead
+    of concatenating, sorting and cleaning frames for a page of rows.
+    """
+    record_type = records.TABLE_RECORDS[table]
+    paths = _archive_paths(table, user_email) + _log_paths(table, _table_path(table, user_email))
+    found: Dict[Any, Any] = {}
+    ids_unique = _ids_unique()
+    # This process's queued writes are the newest rows
+    pending_df = _filter_rows(table, _pending_rows(table, user_email), None, None, None, before_id)
+    for record in records.from_frame(record_type, pending_df):
+        found[record.id if ids_unique else tuple(getattr(record, name) for name in record_type.__slots__)] = record
+    files_past_limit = 0
+    for path in reversed(paths):
+        if limit is not None and len(found) >= limit:
+            # Ids from concurrent writers can straddle a seal, so read one more file
+            files_past_limit += 1
+            if files_past_limit > 1:
+                break
+        if _tails_file(table, path) and limit is not None:
+            df = _tail_rows(table, path, user_email, before_id, limit)
+        else:
+            chunks = [chunk for chunk in _scan_file(table, path, None, user_email, None, None, before_id) if not chunk.empty]
+            if not chunks:
+                continue
+            df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+            df = df.iloc[pd.to_numeric(df['id'], errors='coerce').to_numpy().argsort(kind='stable')[::-1][:limit]]
+        # A row seen twice mid-compaction: the copy in the newer file wins
+        for record in records.from_frame(record_type, df):
+            key = record.id if ids_unique else tuple(getattr(record, name) for name in record_type.__slots__)
+            found.setdefault(key, record)
+    
+    rows = sorted(found.values(), key=lambda record: record.id or 0, reverse=True)[:limit]
+    for col in TEXT_FIELDS.get(table, {}):
+        for record in rows:
+            setattr(record, col, text_codec.decode_text(getattr(record, col)))
+    return rows
+
+def _load_records(table: str, user_email: str, before_id: Optional[int], limit: Optional[int],
+                  since: Any, until: Any, newest_first: bool) -> list:
+    """A user's rows of an event table as records, paged like the load_* functions."""
+    record_type = records.TABLE_RECORDS[table]
+    if before_id is None and limit is None and since is None and until is None:
+        rows = records.from_frame(record_type, _load_table(table, user_email))
+        return rows[::-1] if newest_first else rows
+    
+    # Pages come newest first
+    if STORAGE_BACKEND != 'sqlite' and since is None and until is None:
+        rows = _page_records(table, user_email, None if before_id is None else int(before_id), limit)
+    else:
+        rows = records.from_frame(record_type, _load_page(table, user_email, before_id, limit, since, until))
+    return rows if newest_first else rows[::-1]
+
+def load_user_record(email: str) -> Optional[records.User]:
+    """A user's profile as a record; None if not registered."""
+    try:
+        user = find_user(email)
+        return records.from_dict(records.User, user) if user else None
+    
+    except Exception as e:
+        print(f"Error loading user record: {str(e)}")
+        return None
+
+def load_roadmap_records(user_email: str) -> List[records.Roadmap]:
+    """load_user_roadmaps as records."""
+    try:
+        # The cached table filtered to the user, rather than a projected scan of the file
+        return records.from_frame(records.Roadmap, _load_table('roadmaps', user_email))
+    
+    except Exception as e:
+        print(f"Error loading user roadmaps: {str(e)}")
+        return []
+
+def load_chat_records(user_email: str, before_id: Optional[int] = None, limit: Optional[int] = None,
+                      since: Any = None, until: Any = None) -> List[records.ChatMessage]:
+    """load_chat_history as records, oldest first."""
+    try:
+        return _load_records('chat_history', user_email, before_id, limit, since, until, newest_first=False)
+    
+    except Exception as e:
+        print(f"Error loading chat history: {str(e)}")
+        return []
+
+def load_interaction_records(user_email: str, before_id: Optional[int] = None, limit: Optional[int] = None,
+                             since: Any = None, until: Any = None) -> List[records.Interaction]:
+    """load_user_interactions as records, oldest first."""
+    try:
+        return _load_records('interactions', user_email, before_id, limit, since, until, newest_first=False)
+    
+    except Exception as e:
+        print(f"Error loading user interactions: {str(e)}")
+        return []
+
+def load_progress_records(user_email: str, before_id: Optional[int] = None, limit: Optional[int] = None,
+                          since: Any = None, until: Any = None) -> List[records.ProgressEntry]:
+    """load_progress_entries as records, newest first."""
+    try:
+        return _load_records('progress', user_email, before_id, limit, since, until, newest_first=True)
+    
+    except Exception as e:
+        print(f"Error loading progress entries: {str(e)}")
+        return []
+
 def get_user_stats(user_email: str) -> Dict[str, Any]:
     """Get comprehensive stats for a user."""
     try:
-        stats = {
-            'total_roadmaps': 0,
-            'total_interactions': 0,
-            'total_chat_messages': 0,
-            'total_progress_entries': 0,
-            'join_date': None,
-            'last_activity': None
-        }
-        
-        # Load user data
-        users_df = load_users()
-        user_data = users_df[users_df['email'] == user_email]
+        counters = dict(user_stats.get(STATS_FILE, user_email) or {})
         
-        if not user_data.empty:
-            stats['join_date'] = user_data.iloc[0]['created_at']
+        # Counters are updated after queued rows are written, so add this process's queued rows
+        if WRITE_BEHIND:
+            pending = {}
+            for table in SEGMENTED_TABLES:
+                rows = [row for row in write_queue.pending(table) if row.get(USER_COLUMNS[table]) == user_email]
+                _stats_updates(table, rows, updates=pending)
+            for field, value in pending.get(user_email, {}).items():
+                if field in user_stats.COUNTER_COLUMNS:
+                    counters[field] = counters.get(field, 0) + value
+                elif field == 'first_activity':
+                    counters[field] = min(counters.get(field) or value, value)
+                elif field == 'last_activity':
+                    counters[field] = max(counters.get(field) or value, value)
         
-        # Count roadmaps
-        roadmaps_df = load_user_roadmaps(user_email)
-        stats['total_roadmaps'] = len(roadmaps_df)
-        
-        # Count interactions
-        interactions_df = load_user_interactions(user_email)
-        stats['total_interactions'] = len(interactions_df)
-        
-        # Count chat messages
-        chat_df = load_chat_history(user_email)
-        stats['total_chat_messages'] = len(chat_df[chat_df['role'] == 'user'])
-        
-        # Count progress entries
-        progress_df = load_progress_entries(user_email)
-        stats['total_progress_entries'] = len(progress_df)
-        
-        # Find last activity
-        last_activities = []
-        
-        if not interactions_df.empty:
-            last_activities.append(interactions_df['timestamp'].max())
-        
-        if not chat_df.empty:
-            last_activities.append(chat_df['timestamp'].max())
-        
-        if not progress_df.empty:
-            last_activities.append(progress_df['timestamp'].max())
-        
-        if last_activities:
-            stats['last_activity'] = max(last_activities)
-        
-        return stats
+        return {
+            'total_roadmaps': counters.get('roadmaps', 0),
+            'total_interactions': counters.get('interactions', 0),
+            'total_chat_messages': counters.get('chat_user_messages', 0),
+            'total_progress_entries': counters.get('progress_entries', 0),
+            'join_date': counters.get('join_date'),
+            'first_activity': counters.get('first_activity'),
+            'last_activity': counters.get('last_activity')
+        }
     
     except Exception as e:
         print(f"Error getting user stats: {str(e)}")
         return {}
+
+def _stats_from_tables() -> pd.DataFrame:
+    """Recompute every user's stats row by scanning the tables."""
+    frames = []
+    
+    users_df = query('users', columns=['email', 'created_at'])
+    if not users_df.empty:
+        users_df = users_df.drop_duplicates('email', keep='first')
+        frames.append(pd.DataFrame({'join_date': users_df['created_at'].map(_time_text).values}, index=users_df['email'].values))
+    
+    for table, counter in STATS_COUNTERS.items():
+        columns = ['user_email', 'role', 'timestamp'] if table == 'chat_history' else ['user_email', 'timestamp']
+        df = query(table, columns=columns)
+        if df.empty:
+            continue
+        
+        grouped = df.groupby('user_email', sort=False)
+        table_stats = pd.DataFrame({counter: grouped.size()})
+        if table == 'chat_history':
+            table_stats['chat_user_messages'] = (df['role'] == 'user').groupby(df['user_email'], sort=False).sum()
+        if table in ACTIVITY_TABLES:
+            times = df['timestamp'].map(_time_text)
+            table_stats[f'{table}_first'] = times.groupby(df['user_email'], sort=False).min()
+            table_stats[f'{table}_last'] = times.groupby(df['user_email'], sort=False).max()
+        frames.append(table_stats)
+    
+    if not frames:
+        return pd.DataFrame(columns=user_stats.COLUMNS)
+    
+    stats_df = pd.concat(frames, axis=1)
+    stats_df['first_activity'] = stats_df.filter(like='_first').min(axis=1)
+    stats_df['last_activity'] = stats_df.filter(like='_last').max(axis=1)
+    for counter in user_stats.COUNTER_COLUMNS:
+        stats_df[counter] = stats_df[counter].fillna(0).astype(int) if counter in stats_df else 0
+    stats_df = stats_df.rename_axis('user_email').reset_index()
+    return stats_df.reindex(columns=user_stats.COLUMNS)
+
+def rebuild_user_stats() -> int:
+    """Recompute the per-user stats table from the raw tables; returns the number of users."""
+    flush_writes()
+    stats_df = _stats_from_tables()
+    user_stats.replace_all(STATS_FILE, stats_df)
+    return len(stats_df)
+
+def check_user_stats() -> pd.DataFrame:
+    """Compare the stored per-user stats with the raw tables.
+    
+    Returns one row per mismatch (user_email, field, stored, actual). Counts
+    must match exactly; stored activity times may reach further than the rows
+    left after chat retention, but not less far.
+    """
+    flush_writes()
+    actual = _stats_from_tables().set_index('user_email')
+    stored = user_stats.load_all(STATS_FILE).set_index('user_email')
+    
+    mismatches = []
+    for email in actual.index.union(stored.index):
+        actual_row = actual.loc[email] if email in actual.index else None
+        stored_row = stored.loc[email] if email in stored.index else None
+        for field in user_stats.COUNTER_COLUMNS + user_stats.TIME_COLUMNS:
+            actual_value = actual_row[field] if actual_row is not None else None
+            stored_value = stored_row[field] if stored_row is not None else None
+            actual_value = None if actual_value is None or pd.isna(actual_value) else actual_value
+            stored_value = None if stored_value is None or pd.isna(stored_value) else stored_value
+            
+            if field in user_stats.COUNTER_COLUMNS:
+                consistent = int(actual_value or 0) == int(stored_value or 0)
+            elif actual_value is None:
+                consistent = True
+            elif stored_value is None:
+                consistent = False
+            elif field == 'first_activity':
+                consistent = stored_value <= actual_value
+            elif field == 'last_activity':
+                consistent = stored_value >= actual_value
+            else:
+                consistent = stored_value == actual_value
+            
+            if not consistent:
+                mismatches.append({'user_email': email, 'field': field, 'stored': stored_value, 'actual': actual_value})
+    return pd.DataFrame(mismatches, columns=['user_email', 'field', 'stored', 'actual'])
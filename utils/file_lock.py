@@ -0,0 +1,48 @@
+"""Cross-process locking and atomic replacement for the data files.
+
+Every writer in utils.data_manager holds the file's lock while it appends
+or rewrites, so several Streamlit worker processes can share one data
+directory without losing rows. Rewrites go to a temporary file that is
+renamed over the original, so readers only ever see a complete file.
+"""
+import contextlib
+import os
+import threading
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; locking becomes a no-op
+    fcntl = None
+
+@contextlib.contextmanager
+def locked(file_path: str):
+    """Hold an exclusive lock on `file_path` (via a sibling .lock file)."""
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    with open(f"{file_path}.lock", 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _tmp_path(file_path: str) -> str:
+    return f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def atomic_write_csv(df: pd.DataFrame, file_path: str, compression: str = None):
+    """Write a DataFrame to CSV (optionally compressed, e.g. 'gzip') via a temp file and an atomic rename."""
+    tmp_path = _tmp_path(file_path)
+    try:
+        # pandas compresses only into binary handles
+        f = open(tmp_path, 'wb') if compression else open(tmp_path, 'w', newline='', encoding='utf-8')
+        with f:
+            df.to_csv(f, index=False, compression=compression)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
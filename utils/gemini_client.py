@@ -1,13 +1,112 @@
 import os
+import asyncio
+import itertools
 import json
 import logging
+import re
+import threading
 from google import genai
 from google.genai import types
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
+
+from utils import response_cache, single_flight
 
 # Initialize Gemini client
 client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY", "default_key"))
 
+# Project suggestions are cached on disk (see utils/response_cache.py); bump
+# the version whenever the prompt or the validation of answers changes
+PROJECT_SUGGESTIONS_VERSION = 2
+PROJECT_SUGGESTIONS_MODEL = "gemini-2.5-flash"
+RESPONSE_CACHE_FILE = os.environ.get("AI_CACHE_PATH", os.path.join("data", "ai_cache.db"))
+
+# Project suggestions are requested one per call, concurrently; AI_PROJECT_FANOUT=0
+# asks for all of them in a single call instead
+PROJECT_FANOUT = os.environ.get("AI_PROJECT_FANOUT", "1") != "0"
+PROJECT_CONCURRENCY = int(os.environ.get("AI_PROJECT_CONCURRENCY", "4"))
+PROJECT_TIMEOUT_SECONDS = float(os.environ.get("AI_PROJECT_TIMEOUT_SECONDS", "60"))
+# One per fan-out slot, in turn, so independent calls don't suggest the same kind of project
+PROJECT_ANGLES = [
+    "a developer tool or command-line utility",
+    "a real-time or collaborative application",
+    "an application driven by data analysis or machine learning",
+    "an automation or integration that connects existing services",
+    "a consumer-facing web or mobile app",
+    "a systems, security or infrastructure project",
+    "a creative, visual or game-like project",
+]
+# Async calls (the fan-out) all run on one background event loop, which also
+# holds the process-wide PROJECT_CONCURRENCY semaphore
+_loop = {'loop': None, 'semaphore': None}
+_loop_lock = threading.Lock()
+
+# Mentor chat answers
+MENTOR_MODEL = "gemini-2.5-pro"
+MENTOR_MAX_OUTPUT_TOKENS = 3000
+# Follow-up calls allowed for an answer that stops at the output token limit
+MENTOR_MAX_CONTINUATIONS = int(os.environ.get("AI_MENTOR_MAX_CONTINUATIONS", "2"))
+CONTINUE_PROMPT = "Continue your previous answer exactly where it stopped. Don't repeat anything you already wrote or add an introduction."
+EMPTY_MENTOR_REPLY = "I understand you're asking about that topic. Let me provide you with a comprehensive answer! Could you provide a bit more detail about what specifically you'd like to know or what challenge you're facing?"
+
+_continuation_stats = {'answers': 0, 'continued_answers': 0, 'extra_calls': 0, 'cut_off_answers': 0}
+_continuation_lock = threading.Lock()
+
+# Profile fields the project and roadmap prompts use; comma-separated lists are order-insensitive
+PROJECT_PROFILE_FIELDS = ['name', 'experience_level', 'interests', 'skills', 'time_commitment',
+                          'learning_style', 'short_term_goals', 'long_term_goals']
+ROADMAP_PROFILE_FIELDS = ['name', 'experience_level', 'skills', 'interests']
+LIST_PROFILE_FIELDS = ['interests', 'skills']
+
+def _normalize_text(value: Any) -> str:
+    """Text with case and runs of whitespace ignored; non-text values count as empty."""
+    if not isinstance(value, str):
+        return ''
+    return re.sub(r'\s+', ' ', value).strip().casefold()
+
+def _normalize_list(value: Any) -> List[str]:
+    """A comma-separated text or a list as a sorted set of normalized items."""
+    items = value if isinstance(value, (list, tuple)) else _normalize_text(value).split(',')
+    return sorted({_normalize_text(item) for item in items if _normalize_text(item)})
+
+def _normalize_profile(user_data: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """The profile fields a prompt uses, normalized; comma-separated lists are order-insensitive."""
+    profile = {}
+    for field in fields:
+        if field in LIST_PROFILE_FIELDS:
+            profile[field] = _normalize_list(user_data.get(field))
+        else:
+            profile[field] = _normalize_text(user_data.get(field))
+    return profile
+
+def _project_cache_key(user_data: Dict[str, Any], focus_area: str, difficulty_level: str, project_type: str,
+                       timeline: str, num_projects: int, additional_requirements: str) -> str:
+    """Cache key of a project suggestion request: what the prompt is built from, normalized."""
+    return response_cache.key('project_suggestions', PROJECT_SUGGESTIONS_VERSION, {
+        'model': PROJECT_SUGGESTIONS_MODEL,
+        'profile': _normalize_profile(user_data, PROJECT_PROFILE_FIELDS),
+        'focus_area': _normalize_text(focus_area),
+        'difficulty_level': _normalize_text(difficulty_level),
+        'project_type': _normalize_text(project_type),
+        'timeline': _normalize_text(timeline),
+        'num_projects': int(num_projects),
+        'additional_requirements': _normalize_text(additional_requirements),
+        'fanout': PROJECT_FANOUT,
+    })
+
+def _roadmap_request_key(roadmap_data: Dict[str, Any]) -> str:
+    """Key of a learning roadmap request: the profile fields and options the prompt uses, normalized."""
+    return response_cache.key('learning_roadmap', None, {
+        'profile': _normalize_profile(roadmap_data.get('user_data') or {}, ROADMAP_PROFILE_FIELDS),
+        'learning_style': _normalize_text(roadmap_data.get('learning_style')),
+        'time_per_week': _normalize_text(roadmap_data.get('time_per_week')),
+        'goal': _normalize_text(roadmap_data.get('goal')),
+        'timeline': _normalize_text(roadmap_data.get('timeline')),
+        'difficulty_level': _normalize_text(roadmap_data.get('difficulty_level')),
+        'focus_areas': _normalize_list(roadmap_data.get('focus_areas') or []),
+        'prior_knowledge': _normalize_text(roadmap_data.get('prior_knowledge')),
+        'preferences': _normalize_text(roadmap_data.get('preferences')),
+    })
+
 def generate_project_suggestions(
     user_data: Dict[str, Any],
     focus_area: str,
@@ -15,21 +114,67 @@ def generate_project_suggestions(
     project_type: str,
     timeline: str,
     num_projects: int,
-    additional_requirements: str = ""
+    additional_requirements: str = "",
+    refresh: bool = False
 ) -> List[Dict[str, Any]]:
-    """Generate personalized project suggestions using Gemini API."""
+    """Generate personalized project suggestions using Gemini API.
     
-    try:
-        # Build context about the user with proper data validation
-        import pandas as pd
-        
-        def safe_get(data, key, default):
-            value = data.get(key, default)
-            if pd.isna(value) or not isinstance(value, str):
-                return default
-            return value
-        
-        user_context = f"""
+    A request matching a recent one (same profile and options, ignoring case
+    and spacing) is answered from the response cache, or shares the answer
+    of one still in flight. `refresh` asks the model again and replaces the
+    cached answer. Each project is asked for
+    separately and concurrently (see _fan_out_project_suggestions); only the
+    slots whose request failed are filled with fallback projects, and an
+    answer with fallbacks in it is not cached.
+    """
+    cache_key = _project_cache_key(user_data, focus_area, difficulty_level, project_type, timeline, num_projects, additional_requirements)
+    if PROJECT_FANOUT:
+        request = _fan_out_project_suggestions
+    else:
+        request = _request_project_suggestions
+    projects = response_cache.cached_call(
+        RESPONSE_CACHE_FILE, cache_key,
+        lambda: request(user_data, focus_area, difficulty_level, project_type, timeline, num_projects, additional_requirements),
+        refresh=refresh,
+        cacheable=lambda projects: bool(projects) and None not in projects
+    )
+    if not projects or all(project is None for project in projects):
+        return create_fallback_projects(num_projects, focus_area, difficulty_level, timeline)
+    return _fill_failed_slots(projects, focus_area, difficulty_level, timeline)
+
+def _fill_failed_slots(projects: List[Optional[Dict[str, Any]]], focus_area: str, difficulty_level: str, timeline: str) -> List[Dict[str, Any]]:
+    """Replace the failed (None) slots with fallback projects, numbering titles that are already taken."""
+    if None not in projects:
+        return projects
+    titles = {_normalize_text(project['title']) for project in projects if project is not None}
+    # Fallbacks with new titles first; once they run out they are reused
+    fallbacks = itertools.cycle(sorted(
+        create_fallback_projects(len(projects), focus_area, difficulty_level, timeline),
+        key=lambda project: _normalize_text(project['title']) in titles
+    ))
+    filled = []
+    for project in projects:
+        if project is None:
+            project = dict(next(fallbacks))
+            title, number = project['title'], 1
+            while _normalize_text(project['title']) in titles:
+                number += 1
+                project['title'] = f"{title} ({number})"
+        titles.add(_normalize_text(project['title']))
+        filled.append(project)
+    return filled
+
+def _project_user_context(user_data: Dict[str, Any]) -> str:
+    """The user profile part of the project prompts."""
+    import pandas as pd
+    
+    def safe_get(data, key, default):
+        value = data.get(key, default)
+        if pd.isna(value) or not isinstance(value, str):
+            return default
+        return value
+    
+    return f"""
         User Profile:
         - Name: {safe_get(user_data, 'name', 'User')}
         - Experience Level: {safe_get(user_data, 'experience_level', 'Beginner')}
@@ -40,6 +185,38 @@ def generate_project_suggestions(
         - Short-term Goals: {safe_get(user_data, 'short_term_goals', 'Not specified')}
         - Long-term Goals: {safe_get(user_data, 'long_term_goals', 'Not specified')}
         """
+
+def _validate_project(project: Any, index: int, focus_area: str, difficulty_level: str, timeline: str) -> Optional[Dict[str, Any]]:
+    """A project from the model's answer with every required field filled in; None if it isn't a project."""
+    if not isinstance(project, dict):
+        return None
+    return {
+        'title': project.get('title', f'Innovative {focus_area} Project {index+1}'),
+        'description': project.get('description', f'A practical {focus_area.lower()} project designed to challenge your skills and create something meaningful for your portfolio.'),
+        'objectives': project.get('objectives', project.get('learning_objectives', [f'Master {focus_area.lower()} fundamentals', 'Build real-world applicable skills', 'Create portfolio-worthy project', 'Learn industry best practices'])),
+        'technologies': project.get('technologies', ['Python', 'JavaScript', 'Git', 'HTML/CSS']),
+        'features': project.get('features', project.get('key_features', [f'Core {focus_area.lower()} functionality', 'User-friendly interface', 'Data management system', 'Performance optimization'])),
+        'timeline': project.get('timeline', timeline),
+        'difficulty': project.get('difficulty', difficulty_level),
+        'resources': project.get('resources', ['Official documentation', 'Online tutorials', 'GitHub examples', 'Stack Overflow'])
+    }
+
+def _request_project_suggestions(
+    user_data: Dict[str, Any],
+    focus_area: str,
+    difficulty_level: str,
+    project_type: str,
+    timeline: str,
+    num_projects: int,
+    additional_requirements: str = ""
+) -> Optional[List[Optional[Dict[str, Any]]]]:
+    """Ask the model for all the projects in one call; None if it fails or its answer can't be parsed.
+    
+    Entries of the answer that aren't projects come back as None slots.
+    """
+    
+    try:
+        user_context = _project_user_context(user_data)
         
         prompt = f"""
         You are an expert learning mentor and project advisor with deep knowledge of popular GitHub projects, industry standards, and real-world applications. Based on the user profile below, generate {num_projects} DIVERSE and UNIQUE personalized project suggestions.
@@ -96,7 +273,7 @@ def generate_project_suggestions(
         """
         
         response = client.models.generate_content(
-            model="gemini-2.5-flash",
+            model=PROJECT_SUGGESTIONS_MODEL,
             contents=prompt,
             config=types.GenerateContentConfig(
                 response_mime_type="application/json",
@@ -112,38 +289,166 @@ def generate_project_suggestions(
                 if isinstance(projects_data, dict):
                     projects_data = [projects_data]
                 
-                # Validate that each project has required fields
-                validated_projects = []
-                for i, project in enumerate(projects_data):
-                    if isinstance(project, dict):
-                        # Ensure all required fields exist with better defaults
-                        validated_project = {
-                            'title': project.get('title', f'Innovative {focus_area} Project {i+1}'),
-                            'description': project.get('description', f'A practical {focus_area.lower()} project designed to challenge your skills and create something meaningful for your portfolio.'),
-                            'objectives': project.get('objectives', project.get('learning_objectives', [f'Master {focus_area.lower()} fundamentals', 'Build real-world applicable skills', 'Create portfolio-worthy project', 'Learn industry best practices'])),
-                            'technologies': project.get('technologies', ['Python', 'JavaScript', 'Git', 'HTML/CSS']),
-                            'features': project.get('features', project.get('key_features', [f'Core {focus_area.lower()} functionality', 'User-friendly interface', 'Data management system', 'Performance optimization'])),
-                            'timeline': project.get('timeline', timeline),
-                            'difficulty': project.get('difficulty', difficulty_level),
-                            'resources': project.get('resources', ['Official documentation', 'Online tutorials', 'GitHub examples', 'Stack Overflow'])
-                        }
-                        validated_projects.append(validated_project)
-                    else:
-                        # If project is not a dict, use a fallback project from our comprehensive pool
-                        validated_projects.append(create_fallback_projects(1, focus_area, difficulty_level, timeline)[0])
-                
-                return validated_projects if validated_projects else []
+                return [_validate_project(project, i, focus_area, difficulty_level, timeline) for i, project in enumerate(projects_data)]
             
             except json.JSONDecodeError:
                 logging.warning(f"Failed to parse JSON response: {response.text[:200]}...")
-                # Return fallback projects if JSON parsing fails
-                return create_fallback_projects(num_projects, focus_area, difficulty_level, timeline)
+                # The caller falls back to the built-in projects
+                return None
         
-        return create_fallback_projects(num_projects, focus_area, difficulty_level, timeline)
+        return None
     
     except Exception as e:
         logging.error(f"Error generating project suggestions: {str(e)}")
-        return create_fallback_projects(num_projects, focus_area, difficulty_level, timeline)
+        return None
+
+def _fan_out_project_suggestions(
+    user_data: Dict[str, Any],
+    focus_area: str,
+    difficulty_level: str,
+    project_type: str,
+    timeline: str,
+    num_projects: int,
+    additional_requirements: str = ""
+) -> List[Optional[Dict[str, Any]]]:
+    """Ask the model for each project in its own call, at most PROJECT_CONCURRENCY at a time per process.
+    
+    Each call gets a different angle from PROJECT_ANGLES so the set stays
+    diverse without the calls seeing each other. A slot is None if its call
+    failed, its answer couldn't be parsed or it repeats an earlier title.
+    """
+    user_context = _project_user_context(user_data)
+    
+    async def fan_out():
+        semaphore = _project_semaphore()
+        
+        async def request(index):
+            async with semaphore:
+                return await _request_project_async(
+                    user_context, index, num_projects, focus_area, difficulty_level, project_type, timeline, additional_requirements
+                )
+        
+        return await asyncio.gather(*(request(i) for i in range(num_projects)))
+    
+    projects = _run_async(fan_out())
+    
+    # Independent calls can still land on the same idea
+    titles = set()
+    for i, project in enumerate(projects):
+        if project is None:
+            continue
+        title = _normalize_text(project['title'])
+        if title in titles:
+            logging.warning(f"Project suggestion {i+1} repeats the title '{project['title']}'")
+            projects[i] = None
+        titles.add(title)
+    
+    failed = sum(project is None for project in projects)
+    if failed:
+        logging.warning(f"{failed} of {num_projects} project suggestions failed; using fallback projects for them")
+    return projects
+
+async def _request_project_async(
+    user_context: str,
+    index: int,
+    num_projects: int,
+    focus_area: str,
+    difficulty_level: str,
+    project_type: str,
+    timeline: str,
+    additional_requirements: str
+) -> Optional[Dict[str, Any]]:
+    """Ask the model for one project of a fan-out; None if it fails or times out."""
+    
+    try:
+        angle = PROJECT_ANGLES[index % len(PROJECT_ANGLES)]
+        prompt = f"""
+        You are an expert learning mentor and project advisor with deep knowledge of popular GitHub projects, industry standards, and real-world applications. Based on the user profile below, generate ONE personalized project suggestion.
+
+        {user_context}
+
+        Project Requirements:
+        - Focus Area: {focus_area}
+        - Difficulty Level: {difficulty_level}
+        - Project Type: {project_type}
+        - Timeline: {timeline}
+        - Additional Requirements: {additional_requirements or 'None'}
+
+        This is suggestion {index + 1} of {num_projects}. To keep the suggestions diverse, make this one {angle}.
+
+        The project should:
+        1. Match the user's skill level and interests
+        2. Be based on a real-world, practical application
+        3. Provide clear learning outcomes with specific technologies
+        4. Use modern, industry-relevant tools and frameworks
+        5. Be achievable within the specified timeline
+        6. Offer a portfolio-worthy outcome
+
+        Provide:
+        - title: A specific, engaging project name (not generic)
+        - description: Detailed overview explaining what the user will build and why it's useful
+        - objectives: 3-5 specific, measurable learning outcomes
+        - technologies: Specific tools, frameworks, and libraries (not generic terms)
+        - features: 4-6 distinct, implementable features that make the project useful
+        - timeline: {timeline}
+        - difficulty: {difficulty_level}
+        - resources: Specific learning resources, documentation, and tutorials
+
+        Return ONLY a valid JSON object with NO additional text or formatting.
+        """
+        
+        response = await asyncio.wait_for(
+            client.aio.models.generate_content(
+                model=PROJECT_SUGGESTIONS_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    temperature=0.7
+                )
+            ),
+            timeout=PROJECT_TIMEOUT_SECONDS
+        )
+        
+        if not response.text:
+            return None
+        project = json.loads(response.text)
+        if isinstance(project, list):
+            project = project[0] if project else None
+        return _validate_project(project, index, focus_area, difficulty_level, timeline)
+    
+    except asyncio.TimeoutError:
+        logging.warning(f"Project suggestion {index + 1} timed out after {PROJECT_TIMEOUT_SECONDS}s")
+        return None
+    except json.JSONDecodeError:
+        logging.warning(f"Failed to parse JSON response for project suggestion {index + 1}: {response.text[:200]}...")
+        return None
+    except Exception as e:
+        logging.error(f"Error generating project suggestion {index + 1}: {str(e)}")
+        return None
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """The event loop all async model calls run on, started on a daemon thread the first time.
+    
+    client.aio keeps one pool of HTTP connections, which is bound to the loop
+    it was first used on; a loop per fan-out (asyncio.run) would leave the
+    pool holding connections of closed loops.
+    """
+    with _loop_lock:
+        if _loop['loop'] is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="gemini-async", daemon=True).start()
+            _loop['loop'] = loop
+        return _loop['loop']
+
+def _project_semaphore() -> asyncio.Semaphore:
+    """The semaphore capping project calls across every fan-out; only used on the background loop."""
+    if _loop['semaphore'] is None:
+        _loop['semaphore'] = asyncio.Semaphore(max(1, PROJECT_CONCURRENCY))
+    return _loop['semaphore']
+
+def _run_async(coroutine: Any) -> Any:
+    """Run a coroutine on the background loop and wait for its result (from any thread but that loop's)."""
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop()).result()
 
 def create_fallback_projects(num_projects: int, focus_area: str, difficulty_level: str, timeline: str) -> List[Dict[str, Any]]:
     """Create diverse, realistic projects inspired by popular GitHub and industry projects."""
@@ -313,7 +618,19 @@ def create_fallback_projects(num_projects: int, focus_area: str, difficulty_leve
     return final_projects
 
 def generate_learning_roadmap(roadmap_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate a personalized learning roadmap using Gemini API."""
+    """Generate a personalized learning roadmap using Gemini API.
+    
+    A request from any session matching one already waiting on the model
+    (same profile fields and options, ignoring case and spacing) shares its
+    answer.
+    """
+    return single_flight.run(
+        _roadmap_request_key(roadmap_data),
+        lambda: _request_learning_roadmap(roadmap_data)
+    )
+
+def _request_learning_roadmap(roadmap_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Ask the model for a learning roadmap."""
     
     try:
         user_data = roadmap_data['user_data']
@@ -387,153 +704,257 @@ def generate_learning_roadmap(roadmap_data: Dict[str, Any]) -> Dict[str, Any]:
         logging.error(f"Error generating learning roadmap: {str(e)}")
         return {}
 
+def _mentor_system_prompt(context: Dict[str, Any]) -> str:
+    """The mentor's system prompt for a chat turn: the learner's profile, recent messages and guidelines."""
+    user_data = context['user_profile']
+    chat_history = context.get('chat_history', [])
+    current_message = context['current_message']
+    
+    # Build conversation context with data validation
+    import pandas as pd
+    
+    conversation_context = ""
+    if chat_history:
+        conversation_context = "\n".join([
+            f"{'User' if msg['role'] == 'user' else 'Mentor'}: {str(msg['content']) if not pd.isna(msg.get('content', '')) else 'No content'}"
+            for msg in chat_history[-5:]  # Last 5 messages
+            if msg and isinstance(msg, dict)
+        ])
+    
+    # Safe data extraction for user profile
+    def safe_get_profile(data, key, default):
+        import pandas as pd
+        value = data.get(key, default)
+        if pd.isna(value) or not isinstance(value, str) or value == '':
+            return default
+        return value
+    
+    system_prompt = f"""
+    You are an expert AI learning mentor and career advisor. You help students and professionals learn new skills, solve problems, and advance their careers in technology.
+
+    User Profile:
+    - Name: {safe_get_profile(user_data, 'name', 'User')}
+    - Experience Level: {safe_get_profile(user_data, 'experience_level', 'Beginner')}
+    - Skills: {safe_get_profile(user_data, 'skills', 'Not specified')}
+    - Interests: {safe_get_profile(user_data, 'interests', 'Not specified')}
+    - Goals: {safe_get_profile(user_data, 'short_term_goals', 'Not specified')}
+
+    Your personality and approach:
+    - Friendly, encouraging, and supportive mentor
+    - Patient and understanding of different learning paces
+    - Comprehensive and detailed in explanations
+    - Knowledgeable about current technology trends and career paths
+    - Good at breaking down complex concepts into actionable steps
+    - Motivational and inspiring with real-world examples
+    - ALWAYS provide complete, detailed responses
+    - Never refuse to answer questions about projects, coding, technology, or careers
+    - Provide thorough career guidance with specific job titles, responsibilities, and growth paths
+
+    Guidelines for responses:
+    1. Always provide COMPLETE responses - never cut off mid-thought
+    2. Give comprehensive, detailed answers with specific examples
+    3. For career questions, provide:
+       - Specific job titles and roles
+       - Typical responsibilities and daily tasks
+       - Required skills and technologies
+       - Career progression paths
+       - Salary ranges when appropriate
+       - Companies that hire for these roles
+    4. Include actionable next steps and resources
+    5. Reference the user's profile and goals when relevant
+    6. Use bullet points and clear structure for complex information
+    7. Provide multiple options and perspectives
+    8. Include real-world examples and success stories
+    9. Be encouraging about their progress and potential
+    10. Always finish your thoughts completely
+
+    Recent conversation context:
+    {conversation_context}
+
+    Current user message: {current_message}
+
+    CRITICAL INSTRUCTIONS FOR CAREER QUESTIONS:
+    When asked about careers or \"what career can I pursue\", provide a COMPLETE, comprehensive response including:
+    
+    1. **Introduction** - Acknowledge their question and the project's value
+    2. **Core Skills Built** - List 3-4 key skills the project develops
+    3. **Career Paths** (minimum 5-7 options):
+       • **Job Title** - Specific role name
+       • **Description** - What they do day-to-day
+       • **Requirements** - Skills and experience needed
+       • **Salary Range** - Typical compensation
+       • **Companies** - Where these roles exist
+       • **Growth Path** - Career progression
+    4. **Next Steps** - Actionable advice for each path
+    5. **Timeline** - How long to reach each role
+    
+    NEVER end career responses abruptly. Always complete all sections above.
+    
+    Respond as a comprehensive career mentor providing complete guidance.
+    """
+    return system_prompt
+
+def _mentor_request(current_message: str, system_prompt: str, answer_so_far: str = "") -> Dict[str, Any]:
+    """Arguments of the mentor's generate call (streamed or not).
+    
+    With `answer_so_far`, the call asks the model to continue that answer,
+    which is replayed as its own turn of the conversation.
+    """
+    contents = [
+        types.Content(
+            role="user", 
+            parts=[types.Part(text=current_message)]
+        )
+    ]
+    if answer_so_far:
+        contents += [
+            types.Content(role="model", parts=[types.Part(text=answer_so_far)]),
+            types.Content(role="user", parts=[types.Part(text=CONTINUE_PROMPT)])
+        ]
+    return {
+        'model': MENTOR_MODEL,
+        'contents': contents,
+        'config': types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            temperature=0.7,
+            max_output_tokens=MENTOR_MAX_OUTPUT_TOKENS
+        )
+    }
+
+def _finish_reason(response: Any) -> Any:
+    """The first candidate's finish reason, or None if the response (chunk) has none yet."""
+    candidates = getattr(response, 'candidates', None) or []
+    return candidates[0].finish_reason if candidates else None
+
+def _hit_token_limit(finish_reason: Any, usage: Any) -> bool:
+    """Whether an answer stopped at the output token limit.
+    
+    The finish reason decides when the response has one; otherwise the
+    usage metadata does (thinking tokens count towards the limit too).
+    """
+    if finish_reason is not None:
+        return finish_reason == types.FinishReason.MAX_TOKENS
+    if usage is None:
+        return False
+    output_tokens = (getattr(usage, 'candidates_token_count', None) or 0) + (getattr(usage, 'thoughts_token_count', None) or 0)
+    return output_tokens >= MENTOR_MAX_OUTPUT_TOKENS
+
+def _record_continuations(extra_calls: int, still_cut_off: bool):
+    """Count one mentor answer and the continuation calls it took."""
+    with _continuation_lock:
+        _continuation_stats['answers'] += 1
+        _continuation_stats['extra_calls'] += extra_calls
+        if extra_calls:
+            _continuation_stats['continued_answers'] += 1
+        if still_cut_off:
+            _continuation_stats['cut_off_answers'] += 1
+    if extra_calls:
+        logging.info(f"Mentor answer took {extra_calls} continuation call(s){' and is still cut off' if still_cut_off else ''}")
+
+def get_continuation_stats() -> Dict[str, Any]:
+    """How many mentor answers needed continuation calls, and how many extra calls they made."""
+    with _continuation_lock:
+        answers = _continuation_stats['answers']
+        return {
+            **_continuation_stats,
+            'extra_calls_per_answer': _continuation_stats['extra_calls'] / answers if answers else 0.0,
+        }
+
+def _simple_mentor_reply(current_message: str) -> str:
+    """A plain answer from the faster model when the mentor call fails, or a canned reply."""
+    try:
+        simple_response = client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=f"You are a helpful learning mentor. Answer this question: {current_message}"
+        )
+        if simple_response and simple_response.text:
+            return simple_response.text.strip()
+    except:
+        pass
+    
+    return f"I'm here to help with your question: '{current_message[:100]}'. Could you please try asking in a different way? I'm ready to assist with any learning, coding, or project-related topics!"
+
 def chat_with_mentor(context: Dict[str, Any]) -> str:
-    """Chat with AI mentor using conversation context."""
+    """Chat with AI mentor using conversation context.
+    
+    An answer that stops at the output token limit is continued in the same
+    conversation, up to MENTOR_MAX_CONTINUATIONS more calls.
+    """
     
     try:
-        user_data = context['user_profile']
-        chat_history = context.get('chat_history', [])
         current_message = context['current_message']
+        system_prompt = _mentor_system_prompt(context)
         
-        # Build conversation context with data validation
-        import pandas as pd
-        
-        conversation_context = ""
-        if chat_history:
-            conversation_context = "\n".join([
-                f"{'User' if msg['role'] == 'user' else 'Mentor'}: {str(msg['content']) if not pd.isna(msg.get('content', '')) else 'No content'}"
-                for msg in chat_history[-5:]  # Last 5 messages
-                if msg and isinstance(msg, dict)
-            ])
-        
-        # Safe data extraction for user profile
-        def safe_get_profile(data, key, default):
-            import pandas as pd
-            value = data.get(key, default)
-            if pd.isna(value) or not isinstance(value, str) or value == '':
-                return default
-            return value
-        
-        system_prompt = f"""
-        You are an expert AI learning mentor and career advisor. You help students and professionals learn new skills, solve problems, and advance their careers in technology.
-
-        User Profile:
-        - Name: {safe_get_profile(user_data, 'name', 'User')}
-        - Experience Level: {safe_get_profile(user_data, 'experience_level', 'Beginner')}
-        - Skills: {safe_get_profile(user_data, 'skills', 'Not specified')}
-        - Interests: {safe_get_profile(user_data, 'interests', 'Not specified')}
-        - Goals: {safe_get_profile(user_data, 'short_term_goals', 'Not specified')}
-
-        Your personality and approach:
-        - Friendly, encouraging, and supportive mentor
-        - Patient and understanding of different learning paces
-        - Comprehensive and detailed in explanations
-        - Knowledgeable about current technology trends and career paths
-        - Good at breaking down complex concepts into actionable steps
-        - Motivational and inspiring with real-world examples
-        - ALWAYS provide complete, detailed responses
-        - Never refuse to answer questions about projects, coding, technology, or careers
-        - Provide thorough career guidance with specific job titles, responsibilities, and growth paths
-
-        Guidelines for responses:
-        1. Always provide COMPLETE responses - never cut off mid-thought
-        2. Give comprehensive, detailed answers with specific examples
-        3. For career questions, provide:
-           - Specific job titles and roles
-           - Typical responsibilities and daily tasks
-           - Required skills and technologies
-           - Career progression paths
-           - Salary ranges when appropriate
-           - Companies that hire for these roles
-        4. Include actionable next steps and resources
-        5. Reference the user's profile and goals when relevant
-        6. Use bullet points and clear structure for complex information
-        7. Provide multiple options and perspectives
-        8. Include real-world examples and success stories
-        9. Be encouraging about their progress and potential
-        10. Always finish your thoughts completely
-
-        Recent conversation context:
-        {conversation_context}
-
-        Current user message: {current_message}
-
-        CRITICAL INSTRUCTIONS FOR CAREER QUESTIONS:
-        When asked about careers or \"what career can I pursue\", provide a COMPLETE, comprehensive response including:
-        
-        1. **Introduction** - Acknowledge their question and the project's value
-        2. **Core Skills Built** - List 3-4 key skills the project develops
-        3. **Career Paths** (minimum 5-7 options):
-           • **Job Title** - Specific role name
-           • **Description** - What they do day-to-day
-           • **Requirements** - Skills and experience needed
-           • **Salary Range** - Typical compensation
-           • **Companies** - Where these roles exist
-           • **Growth Path** - Career progression
-        4. **Next Steps** - Actionable advice for each path
-        5. **Timeline** - How long to reach each role
-        
-        NEVER end career responses abruptly. Always complete all sections above.
+        response = client.models.generate_content(**_mentor_request(current_message, system_prompt))
         
-        Respond as a comprehensive career mentor providing complete guidance.
-        """
-        
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents=[
-                types.Content(
-                    role="user", 
-                    parts=[types.Part(text=current_message)]
-                )
-            ],
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                temperature=0.7,
-                max_output_tokens=3000
-            )
-        )
-        
-        # Better response handling with completeness check
-        if response and response.text:
-            response_text = response.text.strip()
-            
-            # Check if response seems incomplete (ends abruptly)
-            if len(response_text) > 50 and not response_text.endswith(('.', '!', '?', ':', ';')):
-                # Response might be cut off, try to complete it
-                try:
-                    completion_prompt = f"Complete this response naturally: {response_text}"
-                    completion_response = client.models.generate_content(
-                        model="gemini-2.5-flash",
-                        contents=completion_prompt,
-                        config=types.GenerateContentConfig(
-                            temperature=0.3,
-                            max_output_tokens=1000
-                        )
-                    )
-                    if completion_response and completion_response.text:
-                        return response_text + " " + completion_response.text.strip()
-                except:
-                    pass  # If completion fails, return original response
-            
-            return response_text
-        else:
+        if not response or not response.text:
             logging.warning(f"Empty response from Gemini for message: {current_message[:100]}")
-            return "I understand you're asking about that topic. Let me provide you with a comprehensive answer! Could you provide a bit more detail about what specifically you'd like to know or what challenge you're facing?"
+            return EMPTY_MENTOR_REPLY
+        
+        answer = response.text
+        extra_calls = 0
+        cut_off = _hit_token_limit(_finish_reason(response), getattr(response, 'usage_metadata', None))
+        while cut_off and extra_calls < MENTOR_MAX_CONTINUATIONS:
+            extra_calls += 1
+            try:
+                response = client.models.generate_content(**_mentor_request(current_message, system_prompt, answer))
+            except Exception as e:
+                # The answer so far stands
+                logging.warning(f"Error continuing mentor answer: {str(e)}")
+                break
+            if not response or not response.text:
+                break
+            answer += response.text
+            cut_off = _hit_token_limit(_finish_reason(response), getattr(response, 'usage_metadata', None))
+        _record_continuations(extra_calls, cut_off)
+        return answer.strip()
     
     except Exception as e:
         logging.error(f"Error in chat with mentor: {str(e)}")
         # Try a simpler approach if the complex one fails
-        try:
-            simple_response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=f"You are a helpful learning mentor. Answer this question: {current_message}"
-            )
-            if simple_response and simple_response.text:
-                return simple_response.text.strip()
-        except:
-            pass
-        
-        return f"I'm here to help with your question: '{current_message[:100]}'. Could you please try asking in a different way? I'm ready to assist with any learning, coding, or project-related topics!"
+        return _simple_mentor_reply(context.get('current_message', ''))
+
+def stream_chat_with_mentor(context: Dict[str, Any]) -> Iterator[str]:
+    """Chat with the AI mentor, yielding the answer in pieces as the model writes it.
+    
+    An answer that stops at the output token limit is continued, also
+    streamed, as chat_with_mentor does.
+    """
+    current_message = context.get('current_message', '')
+    system_prompt = None
+    answer = ''
+    extra_calls = 0
+    cut_off = False
+    try:
+        system_prompt = _mentor_system_prompt(context)
+        while True:
+            finish_reason = None
+            usage = None
+            segment = []
+            stream = client.models.generate_content_stream(**_mentor_request(current_message, system_prompt, answer))
+            for chunk in stream:
+                finish_reason = _finish_reason(chunk) or finish_reason
+                usage = getattr(chunk, 'usage_metadata', None) or usage
+                if chunk.text:
+                    segment.append(chunk.text)
+                    yield chunk.text
+            answer += ''.join(segment)
+            cut_off = bool(segment) and _hit_token_limit(finish_reason, usage)
+            if not cut_off or extra_calls == MENTOR_MAX_CONTINUATIONS:
+                break
+            extra_calls += 1
+    except Exception as e:
+        logging.error(f"Error streaming chat with mentor: {str(e)}")
+        # An answer cut short mid-stream is kept as it is
+        if not answer.strip():
+            yield _simple_mentor_reply(current_message)
+            return
+    
+    if not answer.strip():
+        logging.warning(f"Empty response from Gemini for message: {current_message[:100]}")
+        yield EMPTY_MENTOR_REPLY
+        return
+    _record_continuations(extra_calls, cut_off)
 
 def analyze_learning_progress(progress_data: Dict[str, Any]) -> Dict[str, Any]:
     """Analyze user's learning progress and provide insights."""
@@ -0,0 +1,116 @@
+"""Time-ordered 64-bit row ids that never need to look at the tables.
+
+An id packs the milliseconds since EPOCH_MS, a worker slot and a
+per-millisecond sequence, so ids sort in creation order across processes
+and minting one is O(1). Each process claims a slot no other live process
+holds by locking one of the slot lock files next to the floor; the lock is
+released when the process exits, so slots are reused. To stay monotonic
+across restarts (and clock steps backwards) a floor a little ahead of the
+newest issued millisecond is persisted; after a crash allocation resumes
+above it.
+"""
+import os
+import threading
+import time
+
+from utils import file_lock
+
+EPOCH_MS = 1735689600000  # 2025-01-01 00:00:00 UTC
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+FLOOR_RESERVE_MS = 1000
+
+_WORKER_MASK = (1 << WORKER_BITS) - 1
+_SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+_TIME_SHIFT = WORKER_BITS + SEQUENCE_BITS
+# Ids below this were numbered by row count before the allocator
+LEGACY_ID_LIMIT = 1 << _TIME_SHIFT
+
+_lock = threading.Lock()
+_state = {
+    'floor_path': None,
+    'floor_ms': None,
+    'last_ms': -1,
+    'sequence': 0,
+    'worker': None,
+    'worker_file': None,  # held open (and locked) while the slot is ours
+    'worker_pid': None,
+}
+
+def configure(floor_path: str):
+    """Set the file the persisted floor lives in (one per data directory)."""
+    with _lock:
+        _state['floor_path'] = floor_path
+        _state['floor_ms'] = None
+        # Slots are claimed per data directory
+        _release_worker()
+
+def _release_worker():
+    if _state['worker_file'] is not None and _state['worker_pid'] == os.getpid():
+        _state['worker_file'].close()
+    _state['worker'] = _state['worker_file'] = _state['worker_pid'] = None
+
+def _claim_worker(floor_path: str) -> int:
+    """Lock the first free worker slot's file and keep it locked; returns the slot."""
+    if floor_path is None or file_lock.fcntl is None:
+        # Nothing to coordinate through (no data directory, or no fcntl on Windows)
+        return os.getpid() & _WORKER_MASK
+    slot_dir = os.path.join(os.path.dirname(floor_path) or '.', '.id_workers')
+    os.makedirs(slot_dir, exist_ok=True)
+    for worker in range(_WORKER_MASK + 1):
+        slot_file = open(os.path.join(slot_dir, f"slot-{worker:04d}.lock"), 'a')
+        try:
+            file_lock.fcntl.flock(slot_file.fileno(), file_lock.fcntl.LOCK_EX | file_lock.fcntl.LOCK_NB)
+        except OSError:
+            slot_file.close()
+            continue
+        _state['worker_file'] = slot_file
+        return worker
+    raise RuntimeError(f"All {_WORKER_MASK + 1} id worker slots in {slot_dir} are held by running processes")
+
+def _read_floor(floor_path: str) -> int:
+    try:
+        with open(floor_path, 'r') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+def _write_floor(floor_path: str, floor_ms: int):
+    """Atomically replace the floor file, never lowering a floor another process wrote."""
+    with file_lock.locked(floor_path):
+        floor_ms = max(floor_ms, _read_floor(floor_path))
+        tmp_path = f"{floor_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(floor_ms))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, floor_path)
+
+def next_id() -> int:
+    """Mint a new id, greater than every id this data directory has issued."""
+    with _lock:
+        floor_path = _state['floor_path']
+        if _state['worker_pid'] != os.getpid():
+            # First id of this process, or a forked child sharing its parent's slot lock
+            _state['worker_file'] = None
+            _state['worker'] = _claim_worker(floor_path)
+            _state['worker_pid'] = os.getpid()
+        if _state['floor_ms'] is None:
+            _state['floor_ms'] = _read_floor(floor_path) if floor_path else 0
+            _state['last_ms'] = max(_state['last_ms'], _state['floor_ms'])
+
+        now_ms = max(int(time.time() * 1000) - EPOCH_MS, _state['last_ms'])
+        if now_ms == _state['last_ms']:
+            _state['sequence'] = (_state['sequence'] + 1) & _SEQUENCE_MASK
+            if _state['sequence'] == 0:
+                # Sequence exhausted for this millisecond: borrow the next one
+                now_ms += 1
+        else:
+            _state['sequence'] = 0
+        _state['last_ms'] = now_ms
+
+        if floor_path and now_ms >= _state['floor_ms']:
+            _state['floor_ms'] = now_ms + FLOOR_RESERVE_MS
+            _write_floor(floor_path, _state['floor_ms'])
+
+        return (now_ms << _TIME_SHIFT) | (_state['worker'] << SEQUENCE_BITS) | _state['sequence']
@@ -0,0 +1,162 @@
+"""Login throttling and a bounded pool for password hashing.
+
+Every login attempt takes a token from a bucket for the email and one for
+the client. Buckets refill at a steady rate up to their burst size, so a
+learner mistyping a password is never noticed while a credential-stuffing
+run is slowed to the refill rate. Password hashing and verification run on
+a small worker pool rather than the Streamlit script thread; at most
+AUTH_VERIFY_WORKERS hashes run at once and at most AUTH_VERIFY_QUEUE wait,
+beyond which attempts are turned away at once, so a burst of logins can't
+take more than those cores from the other pages.
+
+Buckets live in this process only; with several server processes each
+enforces its own limits.
+"""
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+# Per email: a burst of attempts, then one more every AUTH_EMAIL_REFILL_SECONDS
+EMAIL_BURST = int(os.environ.get("AUTH_EMAIL_BURST", "5"))
+EMAIL_REFILL_SECONDS = float(os.environ.get("AUTH_EMAIL_REFILL_SECONDS", "30"))
+
+# Per client (IP address): a larger burst and faster refill, since several
+# learners can share an address
+CLIENT_BURST = int(os.environ.get("AUTH_CLIENT_BURST", "20"))
+CLIENT_REFILL_SECONDS = float(os.environ.get("AUTH_CLIENT_REFILL_SECONDS", "3"))
+
+# Proxies (addresses or networks, comma-separated) whose X-Forwarded-For is
+# believed; without any, the client is the connection's peer address
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.environ.get("AUTH_TRUSTED_PROXIES", "").split(',') if proxy.strip()
+]
+
+# Buckets remembered per kind; the least recently used are forgotten first
+MAX_BUCKETS = 100000
+
+VERIFY_WORKERS = int(os.environ.get("AUTH_VERIFY_WORKERS", "2"))
+VERIFY_QUEUE = int(os.environ.get("AUTH_VERIFY_QUEUE", "16"))
+VERIFY_TIMEOUT = float(os.environ.get("AUTH_VERIFY_TIMEOUT", "10"))
+
+class LoginRejected(Exception):
+    """A login attempt turned away before its password was checked."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+_lock = threading.Lock()
+_buckets = {
+    'email': OrderedDict(),  # key -> [tokens, last refill time]
+    'client': OrderedDict(),
+}
+_limits = {
+    'email': (EMAIL_BURST, EMAIL_REFILL_SECONDS),
+    'client': (CLIENT_BURST, CLIENT_REFILL_SECONDS),
+}
+_pool = {'executor': None, 'in_flight': 0}
+_stats = {'allowed': 0, 'throttled': 0, 'busy': 0}
+
+def _take(kind: str, key: str, now: float) -> float:
+    """Take a token from a bucket; returns 0 on success, else seconds until one is available."""
+    burst, refill_seconds = _limits[kind]
+    buckets = _buckets[kind]
+    tokens, updated = buckets.pop(key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) / refill_seconds)
+    wait = 0.0
+    if tokens >= 1:
+        tokens -= 1
+    else:
+        wait = (1 - tokens) * refill_seconds
+    buckets[key] = (tokens, now)
+    if len(buckets) > MAX_BUCKETS:
+        buckets.popitem(last=False)
+    return wait
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def client_address(peer: Optional[str], forwarded_for: str = '') -> Optional[str]:
+    """The address a request's client bucket is keyed on.
+    
+    That is the connection's peer, unless the peer is a trusted proxy: then
+    the right-most X-Forwarded-For hop that isn't a trusted proxy, since hops
+    to the left of it are whatever the client chose to send.
+    """
+    if not peer or not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    # Every hop is a proxy we trust; the first is as far back as it goes
+    return hops[0] if hops else peer
+
+def check_attempt(email: str, client: str):
+    """Count a login attempt; raises LoginRejected if the email or client is over its limit."""
+    email = str(email).strip().lower()
+    with _lock:
+        now = time.monotonic()
+        wait = _take('client', client, now)
+        if not wait:
+            wait = _take('email', email, now)
+        if wait:
+            _stats['throttled'] += 1
+            raise LoginRejected(f"Too many login attempts. Try again in {int(wait) + 1} seconds.", wait)
+        _stats['allowed'] += 1
+
+def run_bounded(fn: Callable, *args) -> Any:
+    """Run a CPU-heavy call (password hashing) on the verification pool and wait for it.
+
+    Raises LoginRejected straight away when the pool's queue is full.
+    """
+    with _lock:
+        if _pool['in_flight'] >= VERIFY_WORKERS + VERIFY_QUEUE:
+            _stats['busy'] += 1
+            raise LoginRejected("The server is busy handling logins. Please try again in a moment.", 1.0)
+        _pool['in_flight'] += 1
+        if _pool['executor'] is None:
+            _pool['executor'] = ThreadPoolExecutor(max_workers=VERIFY_WORKERS, thread_name_prefix='password-verify')
+        executor = _pool['executor']
+
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        _finish()
+        raise
+    future.add_done_callback(lambda _: _finish())
+    try:
+        return future.result(timeout=VERIFY_TIMEOUT)
+    except FutureTimeout:
+        raise LoginRejected("The server is busy handling logins. Please try again in a moment.", 1.0)
+
+def _finish(*_):
+    with _lock:
+        _pool['in_flight'] -= 1
+
+def get_stats() -> Dict[str, Any]:
+    """Attempt counters and how many hashes are running or waiting."""
+    with _lock:
+        return {
+            **_stats,
+            'tracked_emails': len(_buckets['email']),
+            'tracked_clients': len(_buckets['client']),
+            'verifications_in_flight': _pool['in_flight'],
+        }
+
+def reset():
+    """Forget every bucket and counter (used by benchmarks)."""
+    with _lock:
+        for buckets in _buckets.values():
+            buckets.clear()
+        for key in _stats:
+            _stats[key] = 0
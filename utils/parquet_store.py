@@ -0,0 +1,105 @@
+"""Parquet files for utils.data_manager's parquet backend.
+
+Low-cardinality columns are kept as categoricals, text as Arrow-backed
+strings and time columns as native timestamps, so loaded tables take a
+fraction of the memory of the object columns read from CSV. Readers can ask
+for a subset of columns and for one user's rows, which Parquet serves
+without decoding the rest of the file.
+"""
+import os
+import threading
+from typing import Any, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.sqlite_store import USER_COLUMNS
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - only the parquet backend needs pyarrow
+    pyarrow = None
+    pq = None
+
+# Columns with a handful of distinct values, stored as categoricals
+CATEGORY_COLUMNS = {
+    'users': [],
+    'roadmaps': ['timeline', 'difficulty_level'],
+    'interactions': ['interaction_type'],
+    'chat_history': ['role'],
+    'progress': ['progress_type', 'time_spent', 'difficulty_rating'],
+}
+
+# Columns holding 'YYYY-MM-DD HH:MM:SS' times, stored as timestamps
+TIMESTAMP_COLUMNS = {
+    'users': ['created_at', 'updated_at'],
+    'roadmaps': ['created_at', 'updated_at'],
+    'interactions': ['timestamp'],
+    'chat_history': ['timestamp'],
+    'progress': ['timestamp'],
+}
+
+STRING_DTYPE = pd.StringDtype('pyarrow') if pyarrow else object
+
+def require():
+    """Raise if pyarrow isn't installed."""
+    if pyarrow is None:
+        raise RuntimeError("DATA_BACKEND=parquet needs pyarrow: pip install pyarrow")
+
+def compact_dtypes(df: pd.DataFrame, table: str, string_columns: List[str]) -> pd.DataFrame:
+    """Convert a table's columns to categorical, Arrow string and timestamp dtypes, and ids to int64."""
+    conversions = {}
+    for col in df.columns:
+        series = df[col]
+        if col == 'id':
+            # 64-bit ids would lose precision as floats and sort wrongly as text
+            if not pd.api.types.is_integer_dtype(series):
+                # Missing ids are left out of the conversion, which would otherwise go through float
+                ids = pd.to_numeric(series.dropna(), errors='coerce').astype('Int64').reindex(series.index)
+                conversions[col] = ids if ids.hasnans else ids.astype('int64')
+        elif col in CATEGORY_COLUMNS[table]:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                conversions[col] = series.astype('category')
+        elif col in TIMESTAMP_COLUMNS[table]:
+            if not pd.api.types.is_datetime64_any_dtype(series):
+                conversions[col] = pd.to_datetime(series, errors='coerce', format='ISO8601')
+        elif (col in string_columns or col == USER_COLUMNS[table]) and series.dtype != STRING_DTYPE:
+            conversions[col] = series.astype(STRING_DTYPE)
+    return df.assign(**conversions) if conversions else df
+
+def _tmp_path(file_path: str) -> str:
+    return f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def write_table(df: pd.DataFrame, file_path: str, table: str, string_columns: List[str], compression: str = 'snappy'):
+    """Atomically write a table file, converting columns to their compact dtypes."""
+    require()
+    df = compact_dtypes(df, table, string_columns)
+    # Any remaining free-form object column is stored as nullable text
+    leftovers = {col: df[col].astype(STRING_DTYPE) for col in df.columns if df[col].dtype == object}
+    if leftovers:
+        df = df.assign(**leftovers)
+
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    tmp_path = _tmp_path(file_path)
+    try:
+        df.to_parquet(tmp_path, engine='pyarrow', index=False, compression=compression)
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def read_table(file_path: str, table: str, string_columns: List[str], columns: Optional[List[str]] = None,
+               filters: Optional[List[Tuple[str, str, Any]]] = None) -> pd.DataFrame:
+    """Read a table file, optionally only some columns and rows matching `filters`.
+
+    Filters are (column, op, value) tuples, all of which must hold.
+    """
+    require()
+    if columns is not None:
+        # Files written before a column was added simply don't return it
+        available = set(pq.read_schema(file_path).names)
+        columns = [col for col in columns if col in available]
+    df = pd.read_parquet(file_path, engine='pyarrow', columns=columns, filters=filters)
+    return compact_dtypes(df, table, string_columns)
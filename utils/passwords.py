@@ -0,0 +1,53 @@
+"""Password hashing with a tunable PBKDF2 cost.
+
+New hashes are stored as `pbkdf2_sha256$<iterations>$<salt>$<hash>` (salt and
+hash base64-encoded). Hashes from before (bare SHA-256 hex digests, or even
+plain text) still verify. needs_rehash flags those, and hashes made with
+fewer iterations than AUTH_PBKDF2_ITERATIONS, so they can be replaced after
+a successful login.
+"""
+import base64
+import hashlib
+import hmac
+import os
+
+ALGORITHM = 'pbkdf2_sha256'
+PBKDF2_ITERATIONS = int(os.environ.get("AUTH_PBKDF2_ITERATIONS", "200000"))
+SALT_BYTES = 16
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+def hash_password(password: str, iterations: int = None) -> str:
+    """Hash a password with a fresh salt."""
+    iterations = iterations or PBKDF2_ITERATIONS
+    salt = os.urandom(SALT_BYTES)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(_pbkdf2(password, salt, iterations))}"
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against a stored hash (or a legacy SHA-256/plain-text value)."""
+    if not isinstance(stored, str) or not stored:
+        return False
+    if stored.startswith(ALGORITHM + '$'):
+        try:
+            _, iterations, salt, expected = stored.split('$')
+            derived = _pbkdf2(password, base64.b64decode(salt), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(_b64(derived), expected)
+    # Accounts from before: a bare SHA-256 digest, or the password itself
+    sha256_match = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest().encode(), stored.encode('utf-8'))
+    plain_match = hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    return sha256_match or plain_match
+
+def needs_rehash(stored: str) -> bool:
+    """Whether a stored hash is legacy or weaker than the configured cost."""
+    if not isinstance(stored, str) or not stored.startswith(ALGORITHM + '$'):
+        return True
+    try:
+        return int(stored.split('$')[1]) < PBKDF2_ITERATIONS
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,107 @@
+"""Typed records for the small per-user reads.
+
+A profile, a roadmap listing or a page of chat holds a handful of rows, for
+which a DataFrame costs more to build and walk (`iterrows`, `to_dict`) than
+the rows themselves. These slotted dataclasses hold one row each, built
+straight from a frame's columns by from_frame, so pages can read attributes
+instead. DataFrames stay the type for whole-table and analytics reads.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+import pandas as pd
+
+R = TypeVar('R')
+
+@dataclass(slots=True)
+class User:
+    name: str = ''
+    email: str = ''
+    password: str = ''
+    experience_level: str = ''
+    age_group: str = ''
+    interests: str = ''
+    skills: str = ''
+    time_commitment: Any = ''
+    learning_style: str = ''
+    short_term_goals: str = ''
+    long_term_goals: str = ''
+    created_at: str = ''
+    updated_at: str = ''
+    goals: Any = ''
+
+@dataclass(slots=True)
+class Roadmap:
+    """A roadmap's listing row; the body is loaded by load_roadmap_content."""
+    id: Optional[int] = None
+    user_email: str = ''
+    title: str = ''
+    goal: str = ''
+    timeline: str = ''
+    difficulty_level: str = ''
+    progress: Any = None
+    created_at: str = ''
+    content_hash: str = ''
+
+@dataclass(slots=True)
+class ChatMessage:
+    id: Optional[int] = None
+    user_email: str = ''
+    role: str = ''
+    content: str = ''
+    timestamp: str = ''
+
+@dataclass(slots=True)
+class Interaction:
+    id: Optional[int] = None
+    user_email: str = ''
+    interaction_type: str = ''
+    details: str = ''
+    timestamp: str = ''
+
+@dataclass(slots=True)
+class ProgressEntry:
+    id: Optional[int] = None
+    user_email: str = ''
+    progress_type: str = ''
+    description: str = ''
+    time_spent: str = ''
+    difficulty_rating: Any = None
+    skills_gained: str = ''
+    next_steps: str = ''
+    timestamp: str = ''
+
+TABLE_RECORDS = {
+    'users': User,
+    'roadmaps': Roadmap,
+    'interactions': Interaction,
+    'chat_history': ChatMessage,
+    'progress': ProgressEntry,
+}
+
+def _column_values(series: pd.Series) -> List[Any]:
+    """A column as Python values: times as 'YYYY-MM-DD HH:MM:SS' text, NaN/NaT as None."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+    values = series.tolist()
+    if series.hasnans:
+        values = [None if value is not None and value != value else value for value in values]
+    return values
+
+def from_frame(record_type: Type[R], df: pd.DataFrame) -> List[R]:
+    """One record per row of a frame; columns the record doesn't have are ignored."""
+    if df.empty:
+        return []
+    names = record_type.__slots__
+    defaults = record_type()
+    columns = [
+        _column_values(df[name]) if name in df.columns else [getattr(defaults, name)] * len(df)
+        for name in names
+    ]
+    if 'id' in names and 'id' in df.columns:
+        columns[names.index('id')] = [None if value is None else int(value) for value in columns[names.index('id')]]
+    return [record_type(*values) for values in zip(*columns)]
+
+def from_dict(record_type: Type[R], row: Dict[str, Any]) -> R:
+    """A record from a row dict, ignoring keys the record doesn't have."""
+    return record_type(**{name: row[name] for name in record_type.__slots__ if name in row})
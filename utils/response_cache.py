@@ -0,0 +1,168 @@
+"""Disk-backed cache of AI responses.
+
+Answers are stored in a small SQLite database keyed by a hash of the
+request's normalized inputs (see key()), so an identical request made again
+within AI_CACHE_TTL_SECONDS, from any session or server process, is
+answered from disk in milliseconds instead of another model call. Entries
+expire after the TTL, and once the cache holds more than AI_CACHE_MAX_ENTRIES
+entries or AI_CACHE_MAX_MB of answers the least recently used are evicted.
+
+Each entry remembers how long the model took to produce it, so the hit
+counters can report the latency saved. AI_CACHE=0 turns caching off.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils import single_flight, sqlite_store
+
+CACHE_ENABLED = os.environ.get("AI_CACHE", "1") != "0"
+TTL_SECONDS = float(os.environ.get("AI_CACHE_TTL_SECONDS", str(24 * 3600)))
+MAX_ENTRIES = int(os.environ.get("AI_CACHE_MAX_ENTRIES", "2000"))
+MAX_BYTES = int(float(os.environ.get("AI_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+_initialized = set()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'bypasses': 0, 'stores': 0, 'evictions': 0, 'errors': 0, 'saved_ms': 0.0}
+
+def _connect(db_path: str):
+    conn = sqlite_store.connect(db_path)
+    if db_path not in _initialized:
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, '
+                'created_at REAL NOT NULL, last_used REAL NOT NULL, compute_ms REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)')
+        _initialized.add(db_path)
+    return conn
+
+def key(kind: str, version: Any, inputs: Dict[str, Any]) -> str:
+    """The cache key of a request: a hash of its kind, prompt version and normalized inputs."""
+    # Values JSON can't hold (timestamps and the like) are keyed by their text
+    canonical = json.dumps({'kind': kind, 'version': version, 'inputs': inputs}, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def get(db_path: str, cache_key: str) -> Optional[tuple]:
+    """A cached answer and the milliseconds it took to produce, or None if missing or expired."""
+    conn = _connect(db_path)
+    now = time.time()
+    row = conn.execute('SELECT value, created_at, compute_ms FROM responses WHERE key = ?', (cache_key,)).fetchone()
+    if row is None:
+        return None
+    value, created_at, compute_ms = row
+    with conn:
+        if now - created_at > TTL_SECONDS:
+            conn.execute('DELETE FROM responses WHERE key = ?', (cache_key,))
+            return None
+        conn.execute('UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?', (now, cache_key))
+    return json.loads(value), compute_ms
+
+def put(db_path: str, cache_key: str, value: Any, compute_ms: float) -> int:
+    """Store an answer, then evict expired and least recently used entries; returns how many were evicted."""
+    text = json.dumps(value, ensure_ascii=False)
+    now = time.time()
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO responses (key, value, size, created_at, last_used, compute_ms) VALUES (?, ?, ?, ?, ?, ?)',
+            (cache_key, text, len(text.encode('utf-8')), now, now, compute_ms)
+        )
+        evicted = conn.execute('DELETE FROM responses WHERE created_at < ?', (now - TTL_SECONDS,)).rowcount
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        if entries > MAX_ENTRIES or size > MAX_BYTES:
+            # Walk from the least recently used until both limits hold
+            drop = []
+            for old_key, old_size in conn.execute('SELECT key, size FROM responses ORDER BY last_used'):
+                if entries <= MAX_ENTRIES and size <= MAX_BYTES:
+                    break
+                drop.append((old_key,))
+                entries -= 1
+                size -= old_size
+            conn.executemany('DELETE FROM responses WHERE key = ?', drop)
+            evicted += len(drop)
+    return evicted
+
+def cached_call(db_path: str, cache_key: str, compute: Callable[[], Any], refresh: bool = False,
+                cacheable: Callable[[Any], bool] = bool) -> Any:
+    """Return the cached answer for a key, or compute, store and return it.
+
+    `refresh` skips the lookup (a "regenerate") but still stores the new
+    answer. Answers `cacheable` rejects (by default, None or empty ones)
+    are returned without being cached, so failures and fallbacks are
+    retried next time. Concurrent calls that need computing for the same
+    key share one compute (see utils/single_flight.py). Cache errors never
+    fail the call; the answer is just computed.
+    """
+    if not CACHE_ENABLED:
+        return single_flight.run(cache_key, compute)
+
+    if refresh:
+        _count('bypasses')
+    else:
+        start = time.perf_counter()
+        try:
+            cached = get(db_path, cache_key)
+        except Exception as e:
+            logging.warning(f"Error reading response cache: {str(e)}")
+            _count('errors')
+            cached = None
+        if cached is not None:
+            value, compute_ms = cached
+            with _lock:
+                _stats['hits'] += 1
+                _stats['saved_ms'] += max(0.0, compute_ms - (time.perf_counter() - start) * 1000)
+            return value
+        _count('misses')
+
+    def compute_and_store():
+        start = time.perf_counter()
+        value = compute()
+        compute_ms = (time.perf_counter() - start) * 1000
+        if cacheable(value):
+            try:
+                evicted = put(db_path, cache_key, value, compute_ms)
+                with _lock:
+                    _stats['stores'] += 1
+                    _stats['evictions'] += evicted
+            except Exception as e:
+                logging.warning(f"Error writing response cache: {str(e)}")
+                _count('errors')
+        return value
+
+    return single_flight.run(cache_key, compute_and_store)
+
+def _count(counter: str):
+    with _lock:
+        _stats[counter] += 1
+
+def get_stats() -> Dict[str, Any]:
+    """This process's hit/miss counters and the model latency saved by hits."""
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            **_stats,
+            'saved_ms': round(_stats['saved_ms'], 1),
+            'hit_rate': _stats['hits'] / lookups if lookups else 0.0,
+        }
+
+def get_size(db_path: str) -> Dict[str, int]:
+    """Entries and bytes of answers held on disk."""
+    entries, size = _connect(db_path).execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+    return {'entries': entries, 'bytes': size}
+
+def clear(db_path: str):
+    """Drop every cached answer."""
+    conn = _connect(db_path)
+    with conn:
+        conn.execute('DELETE FROM responses')
+
+def reset_stats():
+    """Zero the counters (used by benchmarks)."""
+    with _lock:
+        for counter in _stats:
+            _stats[counter] = 0.0 if counter == 'saved_ms' else 0
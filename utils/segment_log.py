@@ -0,0 +1,52 @@
+"""Segment bookkeeping for append-only CSV logs.
+
+A log is an active file that receives appends (e.g. ``chat_history.csv``)
+plus sealed segments next to it (``chat_history.seg-000001.csv``, or
+``.parquet`` for the parquet backend; archive segments are ``.csv.gz``). Once the active file grows past a
+size limit it becomes the next segment and a fresh active file is started,
+so appends never rewrite old rows and compaction only ever touches sealed,
+immutable files.
+"""
+import os
+import re
+from typing import List
+
+def _segment_prefix(active_path: str) -> str:
+    return os.path.splitext(os.path.basename(active_path))[0] + '.seg-'
+
+def is_segment(path: str) -> bool:
+    """Whether a file name is a sealed segment rather than an active file."""
+    return '.seg-' in os.path.basename(path)
+
+def segment_paths(active_path: str) -> List[str]:
+    """Sealed segments of a log, oldest first."""
+    directory = os.path.dirname(active_path) or '.'
+    prefix = _segment_prefix(active_path)
+    pattern = re.compile(re.escape(prefix) + r'(\d+)\.(csv|csv\.gz|parquet)$')
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    numbered = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            numbered.append((int(match.group(1)), os.path.join(directory, name)))
+    return [path for _, path in sorted(numbered)]
+
+def next_segment_path(active_path: str, extension: str = '.csv') -> str:
+    """Path the next sealed segment of a log should be written to."""
+    existing = segment_paths(active_path)
+    last_number = int(re.search(r'\.seg-(\d+)\.', os.path.basename(existing[-1])).group(1)) if existing else 0
+    directory = os.path.dirname(active_path) or '.'
+    return os.path.join(directory, f"{_segment_prefix(active_path)}{last_number + 1:06d}{extension}")
+
+def rotate(active_path: str) -> str:
+    """Seal the active file as the next segment and return the segment's path.
+
+    The caller holds the log's lock and creates the new active file.
+    """
+    segment_path = next_segment_path(active_path)
+    os.replace(active_path, segment_path)
+    return segment_path
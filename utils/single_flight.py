@@ -0,0 +1,67 @@
+"""Coalescing of identical AI requests made at the same time.
+
+When several sessions of the server process make the same request (same
+canonical key, see response_cache.key()) while one is already waiting on
+the model, run() makes them wait for that call and share its answer
+instead of each calling the model. This covers a double-submitted form or
+a group of learners with matching profiles clicking "Generate" together;
+the response cache covers the same request made again later.
+
+Followers get a copy of the answer, so no session can change another's.
+If the call raises, every waiter gets the exception. The coalesced counter
+is the number of model calls saved. AI_SINGLE_FLIGHT=0 turns it off.
+"""
+import concurrent.futures
+import copy
+import os
+import threading
+from typing import Any, Callable, Dict
+
+SINGLE_FLIGHT_ENABLED = os.environ.get("AI_SINGLE_FLIGHT", "1") != "0"
+
+_in_flight: Dict[str, concurrent.futures.Future] = {}
+_lock = threading.Lock()
+_stats = {'calls': 0, 'coalesced': 0}
+
+def run(key: str, compute: Callable[[], Any]) -> Any:
+    """compute()'s answer, shared with every concurrent run() of the same key."""
+    if not SINGLE_FLIGHT_ENABLED:
+        return compute()
+
+    with _lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = concurrent.futures.Future()
+            _in_flight[key] = future
+            _stats['calls'] += 1
+        else:
+            _stats['coalesced'] += 1
+    if not leader:
+        return copy.deepcopy(future.result())
+
+    try:
+        value = compute()
+    except BaseException as e:
+        _finish(key)
+        future.set_exception(e)
+        raise
+    # Requests from here on make a new call
+    _finish(key)
+    future.set_result(value)
+    return value
+
+def _finish(key: str):
+    with _lock:
+        _in_flight.pop(key, None)
+
+def get_stats() -> Dict[str, Any]:
+    """This process's model calls made through run(), the calls saved by sharing, and those in flight."""
+    with _lock:
+        return {**_stats, 'in_flight': len(_in_flight)}
+
+def reset_stats():
+    """Zero the counters (used by benchmarks)."""
+    with _lock:
+        for counter in _stats:
+            _stats[counter] = 0
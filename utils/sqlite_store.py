@@ -0,0 +1,274 @@
+"""Embedded SQLite backend for utils.data_manager.
+
+Tables mirror the CSV files column for column. Per-user reads go through
+indexes on user_email/timestamp instead of filtering the whole table, and
+the database runs in WAL mode so page reads don't block writers.
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+# Column used to find a user's rows in each table
+USER_COLUMNS = {
+    'users': 'email',
+    'roadmaps': 'user_email',
+    'interactions': 'user_email',
+    'chat_history': 'user_email',
+    'progress': 'user_email',
+}
+
+# Column holding the row's time, indexed for range scans
+TIME_COLUMNS = {
+    'users': 'created_at',
+    'roadmaps': 'created_at',
+    'interactions': 'timestamp',
+    'chat_history': 'timestamp',
+    'progress': 'timestamp',
+}
+
+_local = threading.local()
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Return this thread's connection to the database, opening it on first use."""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        connections[db_path] = conn
+    return conn
+
+def close_all():
+    """Close this thread's connections (used when the data dir changes)."""
+    for conn in getattr(_local, 'connections', {}).values():
+        conn.close()
+    _local.connections = {}
+
+def init_schema(db_path: str, table_columns: Dict[str, List[str]]):
+    """Create tables and indexes that don't exist yet."""
+    conn = connect(db_path)
+    with conn:
+        for table, columns in table_columns.items():
+            # Leave columns untyped so values round-trip exactly as the CSV backend stores them
+            column_defs = [
+                'id INTEGER PRIMARY KEY AUTOINCREMENT' if col == 'id' else f'"{col}"'
+                for col in columns
+            ]
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({", ".join(column_defs)})')
+
+            user_col, time_col = USER_COLUMNS[table], TIME_COLUMNS[table]
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{user_col}_{time_col} ON {table}("{user_col}", "{time_col}")')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{time_col} ON {table}("{time_col}")')
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+def _ensure_columns(conn: sqlite3.Connection, table: str, keys: List[str]):
+    """Add columns for keys the table doesn't have yet, like pd.concat would."""
+    existing = _table_columns(conn, table)
+    for key in keys:
+        if key not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN "{key}"')
+
+def _sql_value(value: Any) -> Any:
+    """Convert pandas/numpy scalars to values sqlite3 can bind."""
+    if value is None:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+def insert_row(db_path: str, table: str, row: Dict[str, Any]) -> int:
+    """Insert one row and return its id (rowid)."""
+    conn = connect(db_path)
+    with conn:
+        _ensure_columns(conn, table, list(row))
+        columns = ', '.join(f'"{key}"' for key in row)
+        placeholders = ', '.join('?' for _ in row)
+        cursor = conn.execute(
+            f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
+            [_sql_value(value) for value in row.values()]
+        )
+    return cursor.lastrowid
+
+def insert_rows(db_path: str, table: str, rows: List[Dict[str, Any]]):
+    """Insert a batch of rows in one transaction."""
+    conn = connect(db_path)
+    with conn:
+        keys = list(dict.fromkeys(key for row in rows for key in row))
+        _ensure_columns(conn, table, keys)
+        columns = ', '.join(f'"{key}"' for key in keys)
+        placeholders = ', '.join('?' for _ in keys)
+        conn.executemany(
+            f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
+            ([_sql_value(row.get(key)) for key in keys] for row in rows)
+        )
+
+def load_rows(db_path: str, table: str, user_email: Optional[str] = None) -> pd.DataFrame:
+    """Load a table, or only one user's rows through the user index."""
+    conn = connect(db_path)
+    if user_email is None:
+        return pd.read_sql_query(f'SELECT * FROM {table} ORDER BY rowid', conn)
+    user_col = USER_COLUMNS[table]
+    return pd.read_sql_query(
+        f'SELECT * FROM {table} WHERE "{user_col}" = ? ORDER BY rowid',
+        conn, params=(user_email,)
+    )
+
+def query_rows(db_path: str, table: str, columns: Optional[List[str]] = None, user_email: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None, order_by: Optional[str] = None,
+               descending: bool = False, limit: Optional[int] = None, before_id: Optional[int] = None) -> pd.DataFrame:
+    """Select some columns of a user's rows in a [since, until) time range, through the indexes.
+
+    `before_id` keeps only rows with a smaller id (keyset pagination).
+    """
+    conn = connect(db_path)
+    available = _table_columns(conn, table)
+    selected = available if columns is None else [col for col in columns if col in available]
+    if not selected:
+        return pd.DataFrame(columns=columns)
+
+    where, params = [], []
+    if user_email is not None:
+        where.append(f'"{USER_COLUMNS[table]}" = ?')
+        params.append(user_email)
+    if since:
+        where.append(f'"{TIME_COLUMNS[table]}" >= ?')
+        params.append(since)
+    if until:
+        where.append(f'"{TIME_COLUMNS[table]}" < ?')
+        params.append(until)
+    if before_id is not None:
+        where.append('id < ?')
+        params.append(int(before_id))
+
+    column_sql = ', '.join(f'"{col}"' for col in selected)
+    sql = f'SELECT {column_sql} FROM {table}'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    if order_by in available:
+        sql += f' ORDER BY "{order_by}" {"DESC" if descending else "ASC"}'
+    else:
+        sql += ' ORDER BY rowid'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(int(limit))
+    return pd.read_sql_query(sql, conn, params=params)
+
+def delete_older(db_path: str, table: str, cutoff: str, max_id: int) -> int:
+    """Delete rows older than `cutoff` with ids up to `max_id`; returns how many were deleted."""
+    conn = connect(db_path)
+    with conn:
+        cursor = conn.execute(f'DELETE FROM {table} WHERE "{TIME_COLUMNS[table]}" < ? AND id <= ?', (cutoff, int(max_id)))
+    return cursor.rowcount
+
+def update_user(db_path: str, user_data: Dict[str, Any]) -> bool:
+    """Update the first user row matching user_data['email']."""
+    conn = connect(db_path)
+    columns = [key for key in user_data if key in _table_columns(conn, 'users') and key != 'email']
+    if not columns:
+        return False
+
+    assignments = ', '.join(f'"{col}" = ?' for col in columns)
+    with conn:
+        cursor = conn.execute(
+            f'UPDATE users SET {assignments} WHERE rowid = (SELECT rowid FROM users WHERE email = ? LIMIT 1)',
+            [_sql_value(user_data[col]) for col in columns] + [user_data['email']]
+        )
+    return cursor.rowcount > 0
+
+def apply_retention(db_path: str, table: str, keep: int, cutoff: Optional[str] = None,
+                    returning: Optional[List[str]] = None) -> pd.DataFrame:
+    """Keep each user's newest `keep` rows (0 for no limit), none older than `cutoff`.
+
+    Returns the `returning` columns (default: id) of the deleted rows.
+    """
+    user_col, time_col = USER_COLUMNS[table], TIME_COLUMNS[table]
+    returning = returning or ['id']
+    returning_sql = ', '.join(f'"{col}"' for col in returning)
+    conn = connect(db_path)
+    deleted = []
+    with conn:
+        if cutoff:
+            deleted += conn.execute(
+                f'DELETE FROM {table} WHERE {time_col} < ? RETURNING {returning_sql}', (cutoff,)
+            ).fetchall()
+        if keep > 0:
+            deleted += conn.execute(
+                f'DELETE FROM {table} WHERE id IN ('
+                f'SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {user_col} ORDER BY id DESC) AS rn '
+                f'FROM {table}) WHERE rn > ?) RETURNING {returning_sql}',
+                (keep,)
+            ).fetchall()
+    return pd.DataFrame(deleted, columns=returning)
+
+def migrate_from_csv(db_path: str, csv_files: Dict[str, List[str]], table_columns: Dict[str, List[str]],
+                     force: bool = False) -> Dict[str, int]:
+    """Copy every CSV table (given as its list of files) into the database, keeping ids.
+
+    Returns the rows copied per table; see migrate_frames().
+    """
+    frames = {}
+    for table, csv_paths in csv_files.items():
+        table_frames = []
+        for csv_path in csv_paths:
+            try:
+                table_frames.append(pd.read_csv(csv_path))
+            except (FileNotFoundError, pd.errors.EmptyDataError):
+                continue
+        frames[table] = pd.concat(table_frames, ignore_index=True) if table_frames else pd.DataFrame()
+    return migrate_frames(db_path, frames, table_columns, force=force)
+
+def migrate_frames(db_path: str, frames: Dict[str, pd.DataFrame], table_columns: Dict[str, List[str]],
+                   force: bool = False) -> Dict[str, int]:
+    """Copy every table (given as a DataFrame of all its rows) into the database, keeping ids.
+
+    Returns the rows copied per table.
+
+    Refuses to run against a database that already holds rows unless `force`
+    is set, in which case the existing rows are replaced.
+    """
+    init_schema(db_path, table_columns)
+    conn = connect(db_path)
+
+    if not force:
+        for table in frames:
+            if conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone():
+                raise RuntimeError(f"Table '{table}' in {db_path} already has rows; use force to replace them")
+    for table, df in frames.items():
+        if 'id' in df.columns and df['id'].dropna().duplicated().any():
+            raise RuntimeError(f"Table '{table}' has rows sharing an id; renumber them first (storage_admin renumber-ids)")
+
+    copied = {}
+    with conn:
+        for table, df in frames.items():
+            conn.execute(f'DELETE FROM {table}')
+            if df.empty:
+                copied[table] = 0
+                continue
+
+            _ensure_columns(conn, table, list(df.columns))
+            # Parquet tables hold times as timestamps; the database stores their text
+            df = df.assign(**{
+                col: df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+                for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])
+            })
+            df = df.astype(object).where(pd.notna(df), None)
+            columns = ', '.join(f'"{col}"' for col in df.columns)
+            placeholders = ', '.join('?' for _ in df.columns)
+            conn.executemany(
+                f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
+                ([_sql_value(value) for value in row] for row in df.itertuples(index=False, name=None))
+            )
+            copied[table] = len(df)
+    return copied
@@ -0,0 +1,276 @@
+"""Maintenance commands for the data_manager storage layer.
+
+Run from the project root, e.g.:
+
+    python -m utils.storage_admin migrate-sqlite
+"""
+import argparse
+import os
+import shutil
+import sys
+from typing import List
+
+import pandas as pd
+
+from utils import blob_store, data_manager, segment_log, sqlite_store
+
+def migrate_sqlite(data_dir: str, db_path: str, force: bool = False):
+    """Copy the CSV or Parquet tables in data_dir into a SQLite database."""
+    data_manager.set_data_dir(data_dir)
+    frames = {}
+    renumbered = {}
+    for table in data_manager.TABLE_COLUMNS:
+        # Legacy rows sharing an id (the old chat trim) get unique ids in the database
+        (frames[table],), renumbered[table] = data_manager._renumber_legacy(table, [_read_all_rows(table)])
+    copied = sqlite_store.migrate_frames(db_path, frames, data_manager.TABLE_COLUMNS, force=force)
+    for table, count in copied.items():
+        print(f"{table}: {count} rows" + (f" ({renumbered[table]} legacy rows renumbered)" if renumbered[table] else ""))
+    print(f"Migrated to {db_path}. Set DATA_BACKEND=sqlite to use it.")
+
+def _layout_paths(table: str, layout: str) -> List[str]:
+    """The existing files of a table in one layout that the current backend reads (CSV or Parquet)."""
+    saved = data_manager.DATA_LAYOUT
+    data_manager.DATA_LAYOUT = layout
+    try:
+        return [path for path in data_manager._table_paths(table) if os.path.exists(path)]
+    finally:
+        data_manager.DATA_LAYOUT = saved
+
+def _read_all_rows(table: str) -> pd.DataFrame:
+    """Read a table from its flat file, segments and any partition files, whichever exist."""
+    frames = [
+        data_manager._read_file(table, path)
+        for layout in ('flat', 'partitioned') for path in _layout_paths(table, layout)
+    ]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=data_manager.TABLE_COLUMNS[table])
+
+    df = pd.concat(frames, ignore_index=True).drop_duplicates()
+    if 'id' in df.columns:
+        df = df.sort_values('id', kind='stable')
+    return df
+
+def _repartition_archive(table: str, layout: str, partitions: int) -> int:
+    """Regroup a table's archive segments under the new layout's log names; returns the rows moved."""
+    table_dir = os.path.join(data_manager.ARCHIVE_DIR, table)
+    if not os.path.isdir(table_dir):
+        return 0
+
+    moved = 0
+    for month in sorted(os.listdir(table_dir)):
+        month_dir = os.path.join(table_dir, month)
+        if not os.path.isdir(month_dir):
+            continue
+        # Segments written under either backend (.csv.gz or .parquet)
+        paths = [os.path.join(month_dir, name) for name in sorted(os.listdir(month_dir)) if segment_log.is_segment(name)]
+        if not paths:
+            continue
+        df = pd.concat([data_manager._read_file(table, path) for path in paths], ignore_index=True).drop_duplicates()
+
+        # Readers skip directories that aren't named after a month
+        new_dir = month_dir + '.new'
+        shutil.rmtree(new_dir, ignore_errors=True)
+        os.makedirs(new_dir)
+        if layout == 'partitioned':
+            buckets = df[sqlite_store.USER_COLUMNS[table]].map(lambda email: data_manager.partition_of(email, partitions))
+            logs = [(f"part-{bucket:03d}", log_df) for bucket, log_df in df.groupby(buckets)]
+        else:
+            logs = [(table, df)]
+        for log_name, log_df in logs:
+            segment_name = f"{log_name}.seg-000001{data_manager._archive_extension()}"
+            data_manager._write_archive_segment(table, os.path.join(new_dir, segment_name), log_df)
+
+        os.replace(month_dir, month_dir + '.old')
+        os.replace(new_dir, month_dir)
+        shutil.rmtree(month_dir + '.old', ignore_errors=True)
+        moved += len(df)
+    return moved
+
+def repartition(data_dir: str, layout: str, partitions: int):
+    """Rewrite every table into the flat or partitioned layout, keeping ids and the backend's file format."""
+    data_manager.set_data_dir(data_dir)
+    for table in data_manager.TABLE_COLUMNS:
+        table_dir = os.path.join(data_dir, table)
+        flat_paths = _layout_paths(table, 'flat')
+        df = _read_all_rows(table)
+
+        if layout == 'partitioned':
+            # Build the new partitions next to the old ones, then swap directories
+            new_dir = table_dir + '.new'
+            shutil.rmtree(new_dir, ignore_errors=True)
+            os.makedirs(new_dir)
+            buckets = df[sqlite_store.USER_COLUMNS[table]].map(lambda email: data_manager.partition_of(email, partitions))
+            for bucket, part_df in df.groupby(buckets):
+                part_name = os.path.basename(data_manager.partition_file(table, bucket))
+                data_manager._replace_file(table, os.path.join(new_dir, part_name), part_df.reset_index(drop=True))
+
+            if os.path.isdir(table_dir):
+                os.replace(table_dir, table_dir + '.old')
+            os.replace(new_dir, table_dir)
+            shutil.rmtree(table_dir + '.old', ignore_errors=True)
+
+            # Keep the old flat files around rather than deleting anyone's data
+            for path in flat_paths:
+                os.replace(path, path + '.bak')
+        else:
+            # The whole table goes into the active file before its segments are removed
+            flat_file = data_manager._flat_file(table)
+            data_manager._replace_file(table, flat_file, df.reset_index(drop=True))
+            for path in flat_paths:
+                if path != flat_file:
+                    os.remove(path)
+            shutil.rmtree(table_dir, ignore_errors=True)
+        data_manager.clear_table_cache()
+
+        print(f"{table}: {len(df)} rows")
+        archived = _repartition_archive(table, layout, partitions)
+        if archived:
+            print(f"{table}: {archived} archived rows")
+
+    if layout == 'partitioned':
+        print(f"Set DATA_LAYOUT=partitioned DATA_PARTITIONS={partitions} to use the new layout.")
+    else:
+        print("Set DATA_LAYOUT=flat (the default) to use the new layout.")
+
+def renumber_ids(data_dir: str):
+    """Give rows saved before the id allocator that share an id new, unique ids."""
+    data_manager.set_data_dir(data_dir)
+    renumbered = data_manager.renumber_legacy_ids()
+    for table, count in renumbered.items():
+        print(f"{table}: {count} rows renumbered")
+    print("Row ids are unique.")
+
+def compact_chat(data_dir: str):
+    """Run one chat compaction pass now instead of waiting for the background thread."""
+    data_manager.set_data_dir(data_dir)
+    dropped = data_manager.compact_chat_history()
+    for log, count in dropped.items():
+        print(f"{log}: {count} messages dropped")
+    print(f"Dropped {sum(dropped.values())} messages.")
+
+def rebuild_stats(data_dir: str):
+    """Recompute the per-user stats counters from the tables."""
+    data_manager.set_data_dir(data_dir)
+    users = data_manager.rebuild_user_stats()
+    print(f"Rebuilt stats for {users} users.")
+
+def check_stats(data_dir: str) -> bool:
+    """Report counters that disagree with the tables; True when consistent."""
+    data_manager.set_data_dir(data_dir)
+    mismatches = data_manager.check_user_stats()
+    if mismatches.empty:
+        print("User stats are consistent with the tables.")
+        return True
+    print(mismatches.to_string(index=False))
+    print(f"{mismatches['user_email'].nunique()} users have stale stats; run stats-rebuild to fix them.")
+    return False
+
+def rebuild_user_index(data_dir: str):
+    """Rebuild the email index used by login and signup from the users table."""
+    data_manager.set_data_dir(data_dir)
+    users = data_manager.rebuild_user_index()
+    print(f"Indexed {users} users.")
+
+def migrate_roadmaps(data_dir: str):
+    """Move roadmap bodies stored in the roadmaps table into the blob store."""
+    data_manager.set_data_dir(data_dir)
+    counts = data_manager.migrate_roadmap_content()
+    print(f"Moved {counts['moved']} roadmap bodies to {data_manager.ROADMAP_BLOB_DIR}.")
+    if counts['unparsed']:
+        print(f"{counts['unparsed']} bodies couldn't be parsed and were left in the table.")
+
+def archive(data_dir: str, days: int = None, before: str = None):
+    """Move chat, interaction and progress rows older than the cutoff into the archive."""
+    data_manager.set_data_dir(data_dir)
+    if days is not None:
+        data_manager.ARCHIVE_DAYS = days
+    archived = data_manager.archive_cold_rows(before)
+    for table, count in archived.items():
+        print(f"{table}: {count} rows archived")
+    print(f"Archive segments are in {data_manager.ARCHIVE_DIR}.")
+
+def train_text_dicts(data_dir: str, samples: int):
+    """Train the zstd dictionaries chat messages and roadmap bodies are compressed with."""
+    data_manager.set_data_dir(data_dir)
+    trained = data_manager.train_text_dictionaries(samples)
+    for kind, dict_id in trained.items():
+        print(f"{kind}: dictionary {dict_id}")
+    print(f"Dictionaries are in {data_manager.TEXT_DICT_DIR}; keep them with the data, values compressed with one can't be read without it.")
+
+def gc_roadmap_blobs(data_dir: str, min_age: float):
+    """Delete roadmap blobs no roadmap row refers to."""
+    data_manager.set_data_dir(data_dir)
+    hashes = data_manager.query('roadmaps', columns=['content_hash'])
+    if 'content_hash' not in hashes.columns:
+        # query() returns a bare frame on errors; don't treat that as "nothing referenced"
+        print("Couldn't read the roadmaps table; no blobs removed.")
+        return
+    if hashes.empty:
+        # More likely the wrong DATA_BACKEND/DATA_LAYOUT than a user base without roadmaps
+        print("No roadmap rows found (check DATA_BACKEND and DATA_LAYOUT); no blobs removed.")
+        return
+    removed = blob_store.remove_unreferenced(data_manager.ROADMAP_BLOB_DIR, hashes['content_hash'].dropna(), min_age)
+    print(f"Removed {removed} unreferenced roadmap blobs.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the AI Mentor data files.")
+    parser.add_argument('--data-dir', default=data_manager.DATA_DIR, help="directory holding the data files")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subparsers.add_parser('migrate-sqlite', help="one-shot copy of the CSV or Parquet tables into SQLite")
+    migrate_parser.add_argument('--db', help="database file (default: <data-dir>/mentor.db)")
+    migrate_parser.add_argument('--force', action='store_true', help="replace rows already in the database")
+
+    repartition_parser = subparsers.add_parser('repartition', help="move tables between flat and per-user partitioned files")
+    repartition_parser.add_argument('--layout', choices=['flat', 'partitioned'], default='partitioned')
+    repartition_parser.add_argument('--partitions', type=int, default=data_manager.PARTITION_COUNT, help="number of partition buckets")
+
+    subparsers.add_parser('renumber-ids', help="give legacy rows that share an id (from the old chat trim) unique ids")
+
+    subparsers.add_parser('compact-chat', help="merge sealed chat segments and apply per-user retention now")
+
+    subparsers.add_parser('stats-rebuild', help="recompute the per-user stats counters from the tables")
+    subparsers.add_parser('stats-check', help="compare the per-user stats counters with the tables")
+
+    subparsers.add_parser('user-index-rebuild', help="rebuild the email index used by login and signup")
+
+    subparsers.add_parser('migrate-roadmaps', help="move roadmap bodies out of the roadmaps table into the blob store")
+    gc_parser = subparsers.add_parser('gc-roadmap-blobs', help="delete roadmap blobs no roadmap refers to")
+    gc_parser.add_argument('--min-age', type=float, default=3600, help="keep blobs younger than this many seconds")
+
+    archive_parser = subparsers.add_parser('archive', help="move old chat, interaction and progress rows into compressed archive segments")
+    archive_parser.add_argument('--days', type=int, help=f"archive rows older than this many days (default: {data_manager.ARCHIVE_DAYS})")
+    archive_parser.add_argument('--before', help="archive rows older than this time ('YYYY-MM-DD HH:MM:SS') instead")
+
+    dict_parser = subparsers.add_parser('train-text-dict', help="train zstd dictionaries for chat messages and roadmap bodies (needs zstandard)")
+    dict_parser.add_argument('--samples', type=int, default=2000, help="newest messages and roadmaps to train on")
+
+    args = parser.parse_args()
+
+    if args.command == 'migrate-sqlite':
+        migrate_sqlite(args.data_dir, args.db or os.path.join(args.data_dir, "mentor.db"), args.force)
+    elif args.command == 'repartition':
+        repartition(args.data_dir, args.layout, args.partitions)
+    elif args.command == 'renumber-ids':
+        renumber_ids(args.data_dir)
+    elif args.command == 'compact-chat':
+        compact_chat(args.data_dir)
+    elif args.command == 'stats-rebuild':
+        rebuild_stats(args.data_dir)
+    elif args.command == 'stats-check':
+        if not check_stats(args.data_dir):
+            sys.exit(1)
+    elif args.command == 'user-index-rebuild':
+        rebuild_user_index(args.data_dir)
+    elif args.command == 'migrate-roadmaps':
+        migrate_roadmaps(args.data_dir)
+    elif args.command == 'gc-roadmap-blobs':
+        gc_roadmap_blobs(args.data_dir, args.min_age)
+    elif args.command == 'archive':
+        archive(args.data_dir, args.days, args.before)
+    elif args.command == 'train-text-dict':
+        train_text_dicts(args.data_dir, args.samples)
+
+if __name__ == "__main__":
+    main()
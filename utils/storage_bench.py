@@ -0,0 +1,1049 @@
+"""Storage benchmarks for utils.data_manager.
+
+Run from the project root, e.g.:
+
+    python -m utils.storage_bench append --existing 5000 --rows 500
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+import pandas as pd
+
+from utils import data_manager, file_lock, login_guard, passwords, response_cache, segment_log, single_flight, synthetic_data, text_codec
+
+SAMPLE_ANSWER = "Here is a step-by-step plan for your project. " * 40
+
+def _chat_row(i: int) -> Dict[str, Any]:
+    return {
+        'user_email': f"user{i % 50}@example.com",
+        'role': 'user' if i % 2 == 0 else 'assistant',
+        'content': SAMPLE_ANSWER
+    }
+
+def _interaction_row(i: int) -> Dict[str, Any]:
+    return {
+        'user_email': f"user{i % 50}@example.com",
+        'interaction_type': 'project_suggestion',
+        'details': f"Generated 3 projects for focus area {i % 7}"
+    }
+
+def _progress_row(i: int) -> Dict[str, Any]:
+    return {
+        'user_email': f"user{i % 50}@example.com",
+        'progress_type': 'Learned a new concept',
+        'description': 'Worked through the pandas groupby tutorial and built a small report.',
+        'time_spent': '1 hour',
+        'difficulty_rating': '🤔 Medium',
+        'skills_gained': 'Python, Pandas',
+        'next_steps': 'Try merges and pivots'
+    }
+
+TABLES = {
+    'chat': ('CHAT_HISTORY_FILE', data_manager.save_chat_message, _chat_row),
+    'interactions': ('INTERACTIONS_FILE', data_manager.save_user_interaction, _interaction_row),
+    'progress': ('PROGRESS_FILE', data_manager.save_progress_entry, _progress_row),
+}
+
+def legacy_save(file_path: str, row: Dict[str, Any]):
+    """The original read-everything, concat, rewrite-everything save path."""
+    df = pd.read_csv(file_path) if os.path.exists(file_path) else pd.DataFrame()
+    row['id'] = len(df) + 1
+    row['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+    df.to_csv(file_path, index=False)
+
+def _prepare(data_dir: str, file_attr: str, make_row: Callable, existing: int) -> str:
+    """Create a fresh data dir whose table already holds `existing` rows."""
+    shutil.rmtree(data_dir, ignore_errors=True)
+    data_manager.set_data_dir(data_dir)
+    data_manager.init_data_files()
+    file_path = getattr(data_manager, file_attr)
+
+    header = pd.read_csv(file_path).columns
+    rows = []
+    for i in range(existing):
+        row = make_row(i)
+        row['id'] = i + 1
+        row['timestamp'] = '2025-01-01 00:00:00'
+        rows.append(row)
+    pd.DataFrame(rows, columns=header).to_csv(file_path, index=False)
+    return file_path
+
+def bench_append(existing: int, rows: int) -> pd.DataFrame:
+    """Measure rows/sec of the legacy rewrite path against the append path."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    try:
+        for name, (file_attr, save_fn, make_row) in TABLES.items():
+            data_dir = os.path.join(base_dir, name)
+
+            file_path = _prepare(data_dir, file_attr, make_row, existing)
+            start = time.perf_counter()
+            for i in range(rows):
+                legacy_save(file_path, make_row(i))
+            legacy_rate = rows / (time.perf_counter() - start)
+
+            _prepare(data_dir, file_attr, make_row, existing)
+            start = time.perf_counter()
+            for i in range(rows):
+                save_fn(make_row(i))
+            append_rate = rows / (time.perf_counter() - start)
+
+            results.append({
+                'table': name,
+                'existing_rows': existing,
+                'rows_written': rows,
+                'legacy_rows_per_sec': round(legacy_rate, 1),
+                'append_rows_per_sec': round(append_rate, 1),
+                'speedup': round(append_rate / legacy_rate, 1)
+            })
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def bench_reads(existing: int, repeats: int) -> pd.DataFrame:
+    """Compare per-user loads that re-parse the CSV with loads served from the table cache."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    loaders = {
+        'chat': data_manager.load_chat_history,
+        'interactions': data_manager.load_user_interactions,
+        'progress': data_manager.load_progress_entries,
+    }
+    try:
+        for name, (file_attr, _, make_row) in TABLES.items():
+            _prepare(os.path.join(base_dir, name), file_attr, make_row, existing)
+            load = loaders[name]
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                data_manager.clear_table_cache()
+                load("user1@example.com")
+            cold_ms = (time.perf_counter() - start) * 1000 / repeats
+
+            data_manager.clear_table_cache()
+            load("user1@example.com")
+            start = time.perf_counter()
+            for _ in range(repeats):
+                load("user1@example.com")
+            warm_ms = (time.perf_counter() - start) * 1000 / repeats
+
+            stats = data_manager.get_cache_stats()
+            results.append({
+                'table': name,
+                'rows': existing,
+                'uncached_ms': round(cold_ms, 3),
+                'cached_ms': round(warm_ms, 3),
+                'speedup': round(cold_ms / warm_ms, 1),
+                'cache_hits': stats['hits'],
+                'cache_misses': stats['misses']
+            })
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def bench_write_behind(existing: int, rows: int) -> pd.DataFrame:
+    """Per-save latency with synchronous appends against the write-behind queue."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    write_behind = data_manager.WRITE_BEHIND
+    try:
+        for name, (file_attr, save_fn, make_row) in TABLES.items():
+            for mode in ['sync', 'write-behind']:
+                data_manager.WRITE_BEHIND = mode == 'write-behind'
+                _prepare(os.path.join(base_dir, name, mode), file_attr, make_row, existing)
+                batches_before = data_manager.get_write_queue_stats()['batches']
+
+                latencies = []
+                start = time.perf_counter()
+                for i in range(rows):
+                    save_start = time.perf_counter()
+                    save_fn(make_row(i))
+                    latencies.append((time.perf_counter() - save_start) * 1000)
+                data_manager.flush_writes()
+                elapsed = time.perf_counter() - start
+
+                latencies = pd.Series(latencies)
+                results.append({
+                    'table': name,
+                    'mode': mode,
+                    'rows': rows,
+                    'save_p50_ms': round(latencies.quantile(0.5), 3),
+                    'save_p99_ms': round(latencies.quantile(0.99), 3),
+                    'rows_per_sec': round(rows / elapsed, 1),
+                    'batches': data_manager.get_write_queue_stats()['batches'] - batches_before if mode == 'write-behind' else rows
+                })
+    finally:
+        data_manager.WRITE_BEHIND = write_behind
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def _cold_load(load: Callable, repeats: int) -> tuple:
+    """Mean latency (ms) of a loader with an empty table cache, and the MB it returned."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        data_manager.clear_table_cache()
+        df = load()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeats
+    return elapsed_ms, df.memory_usage(deep=True).sum() / 1e6
+
+def bench_formats(rows: int, repeats: int) -> pd.DataFrame:
+    """Compare memory and load latency of CSV tables against Parquet segments."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    backend = data_manager.STORAGE_BACKEND
+    try:
+        for name, (file_attr, _, make_row) in TABLES.items():
+            for storage in ['csv', 'parquet']:
+                data_manager.STORAGE_BACKEND = storage
+                file_path = _prepare(os.path.join(base_dir, name, storage), file_attr, make_row, rows)
+                table = os.path.splitext(os.path.basename(file_path))[0]
+                if storage == 'parquet':
+                    with file_lock.locked(file_path):
+                        data_manager._seal_segment(table, file_path)
+
+                full_ms, full_mb = _cold_load(lambda: data_manager._load_table(table), repeats)
+                user_ms, _ = _cold_load(lambda: data_manager._load_table(table, "user1@example.com"), repeats)
+                projected_ms, projected_mb = _cold_load(
+                    lambda: data_manager.query(table, columns=['user_email', 'timestamp']), repeats
+                )
+                results.append({
+                    'table': name,
+                    'format': storage,
+                    'rows': rows,
+                    'file_mb': round(sum(os.path.getsize(path) for path in data_manager._table_paths(table)) / 1e6, 2),
+                    'memory_mb': round(full_mb, 2),
+                    'load_ms': round(full_ms, 1),
+                    'user_load_ms': round(user_ms, 1),
+                    'projected_mb': round(projected_mb, 2),
+                    'projected_ms': round(projected_ms, 1)
+                })
+    finally:
+        data_manager.STORAGE_BACKEND = backend
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def _prepare_history(data_dir: str, file_attr: str, make_row: Callable, history: int, segment_rows: int) -> str:
+    """Give user1 a history of `history` rows, sealed into segments of `segment_rows`."""
+    file_path = _prepare(data_dir, file_attr, make_row, 0)
+    header = pd.read_csv(file_path).columns
+    for start in range(0, history, segment_rows):
+        rows = []
+        for i in range(start, min(start + segment_rows, history)):
+            row = make_row(i)
+            row['user_email'] = "user1@example.com"
+            row['id'] = i + 1
+            row['timestamp'] = '2025-01-01 00:00:00'
+            rows.append(row)
+        pd.DataFrame(rows, columns=header).to_csv(segment_log.next_segment_path(file_path), index=False)
+    return file_path
+
+def bench_pages(histories: list, page_size: int, repeats: int) -> pd.DataFrame:
+    """Compare loading a user's whole history and slicing it with loading one keyset page."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    loaders = {
+        'chat': data_manager.load_chat_history,
+        'interactions': data_manager.load_user_interactions,
+        'progress': data_manager.load_progress_entries,
+    }
+    try:
+        for name, (file_attr, _, make_row) in TABLES.items():
+            load = loaders[name]
+            for history in histories:
+                _prepare_history(os.path.join(base_dir, name, str(history)), file_attr, make_row, history, 2000)
+
+                full_ms, full_mb = _cold_load(lambda: load("user1@example.com"), repeats)
+                page_ms, page_mb = _cold_load(lambda: load("user1@example.com", limit=page_size), repeats)
+                page = load("user1@example.com", limit=page_size)
+                older_ms, _ = _cold_load(
+                    lambda: load("user1@example.com", before_id=int(page['id'].min()), limit=page_size), repeats
+                )
+                results.append({
+                    'table': name,
+                    'history_rows': history,
+                    'full_load_ms': round(full_ms, 1),
+                    'full_load_mb': round(full_mb, 2),
+                    'page_ms': round(page_ms, 1),
+                    'older_page_ms': round(older_ms, 1),
+                    'page_mb': round(page_mb, 3)
+                })
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def _reset_peak_rss():
+    """Restart peak RSS tracking for this process (Linux only; elsewhere the peak is process-wide)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def _peak_rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _bytes_read() -> Optional[int]:
+    """Bytes this process has read through read syscalls, page cache hits included."""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def _measure(operation: str, calls: List[Callable], cold: bool) -> Dict[str, Any]:
+    """Time each call and report latency percentiles, peak RSS and bytes read per call."""
+    latencies = []
+    _reset_peak_rss()
+    read_before = _bytes_read()
+    for call in calls:
+        if cold:
+            data_manager.clear_table_cache()
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    read_after = _bytes_read()
+    latencies = pd.Series(latencies)
+    return {
+        'operation': operation,
+        'calls': len(calls),
+        'p50_ms': round(latencies.quantile(0.5), 2),
+        'p99_ms': round(latencies.quantile(0.99), 2),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'read_kb_per_call': round((read_after - read_before) / len(calls) / 1024, 1) if read_before is not None else None
+    }
+
+def _suite_calls(users: int, calls: int, seed: int) -> Dict[str, List[Callable]]:
+    """Every load_*/save_*/get_user_stats call to time, on users picked by activity."""
+    rng = random.Random(seed)
+    indexes = rng.choices(range(users), cum_weights=synthetic_data.activity_weights(users), k=calls)
+    emails = [synthetic_data.user_email(index) for index in indexes]
+
+    # Roadmap ids to open, looked up before timing starts
+    roadmap_refs = []
+    for email in emails:
+        roadmaps = data_manager.load_user_roadmaps(email)
+        if not roadmaps.empty:
+            roadmap_refs.append((email, int(roadmaps['id'].iloc[rng.randrange(len(roadmaps))])))
+
+    # Fresh signups get emails no generated user has
+    run_tag = int(time.time())
+    return {
+        'load_users': [data_manager.load_users for _ in emails],
+        'get_user_stats': [lambda email=email: data_manager.get_user_stats(email) for email in emails],
+        'load_user_roadmaps': [lambda email=email: data_manager.load_user_roadmaps(email) for email in emails],
+        'load_roadmap_content': [lambda ref=ref: data_manager.load_roadmap_content(*ref) for ref in roadmap_refs],
+        'load_chat_history': [lambda email=email: data_manager.load_chat_history(email) for email in emails],
+        'load_chat_history[page]': [lambda email=email: data_manager.load_chat_history(email, limit=20) for email in emails],
+        'load_user_interactions': [lambda email=email: data_manager.load_user_interactions(email) for email in emails],
+        'load_progress_entries': [lambda email=email: data_manager.load_progress_entries(email) for email in emails],
+        'load_progress_entries[page]': [lambda email=email: data_manager.load_progress_entries(email, limit=10) for email in emails],
+        'save_user': [
+            lambda i=i: data_manager.save_user(
+                dict(synthetic_data.make_user(users + i, rng), email=f"bench-{run_tag}-{i}@example.com")
+            )
+            for i in range(calls)
+        ],
+        'save_user_profile': [
+            lambda email=email: data_manager.save_user_profile({'email': email, 'skills': ', '.join(rng.sample(synthetic_data.SKILLS, 4))})
+            for email in emails
+        ],
+        'save_roadmap': [
+            lambda i=i, email=email: data_manager.save_roadmap(synthetic_data.make_roadmap(i, calls, email, rng))
+            for i, email in enumerate(emails)
+        ],
+        'save_user_interaction': [
+            lambda i=i, email=email: data_manager.save_user_interaction(synthetic_data.make_interaction(i, calls, email, rng))
+            for i, email in enumerate(emails)
+        ],
+        'save_chat_message': [
+            lambda i=i, email=email: data_manager.save_chat_message(synthetic_data.make_chat_message(i, calls, email, rng))
+            for i, email in enumerate(emails)
+        ],
+        'save_progress_entry': [
+            lambda i=i, email=email: data_manager.save_progress_entry(synthetic_data.make_progress_entry(i, calls, email, rng))
+            for i, email in enumerate(emails)
+        ],
+    }
+
+def bench_suite(sizes: List[int], calls: int, seed: int, cold: bool, data_root: Optional[str] = None) -> pd.DataFrame:
+    """Time every data_manager load/save call against synthetic data sets of each size.
+
+    Each size is the number of rows per chat, interaction and progress table,
+    with size / 100 users (at least 10) and two roadmaps per user. Data sets
+    are generated with a fixed seed, so runs on the same sizes and seed are
+    comparable. With `data_root` they are kept there and reused by later
+    runs (the save calls add a few rows to them each time).
+    """
+    results = []
+    base_dir = data_root or tempfile.mkdtemp(prefix="mentor_suite_")
+    run_info = {
+        'run_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'revision': _git_revision(),
+        'backend': data_manager.STORAGE_BACKEND,
+        'layout': data_manager.DATA_LAYOUT,
+        'cache': 'cold' if cold else 'warm',
+    }
+    try:
+        for size in sizes:
+            users = max(10, size // 100)
+            data_dir = os.path.join(base_dir, f"rows-{size}-seed-{seed}-{data_manager.STORAGE_BACKEND}-{data_manager.DATA_LAYOUT}")
+            marker = os.path.join(data_dir, '.generated')
+            if not os.path.exists(marker):
+                shutil.rmtree(data_dir, ignore_errors=True)
+                synthetic_data.generate(data_dir, users, size, seed=seed)
+                open(marker, 'w').close()
+            data_manager.set_data_dir(data_dir)
+            data_manager.clear_table_cache()
+
+            for operation, operation_calls in _suite_calls(users, calls, seed).items():
+                if operation_calls:
+                    results.append({**run_info, 'rows': size, 'users': users, **_measure(operation, operation_calls, cold)})
+            data_manager.flush_writes()
+    finally:
+        if data_root is None:
+            shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def legacy_authenticate(email: str, password_hash: str) -> Optional[Dict[str, Any]]:
+    """The original login lookup: load every user and scan for the email."""
+    users_df = data_manager.load_users()
+    user_row = users_df[users_df['email'] == email]
+    if user_row.empty:
+        return None
+    user_data = user_row.iloc[0].to_dict()
+    return user_data if user_data.get('password') == password_hash else None
+
+def indexed_authenticate(email: str, password_hash: str) -> Optional[Dict[str, Any]]:
+    """The login lookup through the email index."""
+    user_data = data_manager.find_user(email)
+    return user_data if user_data and user_data.get('password') == password_hash else None
+
+def bench_login(users: int, calls: int, seed: int) -> pd.DataFrame:
+    """Compare login and signup-check latency of a users scan against the email index."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    try:
+        start = time.perf_counter()
+        synthetic_data.generate(base_dir, users, 0, roadmaps=0, seed=seed)
+        print(f"Generated {users} users in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(seed)
+        indexes = [rng.randrange(users) for _ in range(calls)]
+        logins = [
+            (synthetic_data.user_email(index), hashlib.sha256(synthetic_data.user_password(index).encode()).hexdigest())
+            for index in indexes
+        ]
+        new_emails = [f"new-user-{i}@example.com" for i in range(calls)]
+
+        for cold in [True, False]:
+            for method, authenticate in [('scan', legacy_authenticate), ('index', indexed_authenticate)]:
+                login_calls = [lambda login=login: authenticate(*login) for login in logins]
+                for email, password_hash in logins[:3]:
+                    assert authenticate(email, password_hash), f"{method} login failed for {email}"
+                results.append({
+                    'users': users,
+                    'cache': 'cold' if cold else 'warm',
+                    'method': method,
+                    **_measure('login', login_calls, cold)
+                })
+
+            signup_checks = {
+                'scan': [lambda email=email: email in data_manager.load_users()['email'].values for email in new_emails],
+                'index': [lambda email=email: data_manager.user_exists(email) for email in new_emails],
+            }
+            for method, check_calls in signup_checks.items():
+                results.append({
+                    'users': users,
+                    'cache': 'cold' if cold else 'warm',
+                    'method': method,
+                    **_measure('signup_check', check_calls, cold)
+                })
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def _dir_mb(path: str, archive: bool) -> float:
+    """MB of event log files under a data dir, either in the archive or outside it."""
+    total = 0
+    for root, _, names in os.walk(path):
+        in_archive = root[len(path):].startswith(os.sep + 'archive')
+        if in_archive != archive:
+            continue
+        total += sum(
+            os.path.getsize(os.path.join(root, name)) for name in names
+            if name.startswith(('interactions', 'chat_history', 'progress', 'part-')) and not name.endswith('.lock')
+        )
+    return total / (1024 * 1024)
+
+def bench_archive(users: int, rows: int, calls: int, seed: int) -> pd.DataFrame:
+    """Time recent-range and full-history loads before and after archiving rows older than DATA_ARCHIVE_DAYS."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    try:
+        synthetic_data.generate(base_dir, users, rows, roadmaps=0, seed=seed)
+        data_manager.set_data_dir(base_dir)
+        # Synthetic history ends at END_TIME, so ages are measured from there
+        recent = synthetic_data.END_TIME - pd.Timedelta(days=30)
+        cutoff = synthetic_data.END_TIME - pd.Timedelta(days=data_manager.ARCHIVE_DAYS)
+
+        rng = random.Random(seed)
+        emails = [synthetic_data.user_email(index) for index in rng.choices(range(users), cum_weights=synthetic_data.activity_weights(users), k=calls)]
+        operations = {
+            'chat_last_30_days': [lambda email=email: data_manager.load_chat_history(email, since=recent) for email in emails],
+            'progress_last_30_days': [lambda email=email: data_manager.load_progress_entries(email, since=recent) for email in emails],
+            'chat_full_history': [lambda email=email: data_manager.load_chat_history(email) for email in emails],
+        }
+
+        for stage in ['before', 'after']:
+            if stage == 'after':
+                start = time.perf_counter()
+                archived = data_manager.archive_cold_rows(cutoff)
+                print(f"Archived {sum(archived.values())} rows in {time.perf_counter() - start:.1f}s")
+            for operation, operation_calls in operations.items():
+                results.append({
+                    'stage': stage,
+                    'hot_mb': round(_dir_mb(base_dir, False), 1),
+                    'archive_mb': round(_dir_mb(base_dir, True), 1),
+                    **_measure(operation, operation_calls, cold=True)
+                })
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def _tree_mb(path: str) -> float:
+    total = 0
+    for root, _, names in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in names if not name.endswith('.lock'))
+    return total / (1024 * 1024)
+
+def _train_synthetic_dicts(samples: int, seed: int):
+    """Train text dictionaries on synthetic values made with a different seed than the data set."""
+    rng = random.Random(seed + 1)
+    chat = [synthetic_data.make_chat_message(i, samples, 'sample@example.com', rng)['content'].encode('utf-8') for i in range(samples)]
+    roadmaps = [
+        json.dumps(synthetic_data.make_roadmap_content(rng, f"Roadmap {i}"), sort_keys=True, separators=(',', ':')).encode('utf-8')
+        for i in range(samples // 10)
+    ]
+    text_codec.train_dictionary('chat', chat)
+    text_codec.train_dictionary('roadmap', roadmaps)
+
+def bench_text(users: int, rows: int, calls: int, seed: int) -> pd.DataFrame:
+    """Disk size and read throughput of chat content and roadmap blobs under each text compression setting."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    modes = [('off', False), ('zlib', False)]
+    if text_codec.zstandard is not None:
+        modes += [('zstd', False), ('zstd', True)]
+    saved_mode = text_codec.TEXT_COMPRESSION
+    try:
+        for mode, use_dict in modes:
+            label = f"{mode}+dict" if use_dict else mode
+            data_dir = os.path.join(base_dir, label)
+            text_codec.TEXT_COMPRESSION = mode
+            data_manager.set_data_dir(data_dir)
+            if use_dict:
+                _train_synthetic_dicts(2000, seed)
+            synthetic_data.generate(data_dir, users, rows, roadmaps=users, seed=seed, force=True)
+
+            chat_mb = sum(
+                os.path.getsize(path) for path in data_manager._table_paths('chat_history')
+            ) / (1024 * 1024)
+            rng = random.Random(seed)
+            emails = [synthetic_data.user_email(index) for index in rng.choices(range(users), cum_weights=synthetic_data.activity_weights(users), k=calls)]
+            roadmap_refs = []
+            for email in emails:
+                roadmaps = data_manager.load_user_roadmaps(email)
+                if not roadmaps.empty:
+                    roadmap_refs.append((email, int(roadmaps['id'].iloc[0])))
+
+            # Decompression throughput over every stored message
+            data_manager.clear_table_cache()
+            start = time.perf_counter()
+            contents = data_manager.query('chat_history', columns=['content'])['content']
+            elapsed = time.perf_counter() - start
+            text_mb = contents.str.len().sum() / (1024 * 1024)
+
+            page = _measure('chat_page', [lambda email=email: data_manager.load_chat_history(email, limit=20) for email in emails], cold=True)
+            roadmap = _measure('roadmap_body', [lambda ref=ref: data_manager.load_roadmap_content(*ref) for ref in roadmap_refs], cold=True)
+            results.append({
+                'compression': label,
+                'chat_files_mb': round(chat_mb, 1),
+                'roadmap_blobs_mb': round(_tree_mb(data_manager.ROADMAP_BLOB_DIR), 1),
+                'chat_scan_text_mb_per_sec': round(text_mb / elapsed, 1),
+                'chat_page_p50_ms': page['p50_ms'],
+                'roadmap_body_p50_ms': roadmap['p50_ms'],
+            })
+    finally:
+        text_codec.TEXT_COMPRESSION = saved_mode
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def bench_tail(users: int, rows: int, calls: int, seed: int) -> pd.DataFrame:
+    """Cost of refreshing a user's chat after they send one message: tail reads vs full re-parses."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    saved = data_manager.TAIL_READS_ENABLED
+    try:
+        synthetic_data.generate(base_dir, users, rows, roadmaps=0, seed=seed)
+        rng = random.Random(seed)
+        emails = [synthetic_data.user_email(index) for index in rng.choices(range(users), cum_weights=synthetic_data.activity_weights(users), k=calls)]
+        for mode, enabled in (('full re-parse', False), ('tail read', True)):
+            data_manager.TAIL_READS_ENABLED = enabled
+            data_manager.clear_table_cache()
+            data_manager.load_chat_history(emails[0])
+
+            def refresh(email: str, load: Callable):
+                data_manager.save_chat_message({'user_email': email, 'role': 'user', 'content': SAMPLE_ANSWER[:200]})
+                load(email)
+
+            history = _measure('history', [lambda email=email: refresh(email, data_manager.load_chat_history) for email in emails], cold=False)
+            page = _measure('page', [
+                lambda email=email: refresh(email, lambda e: data_manager.load_chat_history(e, limit=20)) for email in emails
+            ], cold=False)
+            stats = data_manager.get_cache_stats()
+            results.append({
+                'mode': mode,
+                'chat_rows': rows,
+                'active_file_kb': round(os.path.getsize(data_manager.CHAT_HISTORY_FILE) / 1024, 1),
+                'save_and_history_p50_ms': history['p50_ms'],
+                'save_and_page_p50_ms': page['p50_ms'],
+                'read_kb_per_refresh': page['read_kb_per_call'],
+                'tail_rows': stats['tail_rows'],
+                'rebuilds': stats['rebuilds'],
+            })
+    finally:
+        data_manager.TAIL_READS_ENABLED = saved
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def _walk_frame(df: pd.DataFrame) -> int:
+    """Read every field of a loaded frame the way the pages used to: iterrows."""
+    return sum(len(row) for _, row in df.iterrows())
+
+def _walk_records(rows: list) -> int:
+    return sum(len(record.__slots__) for record in rows if record.id is not None)
+
+def bench_records(users: int, rows: int, calls: int, seed: int) -> pd.DataFrame:
+    """Per-call cost of the small per-user reads as DataFrames (walked with iterrows) vs as records."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    try:
+        synthetic_data.generate(base_dir, users, rows, roadmaps=users * 2, seed=seed)
+        rng = random.Random(seed)
+        emails = [synthetic_data.user_email(index) for index in rng.choices(range(users), cum_weights=synthetic_data.activity_weights(users), k=calls)]
+        operations = {
+            'chat_page': (
+                lambda email: _walk_frame(data_manager.load_chat_history(email, limit=20)),
+                lambda email: _walk_records(data_manager.load_chat_records(email, limit=20)),
+            ),
+            'progress_page': (
+                lambda email: _walk_frame(data_manager.load_progress_entries(email, limit=20)),
+                lambda email: _walk_records(data_manager.load_progress_records(email, limit=20)),
+            ),
+            'roadmap_list': (
+                lambda email: _walk_frame(data_manager.load_user_roadmaps(email)),
+                lambda email: _walk_records(data_manager.load_roadmap_records(email)),
+            ),
+        }
+        for operation, (frame_call, record_call) in operations.items():
+            # Warm the table cache so only the per-call overhead is timed
+            for email in emails:
+                frame_call(email)
+            frames = _measure(operation, [lambda email=email: frame_call(email) for email in emails], cold=False)
+            recs = _measure(operation, [lambda email=email: record_call(email) for email in emails], cold=False)
+            results.append({
+                'operation': operation,
+                'dataframe_p50_ms': frames['p50_ms'],
+                'records_p50_ms': recs['p50_ms'],
+                'dataframe_p99_ms': frames['p99_ms'],
+                'records_p99_ms': recs['p99_ms'],
+                'speedup': round(frames['p50_ms'] / recs['p50_ms'], 1) if recs['p50_ms'] else None,
+            })
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def bench_response_cache(requests: int, distinct: int, model_ms: float, max_entries: int, seed: int) -> pd.DataFrame:
+    """Latency of AI requests with and without the response cache, against a simulated model call."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    db_path = os.path.join(base_dir, "ai_cache.db")
+    saved = (response_cache.CACHE_ENABLED, response_cache.MAX_ENTRIES)
+    answer = [synthetic_data.make_roadmap_content(random.Random(seed), "Suggested project")]
+
+    def model_call():
+        time.sleep(model_ms / 1000)
+        return answer
+
+    try:
+        rng = random.Random(seed)
+        # Repeat requests follow the same skew as user activity
+        picks = rng.choices(range(distinct), cum_weights=synthetic_data.activity_weights(distinct), k=requests)
+        for mode, enabled in (('no cache', False), ('cache', True)):
+            response_cache.CACHE_ENABLED = enabled
+            response_cache.MAX_ENTRIES = max_entries
+            response_cache.reset_stats()
+            latencies = []
+            for pick in picks:
+                key = response_cache.key('bench', 1, {'request': pick})
+                start = time.perf_counter()
+                response_cache.cached_call(db_path, key, model_call)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies = pd.Series(latencies)
+            stats = response_cache.get_stats()
+            results.append({
+                'mode': mode,
+                'requests': requests,
+                'distinct_requests': distinct,
+                'p50_ms': round(latencies.quantile(0.5), 2),
+                'p99_ms': round(latencies.quantile(0.99), 2),
+                'hit_rate': round(stats['hit_rate'], 3),
+                'evictions': stats['evictions'],
+                'saved_s': round(stats['saved_ms'] / 1000, 1),
+            })
+    finally:
+        response_cache.CACHE_ENABLED, response_cache.MAX_ENTRIES = saved
+        response_cache.reset_stats()
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def bench_single_flight(threads: int, bursts: int, distinct: int, model_ms: float) -> pd.DataFrame:
+    """Model calls and latency of bursts of identical requests with and without coalescing (simulated model, no cache)."""
+    results = []
+    base_dir = tempfile.mkdtemp(prefix="mentor_bench_")
+    db_path = os.path.join(base_dir, "ai_cache.db")
+    saved = (response_cache.CACHE_ENABLED, single_flight.SINGLE_FLIGHT_ENABLED)
+    model_calls = []
+
+    def model_call():
+        model_calls.append(1)
+        time.sleep(model_ms / 1000)
+        return ['answer']
+
+    def worker(burst: int, index: int, barrier: threading.Barrier, latencies: List[float]):
+        key = response_cache.key('bench', 1, {'burst': burst, 'request': index % distinct})
+        barrier.wait()
+        start = time.perf_counter()
+        response_cache.cached_call(db_path, key, model_call)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    try:
+        response_cache.CACHE_ENABLED = False
+        for mode, enabled in (('separate calls', False), ('single-flight', True)):
+            single_flight.SINGLE_FLIGHT_ENABLED = enabled
+            single_flight.reset_stats()
+            model_calls.clear()
+            latencies = []
+            for burst in range(bursts):
+                # Every thread sends its request at the same moment
+                barrier = threading.Barrier(threads)
+                pool = [threading.Thread(target=worker, args=(burst, i, barrier, latencies)) for i in range(threads)]
+                for thread in pool:
+                    thread.start()
+                for thread in pool:
+                    thread.join()
+            latencies = pd.Series(latencies)
+            results.append({
+                'mode': mode,
+                'requests': threads * bursts,
+                'model_calls': len(model_calls),
+                'calls_saved': single_flight.get_stats()['coalesced'],
+                'p50_ms': round(latencies.quantile(0.5), 2),
+                'p99_ms': round(latencies.quantile(0.99), 2),
+            })
+    finally:
+        response_cache.CACHE_ENABLED, single_flight.SINGLE_FLIGHT_ENABLED = saved
+        single_flight.reset_stats()
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+def _login_attempt(guarded: bool, email: str, client: str, password: str, stored: str) -> str:
+    """One login attempt; returns 'verified', 'failed', 'throttled' or 'busy'."""
+    try:
+        if guarded:
+            login_guard.check_attempt(email, client)
+            ok = login_guard.run_bounded(passwords.verify_password, password, stored)
+        else:
+            ok = passwords.verify_password(password, stored)
+    except login_guard.LoginRejected as e:
+        return 'throttled' if 'Too many' in str(e) else 'busy'
+    return 'verified' if ok else 'failed'
+
+def bench_login_flood(threads: int, attempts: int, iterations: int) -> pd.DataFrame:
+    """Flood logins from many threads with and without throttling and the bounded hashing pool.
+
+    A probe thread times a small CPU task throughout, standing in for the
+    other pages' requests.
+    """
+    passwords.PBKDF2_ITERATIONS = iterations
+    stored = passwords.hash_password('correct horse')
+    scenarios = {
+        # Many learners logging in at once, each from their own address
+        'many_users': lambda t, i: (f"user{t}-{i}@example.com", f"10.0.{t}.{i % 250}", 'correct horse'),
+        # One client guessing passwords for one account
+        'one_attacker': lambda t, i: ("victim@example.com", "203.0.113.7", f"guess-{t}-{i}"),
+    }
+    results = []
+    for scenario, make_attempt in scenarios.items():
+        for guarded in [False, True]:
+            login_guard.reset()
+            outcomes = {'verified': 0, 'failed': 0, 'throttled': 0, 'busy': 0}
+            latencies, probe_latencies = [], []
+            done = threading.Event()
+            lock = threading.Lock()
+
+            def probe():
+                while not done.is_set():
+                    start = time.perf_counter()
+                    sum(i * i for i in range(20000))
+                    probe_latencies.append(time.perf_counter() - start)
+                    time.sleep(0.005)
+
+            def worker(t: int):
+                for i in range(attempts):
+                    start = time.perf_counter()
+                    outcome = _login_attempt(guarded, *make_attempt(t, i), stored)
+                    with lock:
+                        outcomes[outcome] += 1
+                        if outcome in ('verified', 'failed'):
+                            latencies.append(time.perf_counter() - start)
+
+            probe_thread = threading.Thread(target=probe)
+            probe_thread.start()
+            start = time.perf_counter()
+            workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            done.set()
+            probe_thread.join()
+
+            hashed = pd.Series(latencies) * 1000 if latencies else pd.Series([float('nan')])
+            probe_ms = pd.Series(probe_latencies) * 1000
+            results.append({
+                'scenario': scenario,
+                'mode': 'guarded' if guarded else 'unbounded',
+                'attempts': threads * attempts,
+                **outcomes,
+                'seconds': round(elapsed, 2),
+                'hashes_per_sec': round(len(latencies) / elapsed, 1),
+                'verify_p50_ms': round(hashed.quantile(0.5), 1),
+                'verify_p99_ms': round(hashed.quantile(0.99), 1),
+                'probe_p50_ms': round(probe_ms.quantile(0.5), 2),
+                'probe_p99_ms': round(probe_ms.quantile(0.99), 2),
+            })
+    return pd.DataFrame(results)
+
+def _stress_worker(data_dir: str, worker: int, rows: int, total_rows: int):
+    """Write `rows` chat messages and `rows` progress entries from one process."""
+    data_manager.set_data_dir(data_dir)
+    # Keep chat retention out of the way so every row must survive
+    data_manager.CHAT_KEEP_MESSAGES = max(data_manager.CHAT_KEEP_MESSAGES, total_rows)
+    for i in range(rows):
+        chat_row = _chat_row(i)
+        chat_row['user_email'] = f"worker{worker}-user{i % 5}@example.com"
+        progress_row = _progress_row(i)
+        progress_row['user_email'] = chat_row['user_email']
+        if not data_manager.save_chat_message(chat_row) or not data_manager.save_progress_entry(progress_row):
+            raise RuntimeError(f"worker {worker} failed to save row {i}")
+    # Worker processes exit without running atexit hooks
+    data_manager.flush_writes()
+
+def bench_stress(processes: int, rows: int) -> pd.DataFrame:
+    """Run concurrent writer processes, check that no row was lost and report throughput.
+
+    Raises AssertionError if any table ends up with missing or duplicate rows,
+    or the per-user stats counters disagree with the tables.
+    """
+    base_dir = tempfile.mkdtemp(prefix="mentor_stress_")
+    try:
+        data_manager.set_data_dir(base_dir)
+        data_manager.init_data_files()
+
+        workers = [
+            multiprocessing.Process(target=_stress_worker, args=(base_dir, worker, rows, processes * rows))
+            for worker in range(processes)
+        ]
+        start = time.perf_counter()
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        failed = [process.exitcode for process in workers if process.exitcode != 0]
+        assert not failed, f"{len(failed)} writer processes failed"
+
+        data_manager.set_data_dir(base_dir)
+        mismatches = data_manager.check_user_stats()
+        assert mismatches.empty, f"user stats disagree with the tables:\n{mismatches.to_string(index=False)}"
+        expected = processes * rows
+        results = []
+        for table in ['chat_history', 'progress']:
+            df = data_manager._load_table(table)
+            assert len(df) == expected, f"{table}: expected {expected} rows, found {len(df)}"
+            assert df['id'].is_unique, f"{table}: duplicate ids"
+            results.append({
+                'table': table,
+                'processes': processes,
+                'rows': len(df),
+                'lost_rows': expected - len(df),
+                'rows_per_sec': round(expected / elapsed, 1)
+            })
+        return pd.DataFrame(results)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data_manager storage layer.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    append_parser = subparsers.add_parser('append', help="rows/sec of event log writes, before vs after")
+    append_parser.add_argument('--existing', type=int, default=5000, help="rows already in each table")
+    append_parser.add_argument('--rows', type=int, default=300, help="rows to write per run")
+
+    reads_parser = subparsers.add_parser('reads', help="per-user load latency with and without the table cache")
+    reads_parser.add_argument('--existing', type=int, default=20000, help="rows in each table")
+    reads_parser.add_argument('--repeats', type=int, default=20, help="loads to time per mode")
+
+    write_behind_parser = subparsers.add_parser('write-behind', help="save latency with and without the write-behind queue")
+    write_behind_parser.add_argument('--existing', type=int, default=5000, help="rows already in each table")
+    write_behind_parser.add_argument('--rows', type=int, default=2000, help="rows to save per run")
+
+    formats_parser = subparsers.add_parser('formats', help="memory and load latency of CSV vs Parquet tables")
+    formats_parser.add_argument('--rows', type=int, default=100000, help="rows in each table")
+    formats_parser.add_argument('--repeats', type=int, default=3, help="loads to time per measurement")
+
+    pages_parser = subparsers.add_parser('pages', help="full history loads vs keyset-paginated pages")
+    pages_parser.add_argument('--histories', type=int, nargs='+', default=[1000, 10000, 50000], help="rows in the user's history")
+    pages_parser.add_argument('--page-size', type=int, default=20, help="rows per page")
+    pages_parser.add_argument('--repeats', type=int, default=3, help="loads to time per measurement")
+
+    suite_parser = subparsers.add_parser('suite', help="p50/p99 latency, peak RSS and bytes read of every load/save call on synthetic data")
+    suite_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="rows per event table (1000 up to 10000000)")
+    suite_parser.add_argument('--calls', type=int, default=50, help="calls timed per operation")
+    suite_parser.add_argument('--seed', type=int, default=0, help="seed for the data sets and the users picked")
+    suite_parser.add_argument('--cold', action='store_true', help="clear the table cache before every call")
+    suite_parser.add_argument('--data-root', help="keep generated data sets here and reuse them on later runs")
+    suite_parser.add_argument('--output', help="CSV file to append the results to, for comparing runs")
+
+    login_parser = subparsers.add_parser('login', help="login and signup-check latency: users scan vs email index")
+    login_parser.add_argument('--users', type=int, default=1000000, help="registered users")
+    login_parser.add_argument('--calls', type=int, default=20, help="lookups timed per method")
+    login_parser.add_argument('--seed', type=int, default=0, help="seed for the users and the logins picked")
+
+    archive_parser = subparsers.add_parser('archive', help="recent-range and full loads before and after archiving old rows")
+    archive_parser.add_argument('--users', type=int, default=1000, help="synthetic users")
+    archive_parser.add_argument('--rows', type=int, default=200000, help="rows per event table")
+    archive_parser.add_argument('--calls', type=int, default=20, help="loads timed per operation")
+    archive_parser.add_argument('--seed', type=int, default=0, help="seed for the data set and the users picked")
+
+    text_parser = subparsers.add_parser('text', help="disk size and read throughput of compressed chat content and roadmap blobs")
+    text_parser.add_argument('--users', type=int, default=500, help="synthetic users (one roadmap each)")
+    text_parser.add_argument('--rows', type=int, default=100000, help="chat messages (and rows per other event table)")
+    text_parser.add_argument('--calls', type=int, default=20, help="page and roadmap loads timed per setting")
+    text_parser.add_argument('--seed', type=int, default=0, help="seed for the data set and the users picked")
+
+    tail_parser = subparsers.add_parser('tail', help="chat refresh after one new message: incremental tail reads vs full re-parses")
+    tail_parser.add_argument('--users', type=int, default=500, help="synthetic users")
+    tail_parser.add_argument('--rows', type=int, default=100000, help="chat messages (and rows per other event table)")
+    tail_parser.add_argument('--calls', type=int, default=50, help="save-then-load refreshes timed per mode")
+    tail_parser.add_argument('--seed', type=int, default=0, help="seed for the data set and the users picked")
+
+    records_parser = subparsers.add_parser('records', help="per-call cost of small per-user reads: DataFrames vs typed records")
+    records_parser.add_argument('--users', type=int, default=500, help="synthetic users")
+    records_parser.add_argument('--rows', type=int, default=100000, help="rows per event table")
+    records_parser.add_argument('--calls', type=int, default=100, help="calls timed per operation and type")
+    records_parser.add_argument('--seed', type=int, default=0, help="seed for the data set and the users picked")
+
+    ai_cache_parser = subparsers.add_parser('response-cache', help="AI request latency with and without the disk response cache (simulated model)")
+    ai_cache_parser.add_argument('--requests', type=int, default=500, help="requests made")
+    ai_cache_parser.add_argument('--distinct', type=int, default=100, help="distinct requests among them")
+    ai_cache_parser.add_argument('--model-ms', type=float, default=20, help="simulated model latency")
+    ai_cache_parser.add_argument('--max-entries', type=int, default=response_cache.MAX_ENTRIES, help="cache entry limit (lower it to see eviction)")
+    ai_cache_parser.add_argument('--seed', type=int, default=0, help="seed for the requests picked")
+
+    single_flight_parser = subparsers.add_parser('single-flight', help="model calls for bursts of identical AI requests with and without coalescing (simulated model)")
+    single_flight_parser.add_argument('--threads', type=int, default=16, help="sessions sending a request at once in each burst")
+    single_flight_parser.add_argument('--bursts', type=int, default=20, help="bursts sent")
+    single_flight_parser.add_argument('--distinct', type=int, default=2, help="distinct requests within a burst")
+    single_flight_parser.add_argument('--model-ms', type=float, default=50, help="simulated model latency")
+
+    flood_parser = subparsers.add_parser('login-flood', help="concurrent logins with and without throttling and the bounded hashing pool")
+    flood_parser.add_argument('--threads', type=int, default=32, help="threads attempting logins at once")
+    flood_parser.add_argument('--attempts', type=int, default=10, help="login attempts per thread")
+    flood_parser.add_argument('--iterations', type=int, default=passwords.PBKDF2_ITERATIONS, help="PBKDF2 iterations per hash")
+
+    stress_parser = subparsers.add_parser('stress', help="concurrent writer processes; fails if any row is lost")
+    stress_parser.add_argument('--processes', type=int, default=8, help="writer processes")
+    stress_parser.add_argument('--rows', type=int, default=200, help="chat and progress rows per process")
+
+    args = parser.parse_args()
+
+    if args.command == 'append':
+        print(bench_append(args.existing, args.rows).to_string(index=False))
+    elif args.command == 'reads':
+        print(bench_reads(args.existing, args.repeats).to_string(index=False))
+    elif args.command == 'write-behind':
+        print(bench_write_behind(args.existing, args.rows).to_string(index=False))
+    elif args.command == 'formats':
+        print(bench_formats(args.rows, args.repeats).to_string(index=False))
+    elif args.command == 'pages':
+        print(bench_pages(args.histories, args.page_size, args.repeats).to_string(index=False))
+    elif args.command == 'suite':
+        results = bench_suite(args.sizes, args.calls, args.seed, args.cold, args.data_root)
+        print(results.drop(columns=['run_at', 'revision']).to_string(index=False))
+        if args.output:
+            results.to_csv(args.output, mode='a', header=not os.path.exists(args.output), index=False)
+    elif args.command == 'login':
+        print(bench_login(args.users, args.calls, args.seed).to_string(index=False))
+    elif args.command == 'archive':
+        print(bench_archive(args.users, args.rows, args.calls, args.seed).to_string(index=False))
+    elif args.command == 'text':
+        print(bench_text(args.users, args.rows, args.calls, args.seed).to_string(index=False))
+    elif args.command == 'tail':
+        print(bench_tail(args.users, args.rows, args.calls, args.seed).to_string(index=False))
+    elif args.command == 'records':
+        print(bench_records(args.users, args.rows, args.calls, args.seed).to_string(index=False))
+    elif args.command == 'response-cache':
+        print(bench_response_cache(args.requests, args.distinct, args.model_ms, args.max_entries, args.seed).to_string(index=False))
+    elif args.command == 'single-flight':
+        print(bench_single_flight(args.threads, args.bursts, args.distinct, args.model_ms).to_string(index=False))
+    elif args.command == 'login-flood':
+        print(bench_login_flood(args.threads, args.attempts, args.iterations).to_string(index=False))
+    elif args.command == 'stress':
+        print(bench_stress(args.processes, args.rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
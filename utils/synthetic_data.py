@@ -0,0 +1,269 @@
+"""Synthetic data sets for exercising utils.data_manager at scale.
+
+Generates users with filled-in profiles, roadmaps with full JSON bodies and
+chat, interaction and progress histories whose activity is skewed towards a
+few heavy users, the way real usage is. Output is deterministic for a given
+seed and sizes, so benchmark runs against it are comparable. Rows are made
+and stored in chunks through data_manager.bulk_insert, which keeps memory
+flat from a thousand rows to ten million and honours DATA_BACKEND and
+DATA_LAYOUT.
+
+Run from the project root, e.g.:
+
+    python -m utils.synthetic_data --data-dir /tmp/mentor_data --rows 1000000
+"""
+import argparse
+import hashlib
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from utils import data_manager
+
+# Newest generated activity; fixed so repeated runs produce identical rows
+END_TIME = datetime(2025, 6, 1, 12, 0, 0)
+HISTORY_DAYS = 365
+
+FIRST_NAMES = [
+    'Aarav', 'Amelia', 'Ana', 'Chen', 'Daniel', 'Emma', 'Fatima', 'Hiro', 'Isabel', 'James',
+    'Kwame', 'Lena', 'Liam', 'Maria', 'Mateo', 'Noah', 'Olivia', 'Priya', 'Sofia', 'Yusuf'
+]
+LAST_NAMES = [
+    'Patel', 'Smith', 'Garcia', 'Wang', 'Okafor', 'Muller', 'Rossi', 'Kim', 'Silva', 'Nguyen',
+    'Khan', 'Brown', 'Tanaka', 'Ivanova', 'Mensah', 'Lopez', 'Cohen', 'Singh', 'Dubois', 'Haddad'
+]
+
+# Choices offered by the login, profile and progress pages
+EXPERIENCE_LEVELS = ["Beginner", "Intermediate", "Advanced", "Expert"]
+AGE_GROUPS = ["Under 18", "18-25", "26-35", "36-50", "50+"]
+INTERESTS = [
+    "Programming", "Data Science", "Machine Learning", "Web Development",
+    "Mobile Development", "Game Development", "Cybersecurity", "DevOps",
+    "UI/UX Design", "Digital Marketing", "Business Analysis", "Project Management"
+]
+SKILLS = [
+    "Python", "JavaScript", "Java", "C++", "Go", "Rust", "HTML/CSS", "React", "Django",
+    "Flask", "SQL", "Pandas", "NumPy", "Git", "Docker", "AWS", "Linux", "Figma"
+]
+TIME_COMMITMENTS = ["1-3 hours", "4-7 hours", "8-15 hours", "16-25 hours", "25+ hours"]
+LEARNING_STYLES = [
+    "Visual (videos, diagrams)", "Reading (articles, documentation)", "Hands-on (projects, coding)",
+    "Audio (podcasts, lectures)", "Mixed approach"
+]
+TIMELINES = ["1 month", "3 months", "6 months", "1 year"]
+PROGRESS_TYPES = [
+    "Completed a learning module", "Finished a project milestone", "Learned a new concept",
+    "Solved a coding problem", "Read documentation/tutorial", "Watched educational content",
+    "Practiced coding exercises", "Attended a course/workshop"
+]
+TIME_SPENT = ["15 minutes", "30 minutes", "1 hour", "2 hours", "3 hours", "4+ hours"]
+DIFFICULTY_RATINGS = ["😊 Easy", "🤔 Medium", "😅 Hard", "🤯 Very Hard"]
+INTERACTION_TYPES = ['project_suggestion', 'roadmap_view', 'profile_update']
+
+SENTENCES = [
+    "Start by setting up a small project so every new idea has somewhere to live.",
+    "Break the problem into pieces you can finish in a single study session.",
+    "Read the official documentation before reaching for a tutorial.",
+    "Write tests for the parts you are least sure about first.",
+    "Keep a short log of what you tried and what surprised you.",
+    "Review yesterday's notes for five minutes before starting anything new.",
+    "Pair the theory with an exercise that forces you to apply it.",
+    "When you get stuck, reduce the example until the problem is obvious.",
+    "Ship a rough version early and improve it in small steps.",
+    "Explain the concept out loud as if teaching a friend.",
+    "Use version control from the first line of code.",
+    "Compare your solution with two others and note the differences.",
+]
+QUESTIONS = [
+    "How should I structure my first {skill} project?",
+    "What is the best way to practice {skill} every day?",
+    "Can you explain how {skill} fits into {interest}?",
+    "I'm stuck on an error in my {skill} code, where should I look first?",
+    "Which {interest} topics should I learn next?",
+]
+
+def _text(rng: random.Random, sentences: int) -> str:
+    return ' '.join(rng.choice(SENTENCES) for _ in range(sentences))
+
+def _time_at(index: int, count: int) -> str:
+    """Time of the index-th of `count` rows spread evenly over the history, oldest first."""
+    seconds = HISTORY_DAYS * 86400 * (count - index) / max(count, 1)
+    return (END_TIME - timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
+
+def user_email(index: int) -> str:
+    """Email of the index-th generated user."""
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    return f"{first}.{last}.{index}@example.com".lower()
+
+def user_password(index: int) -> str:
+    """Plain-text password of the index-th generated user."""
+    return f"password-{index}"
+
+def make_user(index: int, rng: random.Random) -> Dict[str, Any]:
+    """One user with a filled-in profile."""
+    created_at = (END_TIME - timedelta(days=HISTORY_DAYS + 30, seconds=-index)).strftime('%Y-%m-%d %H:%M:%S')
+    return {
+        'name': f"{FIRST_NAMES[index % len(FIRST_NAMES)]} {LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]}",
+        'email': user_email(index),
+        'password': hashlib.sha256(user_password(index).encode()).hexdigest(),
+        'experience_level': rng.choice(EXPERIENCE_LEVELS),
+        'age_group': rng.choice(AGE_GROUPS),
+        'interests': ', '.join(rng.sample(INTERESTS, 3)),
+        'skills': ', '.join(rng.sample(SKILLS, 4)),
+        'time_commitment': rng.choice(TIME_COMMITMENTS),
+        'learning_style': rng.choice(LEARNING_STYLES),
+        'short_term_goals': _text(rng, 2),
+        'long_term_goals': _text(rng, 3),
+        'goals': '',
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+def make_roadmap_content(rng: random.Random, title: str) -> Dict[str, Any]:
+    """A roadmap body shaped like the ones generate_learning_roadmap returns (~10-30KB)."""
+    phases = []
+    for number in range(1, rng.randint(4, 8) + 1):
+        skill = rng.choice(SKILLS)
+        phases.append({
+            'title': f"Phase {number}: {skill} foundations",
+            'duration': f"{rng.randint(1, 4)} weeks",
+            'objective': _text(rng, 2),
+            'topics': [f"{rng.choice(SKILLS)}: {_text(rng, 1)}" for _ in range(rng.randint(5, 10))],
+            'activities': [_text(rng, 2) for _ in range(rng.randint(3, 6))],
+            'resources': [f"{rng.choice(SKILLS)} documentation - {_text(rng, 1)}" for _ in range(rng.randint(3, 6))],
+            'milestones': [f"Build a small {skill} project: {_text(rng, 1)}" for _ in range(rng.randint(2, 4))],
+        })
+    return {
+        'title': title,
+        'overview': _text(rng, 5),
+        'phases': phases,
+        'additional_resources': [_text(rng, 1) for _ in range(5)],
+        'tips': [_text(rng, 1) for _ in range(6)],
+    }
+
+def make_roadmap(index: int, count: int, email: str, rng: random.Random) -> Dict[str, Any]:
+    interest = rng.choice(INTERESTS)
+    title = f"{interest} roadmap #{index}"
+    created_at = _time_at(index, count)
+    return {
+        'user_email': email,
+        'title': title,
+        'goal': f"Become confident in {interest} by building real projects",
+        'timeline': rng.choice(TIMELINES),
+        'difficulty_level': rng.choice(EXPERIENCE_LEVELS),
+        'content': make_roadmap_content(rng, title),
+        'progress': rng.randint(0, 100),
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+def make_chat_message(index: int, count: int, email: str, rng: random.Random) -> Dict[str, Any]:
+    """Alternating questions and answers; answers vary from a few sentences to a long reply."""
+    if index % 2 == 0:
+        role = 'user'
+        content = rng.choice(QUESTIONS).format(skill=rng.choice(SKILLS), interest=rng.choice(INTERESTS))
+    else:
+        role = 'assistant'
+        content = _text(rng, rng.choice([3, 6, 12, 30]))
+    return {'user_email': email, 'role': role, 'content': content, 'timestamp': _time_at(index, count)}
+
+def make_interaction(index: int, count: int, email: str, rng: random.Random) -> Dict[str, Any]:
+    return {
+        'user_email': email,
+        'interaction_type': rng.choices(INTERACTION_TYPES, weights=[8, 3, 1])[0],
+        'details': f"Generated {rng.randint(1, 5)} projects for {rng.choice(INTERESTS)}",
+        'timestamp': _time_at(index, count),
+    }
+
+def make_progress_entry(index: int, count: int, email: str, rng: random.Random) -> Dict[str, Any]:
+    return {
+        'user_email': email,
+        'progress_type': rng.choice(PROGRESS_TYPES),
+        'description': _text(rng, rng.randint(1, 4)),
+        'time_spent': rng.choice(TIME_SPENT),
+        'difficulty_rating': rng.choice(DIFFICULTY_RATINGS),
+        'skills_gained': ', '.join(rng.sample(SKILLS, 2)),
+        'next_steps': _text(rng, 1),
+        'timestamp': _time_at(index, count),
+    }
+
+EVENT_MAKERS = {
+    'chat_history': make_chat_message,
+    'interactions': make_interaction,
+    'progress': make_progress_entry,
+}
+
+def activity_weights(users: int, skew: float = 0.8) -> List[float]:
+    """Cumulative Zipf-like weights: user 0 is the most active."""
+    return list(itertools.accumulate(1.0 / (rank ** skew) for rank in range(1, users + 1)))
+
+def generate(data_dir: str, users: int, rows: int, roadmaps: Optional[int] = None, seed: int = 0,
+             skew: float = 0.8, chunk_rows: int = 100000, force: bool = False) -> Dict[str, int]:
+    """Fill data_dir with `users` users, `roadmaps` roadmaps and `rows` rows per event table.
+
+    Returns the rows written per table. Refuses to write into a data dir that
+    already has files unless `force` is set.
+    """
+    if os.path.isdir(data_dir) and os.listdir(data_dir) and not force:
+        raise RuntimeError(f"{data_dir} is not empty; pick a new directory or use force")
+    if roadmaps is None:
+        roadmaps = users * 2
+
+    data_manager.set_data_dir(data_dir)
+    data_manager.init_data_files()
+    rng = random.Random(seed)
+    cum_weights = activity_weights(users, skew)
+    emails = [user_email(index) for index in range(users)]
+    written = {}
+
+    for start in range(0, users, chunk_rows):
+        batch = [make_user(index, rng) for index in range(start, min(start + chunk_rows, users))]
+        data_manager.bulk_insert('users', batch)
+    written['users'] = users
+
+    # Roadmaps are few but large, so they go in smaller chunks
+    roadmap_chunk = max(1, chunk_rows // 100)
+    for start in range(0, roadmaps, roadmap_chunk):
+        owners = rng.choices(emails, cum_weights=cum_weights, k=min(roadmap_chunk, roadmaps - start))
+        batch = [make_roadmap(start + offset, roadmaps, email, rng) for offset, email in enumerate(owners)]
+        data_manager.bulk_insert('roadmaps', batch)
+    written['roadmaps'] = roadmaps
+
+    for table, make_row in EVENT_MAKERS.items():
+        for start in range(0, rows, chunk_rows):
+            owners = rng.choices(emails, cum_weights=cum_weights, k=min(chunk_rows, rows - start))
+            if table == 'chat_history':
+                # Each question is followed by the mentor's answer to the same user
+                owners = [owners[offset - (start + offset) % 2] if offset else owners[0] for offset in range(len(owners))]
+            batch = [make_row(start + offset, rows, email, rng) for offset, email in enumerate(owners)]
+            data_manager.bulk_insert(table, batch)
+        written[table] = rows
+
+    data_manager.flush_writes()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic AI Mentor data set.")
+    parser.add_argument('--data-dir', required=True, help="directory to fill (must be empty)")
+    parser.add_argument('--rows', type=int, default=100000, help="rows per chat, interaction and progress table")
+    parser.add_argument('--users', type=int, help="users (default: rows / 100, at least 10)")
+    parser.add_argument('--roadmaps', type=int, help="roadmaps (default: 2 per user)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed; equal seeds and sizes give equal data")
+    parser.add_argument('--skew', type=float, default=0.8, help="Zipf exponent of per-user activity (0 for uniform)")
+    parser.add_argument('--force', action='store_true', help="write into a non-empty data dir")
+    args = parser.parse_args()
+
+    users = args.users or max(10, args.rows // 100)
+    start = time.perf_counter()
+    written = generate(args.data_dir, users, args.rows, args.roadmaps, args.seed, args.skew, force=args.force)
+    for table, count in written.items():
+        print(f"{table}: {count} rows")
+    print(f"Generated in {time.perf_counter() - start:.1f}s under DATA_BACKEND={data_manager.STORAGE_BACKEND} "
+          f"DATA_LAYOUT={data_manager.DATA_LAYOUT}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Compression for long text fields and blobs.
+
+Chat message content is stored compressed when it is longer than
+DATA_TEXT_COMPRESS_MIN_BYTES: the field holds `~z~` followed by the
+compressed bytes in base64, which needs no CSV quoting. Roadmap blobs are
+stored as the compressed bytes themselves. Values are only decompressed
+when a loader returns them, so scans that skip the content column never
+pay for it.
+
+zstd (the optional `zstandard` package) is used when it is installed,
+with a dictionary trained on earlier values of the same kind if one has
+been trained (`python -m utils.storage_admin train-text-dict`); otherwise
+zlib. Readers tell the formats apart by their magic bytes, and zstd frames
+name the dictionary they need, so values written under any setting stay
+readable. Text without the marker is returned as is.
+"""
+import base64
+import os
+import threading
+import zlib
+from typing import Any, Dict, List
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zlib is used without zstandard
+    zstandard = None
+
+# 'zstd' (falls back to zlib without the zstandard package), 'zlib' or 'off'
+TEXT_COMPRESSION = os.environ.get("DATA_TEXT_COMPRESSION", "zstd").lower()
+# Shorter values gain little and are stored as plain text
+COMPRESS_MIN_BYTES = int(os.environ.get("DATA_TEXT_COMPRESS_MIN_BYTES", "200"))
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+DICT_BYTES = 64 * 1024
+
+MARKER = '~z~'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+_dicts = {'dir': None, 'by_id': {}, 'current': {}}  # current: kind -> dict id
+_dict_lock = threading.Lock()
+_local = threading.local()
+
+def configure(dict_dir: str):
+    """Use the dictionaries in `dict_dir` (files named `<kind>-<dict id>.zdict`)."""
+    with _dict_lock:
+        _dicts['dir'] = dict_dir
+        _dicts['by_id'] = {}
+        _dicts['current'] = {}
+        if zstandard is None or not os.path.isdir(dict_dir):
+            return
+        # The newest dictionary of each kind compresses new values
+        newest = {}
+        for name in os.listdir(dict_dir):
+            kind, _, rest = name.partition('-')
+            if not name.endswith('.zdict') or not rest[:-len('.zdict')].isdigit():
+                continue
+            dict_id = int(rest[:-len('.zdict')])
+            path = os.path.join(dict_dir, name)
+            with open(path, 'rb') as f:
+                _dicts['by_id'][dict_id] = zstandard.ZstdCompressionDict(f.read())
+            mtime = os.path.getmtime(path)
+            if kind not in newest or mtime > newest[kind][0]:
+                newest[kind] = (mtime, dict_id)
+        _dicts['current'] = {kind: dict_id for kind, (_, dict_id) in newest.items()}
+
+def train_dictionary(kind: str, samples: List[bytes]) -> int:
+    """Train a zstd dictionary for a kind of value from samples, save it and use it; returns its id."""
+    if zstandard is None:
+        raise RuntimeError("Training a dictionary needs zstandard: pip install zstandard")
+    trained = zstandard.train_dictionary(DICT_BYTES, samples, level=ZSTD_LEVEL)
+    dict_id = trained.dict_id()
+    os.makedirs(_dicts['dir'], exist_ok=True)
+    path = os.path.join(_dicts['dir'], f"{kind}-{dict_id}.zdict")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(trained.as_bytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    configure(_dicts['dir'])
+    return dict_id
+
+def _compressor(kind: str):
+    """This thread's zstd compressor for a kind (zstandard objects aren't thread-safe)."""
+    dict_id = _dicts['current'].get(kind)
+    cache: Dict[Any, Any] = _local.__dict__.setdefault('compressors', {})
+    if dict_id not in cache:
+        dict_data = _dicts['by_id'].get(dict_id)
+        if dict_data is not None:
+            cache[dict_id] = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data)
+        else:
+            cache[dict_id] = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return cache[dict_id]
+
+def _decompressor(dict_id: int):
+    cache: Dict[Any, Any] = _local.__dict__.setdefault('decompressors', {})
+    if dict_id not in cache:
+        dict_data = _dicts['by_id'].get(dict_id) if dict_id else None
+        if dict_id and dict_data is None:
+            # Trained by another process since we loaded the dictionaries
+            configure(_dicts['dir'])
+            dict_data = _dicts['by_id'].get(dict_id)
+        if dict_id and dict_data is None:
+            raise RuntimeError(f"Missing zstd dictionary {dict_id} in {_dicts['dir']}")
+        cache[dict_id] = zstandard.ZstdDecompressor(dict_data=dict_data) if dict_data else zstandard.ZstdDecompressor()
+    return cache[dict_id]
+
+def compress(data: bytes, kind: str) -> bytes:
+    """Compress bytes with zstd (using the kind's dictionary, if any) or zlib."""
+    if TEXT_COMPRESSION == 'zstd' and zstandard is not None:
+        return _compressor(kind).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+def decompress(data: bytes) -> bytes:
+    """Decompress bytes written by compress() under any setting."""
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("Reading zstd-compressed data needs zstandard: pip install zstandard")
+        return _decompressor(zstandard.get_frame_parameters(data).dict_id).decompress(data)
+    return zlib.decompress(data)
+
+def encode_text(value: Any, kind: str) -> Any:
+    """A text field's stored form: compressed if it's long enough, else unchanged."""
+    if not isinstance(value, str):
+        return value
+    data = value.encode('utf-8')
+    # Text that happens to start with the marker is always encoded, so it decodes back to itself
+    if (TEXT_COMPRESSION == 'off' or len(data) < COMPRESS_MIN_BYTES) and not value.startswith(MARKER):
+        return value
+    return MARKER + base64.b64encode(compress(data, kind)).decode('ascii')
+
+def decode_text(value: Any) -> Any:
+    """The original text of a stored field (values that aren't encoded are returned as is)."""
+    if isinstance(value, str) and value.startswith(MARKER):
+        return decompress(base64.b64decode(value[len(MARKER):])).decode('utf-8')
+    return value
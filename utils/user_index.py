@@ -0,0 +1,101 @@
+"""Email-keyed index of user records for login and signup.
+
+One row per user in a small SQLite database, keyed by the lower-cased,
+trimmed email and holding the user's record as JSON, so checking whether an
+email is registered and fetching credentials is a primary-key lookup
+instead of a scan of the users table. Claiming a key is an atomic insert,
+which also makes signups race-free across processes. The users table stays
+the source of truth: the index can be rebuilt from it at any time.
+"""
+import json
+from typing import Dict, Any, Iterable, Optional
+
+import pandas as pd
+
+from utils import sqlite_store
+
+_initialized = set()
+
+def _connect(db_path: str):
+    conn = sqlite_store.connect(db_path)
+    if db_path not in _initialized:
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS users_by_email (email_key TEXT PRIMARY KEY, record TEXT NOT NULL)')
+        _initialized.add(db_path)
+    return conn
+
+def email_key(email: Any) -> str:
+    """The normalized form emails are indexed under."""
+    return str(email).strip().lower()
+
+def _json_value(value: Any) -> Any:
+    """Convert pandas/numpy scalars to JSON values (NaN becomes null, times become text)."""
+    if value is None or (not isinstance(value, (str, list, dict)) and pd.isna(value)):
+        return None
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def _encode(record: Dict[str, Any]) -> str:
+    return json.dumps({key: _json_value(value) for key, value in record.items()}, ensure_ascii=False)
+
+def claim(db_path: str, record: Dict[str, Any]) -> bool:
+    """Index a new user; False if their email (in any letter case) is already taken."""
+    conn = _connect(db_path)
+    with conn:
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO users_by_email (email_key, record) VALUES (?, ?)',
+            (email_key(record['email']), _encode(record))
+        )
+    return cursor.rowcount == 1
+
+def release(db_path: str, email: Any):
+    """Drop a user's entry (used when saving the claimed user fails)."""
+    conn = _connect(db_path)
+    with conn:
+        conn.execute('DELETE FROM users_by_email WHERE email_key = ?', (email_key(email),))
+
+def update(db_path: str, email: Any, fields: Dict[str, Any]) -> bool:
+    """Merge changed profile fields into a user's record; False if they aren't indexed."""
+    conn = _connect(db_path)
+    with conn:
+        row = conn.execute('SELECT record FROM users_by_email WHERE email_key = ?', (email_key(email),)).fetchone()
+        if row is None:
+            return False
+        record = json.loads(row[0])
+        record.update(fields)
+        conn.execute('UPDATE users_by_email SET record = ? WHERE email_key = ?', (_encode(record), email_key(email)))
+    return True
+
+def get(db_path: str, email: Any) -> Optional[Dict[str, Any]]:
+    """A user's record, or None if no user has this email."""
+    conn = _connect(db_path)
+    row = conn.execute('SELECT record FROM users_by_email WHERE email_key = ?', (email_key(email),)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def exists(db_path: str, email: Any) -> bool:
+    """Whether a user has this email."""
+    conn = _connect(db_path)
+    return conn.execute('SELECT 1 FROM users_by_email WHERE email_key = ?', (email_key(email),)).fetchone() is not None
+
+def add_all(db_path: str, records: Iterable[Dict[str, Any]]):
+    """Index many users at once; emails already indexed keep their first record."""
+    conn = _connect(db_path)
+    with conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO users_by_email (email_key, record) VALUES (?, ?)',
+            ((email_key(record['email']), _encode(record)) for record in records)
+        )
+
+def replace_all(db_path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Replace the whole index (used by rebuilds); returns the users indexed."""
+    conn = _connect(db_path)
+    with conn:
+        conn.execute('DELETE FROM users_by_email')
+        conn.executemany(
+            'INSERT OR IGNORE INTO users_by_email (email_key, record) VALUES (?, ?)',
+            ((email_key(record['email']), _encode(record)) for record in records)
+        )
+        return conn.execute('SELECT COUNT(*) FROM users_by_email').fetchone()[0]
@@ -0,0 +1,75 @@
+"""Per-user activity counters kept up to date on every save.
+
+One row per user in a small SQLite database holds how many rows the user
+has in each table, their first and last activity and their join date, so
+get_user_stats reads one row instead of scanning every table. Counters are
+bumped with an atomic upsert, which makes them safe to update from several
+processes; if they ever drift (e.g. a crash between a save and its counter
+update) they can be recomputed from the tables.
+"""
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+from utils import sqlite_store
+
+COUNTER_COLUMNS = ['roadmaps', 'interactions', 'chat_messages', 'chat_user_messages', 'progress_entries']
+TIME_COLUMNS = ['first_activity', 'last_activity', 'join_date']
+COLUMNS = ['user_email'] + COUNTER_COLUMNS + TIME_COLUMNS
+
+_initialized = set()
+
+def _connect(db_path: str):
+    conn = sqlite_store.connect(db_path)
+    if db_path not in _initialized:
+        with conn:
+            counters = ', '.join(f'{col} INTEGER NOT NULL DEFAULT 0' for col in COUNTER_COLUMNS)
+            times = ', '.join(f'{col} TEXT' for col in TIME_COLUMNS)
+            conn.execute(f'CREATE TABLE IF NOT EXISTS user_stats (user_email TEXT PRIMARY KEY, {counters}, {times})')
+        _initialized.add(db_path)
+    return conn
+
+def record(db_path: str, updates: List[Dict[str, Any]]):
+    """Add counter deltas and widen activity times, one update dict per user.
+
+    Each update has a user_email plus any of the counter columns (deltas, may
+    be negative), first_activity/last_activity and join_date.
+    """
+    if not updates:
+        return
+    placeholders = ', '.join('?' for _ in COLUMNS)
+    counter_sets = ', '.join(f'{col} = {col} + excluded.{col}' for col in COUNTER_COLUMNS)
+    conn = _connect(db_path)
+    with conn:
+        conn.executemany(
+            f'INSERT INTO user_stats ({", ".join(COLUMNS)}) VALUES ({placeholders}) '
+            f'ON CONFLICT(user_email) DO UPDATE SET {counter_sets}, '
+            'first_activity = COALESCE(MIN(first_activity, excluded.first_activity), first_activity, excluded.first_activity), '
+            'last_activity = COALESCE(MAX(last_activity, excluded.last_activity), last_activity, excluded.last_activity), '
+            'join_date = COALESCE(excluded.join_date, join_date)',
+            ([update.get(col, 0) for col in ['user_email'] + COUNTER_COLUMNS] +
+             [update.get(col) for col in TIME_COLUMNS] for update in updates)
+        )
+
+def get(db_path: str, user_email: str) -> Optional[Dict[str, Any]]:
+    """One user's counters, or None if nothing was recorded for them."""
+    conn = _connect(db_path)
+    row = conn.execute(f'SELECT {", ".join(COLUMNS)} FROM user_stats WHERE user_email = ?', (user_email,)).fetchone()
+    return dict(zip(COLUMNS, row)) if row else None
+
+def load_all(db_path: str) -> pd.DataFrame:
+    """Every user's counters."""
+    conn = _connect(db_path)
+    return pd.DataFrame(conn.execute(f'SELECT {", ".join(COLUMNS)} FROM user_stats').fetchall(), columns=COLUMNS)
+
+def replace_all(db_path: str, stats_df: pd.DataFrame):
+    """Replace every counter row (used by rebuilds)."""
+    stats_df = stats_df.reindex(columns=COLUMNS)
+    stats_df = stats_df.astype(object).where(pd.notna(stats_df), None)
+    conn = _connect(db_path)
+    with conn:
+        conn.execute('DELETE FROM user_stats')
+        conn.executemany(
+            f'INSERT INTO user_stats ({", ".join(COLUMNS)}) VALUES ({", ".join("?" for _ in COLUMNS)})',
+            ([sqlite_store._sql_value(value) for value in row] for row in stats_df.itertuples(index=False, name=None))
+        )
@@ -0,0 +1,152 @@
+"""Write-behind queue for event rows.
+
+save_* calls hand their row to an in-process queue and return at once; a
+background thread drains it, waiting up to the configured max latency so
+rows that arrive together are written in one batched append per file. The
+queue is bounded, so producers block if storage falls behind, and it is
+flushed when the interpreter exits. Reads don't wait for it: pending() hands
+them the rows not yet written. A batch that fails to write goes back to the
+front of the queue and is retried after RETRY_DELAY seconds.
+"""
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+RETRY_DELAY = 1.0
+
+_cond = threading.Condition()
+_pending = deque()  # (enqueued_at, table, row)
+_writing = []  # The batch being written, same entries
+_config = {
+    'writer': None,
+    'max_size': 10000,
+    'max_latency': 0.5,
+    'batch_size': 500,
+}
+_state = {
+    'thread': None,
+    'flush_waiters': 0,
+    'submitted': 0,
+    'written': 0,
+    'failed': 0,
+    'batches': 0,
+    'max_depth': 0,
+    'last_error': None,
+}
+
+def configure(writer: Callable[[str, List[Dict[str, Any]]], None], max_size: int, max_latency: float, batch_size: int):
+    """Set the function that writes a batch of one table's rows, and the queue limits."""
+    with _cond:
+        _config['writer'] = writer
+        _config['max_size'] = max_size
+        _config['max_latency'] = max_latency
+        _config['batch_size'] = batch_size
+
+def submit(table: str, row: Dict[str, Any]):
+    """Queue a row for writing, blocking while the queue is full."""
+    with _cond:
+        while len(_pending) >= _config['max_size']:
+            _cond.wait()
+        _pending.append((time.monotonic(), table, row))
+        _state['submitted'] += 1
+        _state['max_depth'] = max(_state['max_depth'], len(_pending))
+        _cond.notify_all()
+
+        thread = _state['thread']
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_run, name='write-behind', daemon=True)
+            _state['thread'] = thread
+            thread.start()
+
+def flush(timeout: float = None) -> bool:
+    """Wait until every row queued so far is written; False if `timeout` ran out first."""
+    if threading.current_thread() is _state['thread']:
+        return True
+    with _cond:
+        target = _state['submitted']
+        _state['flush_waiters'] += 1
+        _cond.notify_all()
+        try:
+            return _cond.wait_for(lambda: _state['written'] >= target, timeout)
+        finally:
+            _state['flush_waiters'] -= 1
+
+def pending(table: str) -> List[Dict[str, Any]]:
+    """Rows of a table queued or being written, in queue order.
+
+    A row being written may already be in storage too; readers de-duplicate
+    it by id.
+    """
+    with _cond:
+        return [row for _, row_table, row in list(_writing) + list(_pending) if row_table == table]
+
+def get_stats() -> Dict[str, Any]:
+    """Queue depth, throughput counters and the last write failure."""
+    with _cond:
+        return {
+            'queue_depth': len(_pending) + len(_writing),
+            'max_queue_depth': _state['max_depth'],
+            'submitted': _state['submitted'],
+            'written': _state['written'],
+            'failed': _state['failed'],
+            'batches': _state['batches'],
+            'avg_batch_size': _state['written'] / _state['batches'] if _state['batches'] else 0.0,
+            'last_error': _state['last_error']
+        }
+
+def _next_batch() -> list:
+    """Wait for rows, linger up to the max latency for more, and take a batch."""
+    with _cond:
+        while not _pending:
+            _cond.wait()
+        deadline = _pending[0][0] + _config['max_latency']
+        while len(_pending) < _config['batch_size'] and not _state['flush_waiters']:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _cond.wait(remaining)
+        batch = [_pending.popleft() for _ in range(min(len(_pending), _config['batch_size']))]
+        _writing[:] = batch
+        # Wake producers blocked on a full queue
+        _cond.notify_all()
+        return batch
+
+def _run():
+    while True:
+        batch = _next_batch()
+
+        # Keep each table's rows in queue order
+        by_table: Dict[str, list] = {}
+        for entry in batch:
+            by_table.setdefault(entry[1], []).append(entry)
+
+        retry = []
+        for table, entries in by_table.items():
+            try:
+                _config['writer'](table, [row for _, _, row in entries])
+            except Exception as e:
+                print(f"Error writing queued {table} rows, retrying: {str(e)}")
+                retry += entries
+                with _cond:
+                    _state['failed'] += len(entries)
+                    _state['last_error'] = f"{table}: {str(e)}"
+                continue
+            with _cond:
+                _state['written'] += len(entries)
+                _writing[:] = [entry for entry in _writing if entry[1] != table]
+                _cond.notify_all()
+
+        with _cond:
+            _state['batches'] += 1
+            # Failed rows go back to the front, ahead of rows queued since
+            _pending.extendleft(reversed(retry))
+            _writing.clear()
+        if retry:
+            time.sleep(RETRY_DELAY)
+
+@atexit.register
+def _flush_on_exit():
+    if _state['submitted'] and not flush(timeout=30):
+        print(f"Error flushing write-behind queue: {len(_pending) + len(_writing)} rows not written")